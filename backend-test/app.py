@@ -11,12 +11,14 @@ import uvicorn
 os.environ["TOKENIZERS_PARALLELISM"] = "false"
 
 from langchain_anthropic import ChatAnthropic
-from langchain_huggingface import HuggingFaceEmbeddings
 from langchain_community.vectorstores import Chroma
 from langchain.text_splitter import RecursiveCharacterTextSplitter
-from langchain.chains import RetrievalQA
+from langchain.chains.combine_documents import create_stuff_documents_chain
+from langchain.chains.question_answering.stuff_prompt import PROMPT_SELECTOR
 from langchain.docstore.document import Document
 
+from build_index import CHUNK_OVERLAP, CHUNK_SIZE, EMBEDDING_MODEL, create_embeddings, load_index
+
 # Load environment variables from .env file
 load_dotenv()
 
@@ -37,14 +39,34 @@ class RagResponse(BaseModel):
     answer: str
     sources: List[SourceDocument]
 
-# Global variables for vectorstore and LLM
+# Directory written by build_index.py
+INDEX_DIR = os.getenv("INDEX_DIR", "index")
+
+# Minimum relevance score (0-1) for a chunk to be used as answer context
+RELEVANCE_THRESHOLD = 0.1
+
+# Global variables for vectorstore, LLM and the answer chain
 vectorstore = None
 llm = None
+qa_chain = None
 
 def load_vectorstore():
-    """Load and initialize the vectorstore with documents."""
+    """Load the prebuilt index, or build an in-memory one from the sample file."""
     global vectorstore
     
+    # The query embedding model is needed either way
+    # (imported here: it pulls in torch, which only this step needs)
+    print("Loading embedding model...")
+    embedding = create_embeddings(EMBEDDING_MODEL, batch_size=32)
+    
+    # Prefer the index written by build_index.py: no re-encoding at startup
+    vectorstore = load_index(INDEX_DIR, embedding)
+    if vectorstore is not None:
+        print(f"Loaded prebuilt index from {INDEX_DIR}")
+        return vectorstore
+    
+    print(f"No built index in {INDEX_DIR} (run build_index.py); encoding the sample file instead")
+    
     # Read the sample text file
     print("Loading text file...")
     with open("data/flyff_clockworks.txt", "r", encoding="utf-8") as f:
@@ -53,8 +75,8 @@ def load_vectorstore():
     # Split text into smaller chunks for processing
     print("Splitting text into chunks...")
     text_splitter = RecursiveCharacterTextSplitter(
-        chunk_size=700,
-        chunk_overlap=100,
+        chunk_size=CHUNK_SIZE,
+        chunk_overlap=CHUNK_OVERLAP,
     )
     docs = text_splitter.split_text(raw_text)
     
@@ -62,14 +84,8 @@ def load_vectorstore():
     documents = [Document(page_content=chunk) for chunk in docs]
     print(f"Created {len(documents)} document chunks")
     
-    # Create embeddings using HuggingFace's free sentence transformer model
-    print("Creating embeddings...")
-    embedding = HuggingFaceEmbeddings(
-        model_name="sentence-transformers/all-mpnet-base-v2", 
-        model_kwargs={"device": "cpu"}
-    )
-    
     # Store embeddings in Chroma vector database
+    print("Creating embeddings...")
     vectorstore = Chroma.from_documents(documents, embedding)
     print("Vectorstore loaded successfully!")
     return vectorstore
@@ -85,40 +101,45 @@ def get_llm():
     )
     return llm
 
-def rag_answer(query: str, k: int = 5, temperature: float = 0.2):
-    """Core RAG logic reused by both CLI and API."""
-    global vectorstore, llm
+def build_qa_chain():
+    """Build the answer chain once; every request reuses it."""
+    global qa_chain
     
-    if not vectorstore:
-        raise ValueError("Vectorstore not initialized")
     if not llm:
         raise ValueError("LLM not initialized")
     
-    # Create a retriever to find relevant chunks
-    retriever = vectorstore.as_retriever(
-        search_type="similarity_score_threshold",
-        search_kwargs={"k": k, "score_threshold": 0.1},
-    )
+    # The same "stuff" prompt RetrievalQA uses, but fed with documents we
+    # retrieved ourselves so the search is not repeated inside the chain
+    qa_chain = create_stuff_documents_chain(llm, PROMPT_SELECTOR.get_prompt(llm))
+    return qa_chain
+
+async def rag_answer(query: str, k: int = 5, temperature: float = 0.2):
+    """Core RAG logic reused by both CLI (via asyncio.run) and API."""
+    if not vectorstore:
+        raise ValueError("Vectorstore not initialized")
+    if not qa_chain:
+        raise ValueError("QA chain not initialized")
     
-    # Set up the QA chain with retrieval
-    qa_chain = RetrievalQA.from_chain_type(
-        llm=llm,
-        retriever=retriever,
-        chain_type="stuff",
-    )
+    # Retrieve once, with scores; the results feed both the answer and the sources
+    docs_with_scores = await vectorstore.asimilarity_search_with_score(query, k=k)
+    
+    # Only sufficiently relevant chunks become context, as with the previous
+    # similarity_score_threshold retriever
+    relevance = vectorstore._select_relevance_score_fn()
+    context_docs = [
+        doc for doc, score in docs_with_scores if relevance(score) >= RELEVANCE_THRESHOLD
+    ]
     
-    # Get the result and source documents
-    result = qa_chain.invoke({"query": query})
+    # Generate the answer without blocking the event loop
+    answer = await qa_chain.ainvoke({"context": context_docs, "question": query})
     
-    # Get source documents with scores
-    docs_with_scores = vectorstore.similarity_search_with_score(query, k=k)
     sources = [
         SourceDocument(content=doc.page_content, score=float(score))
         for doc, score in docs_with_scores
     ]
     
     return {
-        "answer": result["result"],
+        "answer": answer,
         "sources": sources
     }
 
@@ -139,13 +160,14 @@ app.add_middleware(
 async def startup_event():
     load_vectorstore()
     get_llm()
+    build_qa_chain()
     print("✅ RAG system ready with Claude!")
 
 @app.post("/rag/search", response_model=RagResponse)
 async def rag_search(request: RagRequest):
     """RAG search endpoint."""
     try:
-        result = rag_answer(request.query, request.top_k, request.temperature)
+        result = await rag_answer(request.query, request.top_k, request.temperature)
         return RagResponse(**result)
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
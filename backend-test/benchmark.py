@@ -0,0 +1,143 @@
+"""Concurrent throughput of /rag/search with fake embedding and LLM backends.
+
+The fakes stand in for the local sentence-transformer model (CPU-bound, so it
+blocks while embedding) and for Claude (network-bound, with both a blocking and
+an async client), so the numbers show how well the endpoint overlaps requests.
+
+Usage:
+    python benchmark.py --requests 40 --concurrency 8
+"""
+import argparse
+import asyncio
+import hashlib
+import json
+import time
+from typing import Any, List, Optional
+
+import httpx
+from langchain.docstore.document import Document
+from langchain.text_splitter import RecursiveCharacterTextSplitter
+from langchain_community.vectorstores import Chroma
+from langchain_core.embeddings import Embeddings
+from langchain_core.language_models.chat_models import BaseChatModel
+from langchain_core.messages import AIMessage, BaseMessage
+from langchain_core.outputs import ChatGeneration, ChatResult
+
+import app
+
+QUERIES = [
+    "Who is Clockworks in FlyFF?",
+    "What level do you need to fight Clockworks?",
+    "Where is Clockworks found?",
+    "What does Clockworks drop?",
+]
+
+
+class FakeEmbeddings(Embeddings):
+    """Hashed bag-of-words vectors that block for ``latency`` seconds per call."""
+
+    def __init__(self, latency: float = 0.02, dimensions: int = 256):
+        self.latency = latency
+        self.dimensions = dimensions
+        self.calls = 0
+
+    def _vector(self, text: str) -> List[float]:
+        vector = [0.0] * self.dimensions
+        for word in text.lower().split():
+            digest = hashlib.blake2b(word.encode("utf-8"), digest_size=4).digest()
+            vector[int.from_bytes(digest, "little") % self.dimensions] += 1.0
+        norm = sum(value * value for value in vector) ** 0.5 or 1.0
+        return [value / norm for value in vector]
+
+    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        time.sleep(self.latency)
+        self.calls += 1
+        return [self._vector(text) for text in texts]
+
+    def embed_query(self, text: str) -> List[float]:
+        return self.embed_documents([text])[0]
+
+
+class FakeChatModel(BaseChatModel):
+    """Chat model that answers after ``latency`` seconds (blocking or awaited)."""
+
+    latency: float = 0.3
+
+    @property
+    def _llm_type(self) -> str:
+        return "fake-chat"
+
+    def _result(self) -> ChatResult:
+        return ChatResult(generations=[ChatGeneration(message=AIMessage(content="Clockworks is a boss."))])
+
+    def _generate(self, messages: List[BaseMessage], stop: Optional[List[str]] = None, run_manager: Any = None, **kwargs: Any) -> ChatResult:
+        time.sleep(self.latency)
+        return self._result()
+
+    async def _agenerate(self, messages: List[BaseMessage], stop: Optional[List[str]] = None, run_manager: Any = None, **kwargs: Any) -> ChatResult:
+        await asyncio.sleep(self.latency)
+        return self._result()
+
+
+def install_fakes(llm_latency: float, embed_latency: float) -> FakeEmbeddings:
+    """Load the sample corpus into Chroma with fake embeddings and use the fake LLM."""
+    with open("data/flyff_clockworks.txt", "r", encoding="utf-8") as f:
+        raw_text = f.read()
+    chunks = RecursiveCharacterTextSplitter(chunk_size=700, chunk_overlap=100).split_text(raw_text)
+    embeddings = FakeEmbeddings(latency=0)
+    app.vectorstore = Chroma.from_documents(
+        [Document(page_content=chunk) for chunk in chunks], embeddings, collection_name=f"bench-{time.time_ns()}"
+    )
+    embeddings.latency, embeddings.calls = embed_latency, 0
+    app.llm = FakeChatModel(latency=llm_latency)
+    # Older versions of app.py built the chain inside every request
+    if hasattr(app, "build_qa_chain"):
+        app.build_qa_chain()
+    return embeddings
+
+
+def percentile(values: List[float], pct: float) -> float:
+    ordered = sorted(values)
+    return ordered[max(0, min(len(ordered) - 1, int(round(pct / 100 * len(ordered))) - 1))]
+
+
+async def run(requests: int, concurrency: int) -> List[float]:
+    latencies: List[float] = []
+    next_index = iter(range(requests))
+    transport = httpx.ASGITransport(app=app.app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench", timeout=120) as client:
+        async def worker() -> None:
+            for index in next_index:
+                started = time.perf_counter()
+                response = await client.post("/rag/search", json={"query": QUERIES[index % len(QUERIES)]})
+                response.raise_for_status()
+                latencies.append(time.perf_counter() - started)
+
+        await asyncio.gather(*(worker() for _ in range(concurrency)))
+    return latencies
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--requests", type=int, default=40)
+    parser.add_argument("--concurrency", type=int, default=8)
+    parser.add_argument("--llm-latency", type=float, default=0.3)
+    parser.add_argument("--embed-latency", type=float, default=0.02)
+    args = parser.parse_args()
+
+    embeddings = install_fakes(args.llm_latency, args.embed_latency)
+    started = time.perf_counter()
+    latencies = asyncio.run(run(args.requests, args.concurrency))
+    elapsed = time.perf_counter() - started
+    print(json.dumps({
+        "requests": args.requests,
+        "concurrency": args.concurrency,
+        "req_per_s": round(len(latencies) / elapsed, 2),
+        "p50_ms": round(percentile(latencies, 50) * 1000, 1),
+        "p95_ms": round(percentile(latencies, 95) * 1000, 1),
+        "embedding_calls_per_request": round(embeddings.calls / args.requests, 2),
+    }, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,222 @@
+"""Build the persisted vector index for the RAG demo from a data directory.
+
+Usage:
+    python build_index.py --data-dir data --index-dir index --workers 4
+
+Files are split and encoded in parallel worker processes. A manifest of file
+content hashes is stored next to the index, so later runs re-embed only files
+that were added or changed (and drop the chunks of deleted files). The server
+loads the built index at startup instead of encoding the corpus itself.
+"""
+import argparse
+import hashlib
+import json
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+from typing import Dict, List, Optional, Tuple
+
+EMBEDDING_MODEL = "sentence-transformers/all-mpnet-base-v2"
+CHUNK_SIZE = 700
+CHUNK_OVERLAP = 100
+COLLECTION_NAME = "corpus"
+MANIFEST_FILE = "manifest.json"
+DATA_EXTENSIONS = (".txt", ".md")
+# Chroma rejects very large single writes
+WRITE_BATCH_SIZE = 5000
+
+# Embedding model of the current worker process
+_embedding = None
+
+
+def create_embeddings(model_name: str, batch_size: int):
+    """HuggingFace sentence-transformer embeddings on CPU."""
+    from langchain_huggingface import HuggingFaceEmbeddings
+
+    return HuggingFaceEmbeddings(
+        model_name=model_name,
+        model_kwargs={"device": "cpu"},
+        encode_kwargs={"batch_size": batch_size},
+    )
+
+
+def _init_worker(model_name: str, batch_size: int, threads: int):
+    """Load the model once per worker, with the CPU cores split between workers."""
+    global _embedding
+    # Must be set before torch is imported, or every worker uses every core
+    os.environ["OMP_NUM_THREADS"] = str(threads)
+    os.environ["MKL_NUM_THREADS"] = str(threads)
+    os.environ["TOKENIZERS_PARALLELISM"] = "false"
+    _embedding = create_embeddings(model_name, batch_size)
+
+
+def split_file(data_dir: str, relpath: str) -> Tuple[str, List[str]]:
+    from langchain.text_splitter import RecursiveCharacterTextSplitter
+
+    with open(os.path.join(data_dir, relpath), "r", encoding="utf-8") as f:
+        text = f.read()
+    splitter = RecursiveCharacterTextSplitter(chunk_size=CHUNK_SIZE, chunk_overlap=CHUNK_OVERLAP)
+    return relpath, splitter.split_text(text)
+
+
+def encode_batch(texts: List[str]) -> List[List[float]]:
+    return _embedding.embed_documents(texts)
+
+
+def file_hash(path: str) -> str:
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(1 << 20), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def scan_data_dir(data_dir: str) -> Dict[str, str]:
+    """Content hash of every corpus file, keyed by path relative to ``data_dir``."""
+    hashes = {}
+    for root, _, filenames in os.walk(data_dir):
+        for filename in sorted(filenames):
+            if filename.endswith(DATA_EXTENSIONS):
+                path = os.path.join(root, filename)
+                hashes[os.path.relpath(path, data_dir)] = file_hash(path)
+    return hashes
+
+
+def load_manifest(index_dir: str) -> Optional[Dict]:
+    try:
+        with open(os.path.join(index_dir, MANIFEST_FILE), "r", encoding="utf-8") as f:
+            return json.load(f)
+    except FileNotFoundError:
+        return None
+
+
+def write_manifest(index_dir: str, manifest: Dict):
+    """Write the manifest atomically, so an interrupted build never leaves it half-written."""
+    path = os.path.join(index_dir, MANIFEST_FILE)
+    with open(path + ".tmp", "w", encoding="utf-8") as f:
+        json.dump(manifest, f, indent=2)
+    os.replace(path + ".tmp", path)
+
+
+def embed_chunks(
+    chunks: List[str], pool: ProcessPoolExecutor, batch_size: int
+) -> List[List[float]]:
+    """Embed ``chunks`` across the pool, returning vectors in input order."""
+    # Batches of similar-length chunks waste less time on padding
+    order = sorted(range(len(chunks)), key=lambda index: len(chunks[index]))
+    batches = [order[start:start + batch_size] for start in range(0, len(order), batch_size)]
+    vectors = [None] * len(chunks)
+    results = pool.map(encode_batch, [[chunks[index] for index in batch] for batch in batches])
+    for batch, batch_vectors in zip(batches, results):
+        for index, vector in zip(batch, batch_vectors):
+            vectors[index] = vector
+    return vectors
+
+
+def build_index(
+    data_dir: str = "data",
+    index_dir: str = "index",
+    workers: int = 2,
+    batch_size: int = 32,
+    model_name: str = EMBEDDING_MODEL,
+    full: bool = False,
+) -> Dict:
+    """Bring the index in ``index_dir`` up to date with ``data_dir``; returns build stats."""
+    started = time.time()
+    os.makedirs(index_dir, exist_ok=True)
+    hashes = scan_data_dir(data_dir)
+    settings = {"model": model_name, "chunk_size": CHUNK_SIZE, "chunk_overlap": CHUNK_OVERLAP}
+
+    manifest = load_manifest(index_dir)
+    rebuild = full or manifest is None or manifest.get("settings") != settings
+    previous = {} if rebuild else manifest["files"]
+    changed = [relpath for relpath, digest in hashes.items() if previous.get(relpath, {}).get("hash") != digest]
+    removed = [relpath for relpath in previous if relpath not in hashes]
+
+    # Forget changed files first: if the build is interrupted, they are redone next time
+    files = {relpath: entry for relpath, entry in previous.items() if relpath in hashes and relpath not in changed}
+    write_manifest(index_dir, {"settings": settings, "files": files, "built_at": None})
+
+    import chromadb
+    from chromadb.errors import NotFoundError
+
+    client = chromadb.PersistentClient(path=index_dir)
+    if rebuild:
+        # Missing on a fresh directory: NotFoundError in chromadb 1.x, ValueError before
+        try:
+            client.delete_collection(COLLECTION_NAME)
+        except (NotFoundError, ValueError):
+            pass
+    collection = client.get_or_create_collection(COLLECTION_NAME)
+    for relpath in changed + removed:
+        collection.delete(where={"source": relpath})
+
+    chunk_count = 0
+    if changed:
+        threads = max(1, (os.cpu_count() or 1) // workers)
+        with ProcessPoolExecutor(
+            max_workers=workers,
+            initializer=_init_worker,
+            initargs=(model_name, batch_size, threads),
+        ) as pool:
+            split = list(pool.map(split_file, [data_dir] * len(changed), changed))
+            chunks = [(relpath, index, text) for relpath, texts in split for index, text in enumerate(texts)]
+            vectors = embed_chunks([text for _, _, text in chunks], pool, batch_size)
+
+        for start in range(0, len(chunks), WRITE_BATCH_SIZE):
+            batch = chunks[start:start + WRITE_BATCH_SIZE]
+            collection.upsert(
+                ids=[f"{relpath}:{index}" for relpath, index, _ in batch],
+                embeddings=vectors[start:start + WRITE_BATCH_SIZE],
+                documents=[text for _, _, text in batch],
+                metadatas=[{"source": relpath, "chunk_index": index} for relpath, index, _ in batch],
+            )
+        for relpath, texts in split:
+            files[relpath] = {"hash": hashes[relpath], "chunks": len(texts)}
+        chunk_count = len(chunks)
+
+    write_manifest(index_dir, {"settings": settings, "files": files, "built_at": time.time()})
+    return {
+        "files": len(hashes),
+        "embedded_files": len(changed),
+        "removed_files": len(removed),
+        "embedded_chunks": chunk_count,
+        "total_chunks": sum(entry["chunks"] for entry in files.values()),
+        "seconds": round(time.time() - started, 2),
+    }
+
+
+def load_index(index_dir: str, embedding, model_name: str = EMBEDDING_MODEL):
+    """Open a built index for querying, or return None if there is no usable one."""
+    manifest = load_manifest(index_dir)
+    if manifest is None or manifest.get("built_at") is None:
+        return None
+    if manifest["settings"]["model"] != model_name:
+        print(f"Index in {index_dir} was built with {manifest['settings']['model']}, not {model_name}; ignoring it")
+        return None
+
+    from langchain_community.vectorstores import Chroma
+
+    return Chroma(
+        collection_name=COLLECTION_NAME,
+        persist_directory=index_dir,
+        embedding_function=embedding,
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Build the RAG demo's vector index")
+    parser.add_argument("--data-dir", default="data")
+    parser.add_argument("--index-dir", default=os.getenv("INDEX_DIR", "index"))
+    parser.add_argument("--workers", type=int, default=max(1, min(4, (os.cpu_count() or 1) // 2)))
+    parser.add_argument("--batch-size", type=int, default=32, help="Chunks per encode call")
+    parser.add_argument("--model", default=EMBEDDING_MODEL)
+    parser.add_argument("--full", action="store_true", help="Re-embed every file")
+    args = parser.parse_args()
+
+    stats = build_index(args.data_dir, args.index_dir, args.workers, args.batch_size, args.model, args.full)
+    print(json.dumps(stats, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,174 @@
+"""Generate briefs for whole keyword lists.
+
+Usage:
+    python batch_briefs.py keywords.csv briefs.jsonl --concurrency 5
+
+The input is a CSV (with a ``keyword`` header and optional ``content_type``,
+``tone``, ``target_audience`` and ``scraped_content`` columns) or a JSONL
+file of BriefRequest objects. Each finished row is appended to the output
+JSONL right away, so rerunning the same command after a crash resumes with
+the rows that have not completed yet.
+"""
+import argparse
+import asyncio
+import csv
+import json
+import logging
+import os
+from typing import Any, Callable, Dict, Iterable, List, Optional, Set
+
+from dotenv import load_dotenv
+
+from models import BriefRequest
+from response_validator import ResponseValidator
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_BATCH_CONCURRENCY = int(os.getenv("BATCH_BRIEF_CONCURRENCY", 5))
+
+
+def read_brief_requests(path: str) -> List[BriefRequest]:
+    """Read BriefRequest rows from a CSV or JSONL file."""
+    with open(path, "r", encoding="utf-8") as f:
+        if path.endswith(".jsonl"):
+            rows = [json.loads(line) for line in f if line.strip()]
+        else:
+            rows = [
+                {key: value for key, value in row.items() if value not in (None, "")}
+                for row in csv.DictReader(f)
+            ]
+    return [BriefRequest(**row) for row in rows]
+
+
+def read_completed_rows(path: str, retry_failed: bool = False) -> Set[int]:
+    """Row numbers already recorded in an output JSONL file."""
+    completed: Set[int] = set()
+    if not os.path.exists(path):
+        return completed
+
+    with open(path, "r", encoding="utf-8") as f:
+        for line in f:
+            try:
+                record = json.loads(line)
+            except json.JSONDecodeError:
+                # A crash can leave a partially written last line
+                continue
+            if record.get("status") == "ok" or not retry_failed:
+                completed.add(record["row"])
+            else:
+                completed.discard(record["row"])
+    return completed
+
+
+def truncate_partial_line(path: str) -> None:
+    """Drop a half-written last line left behind by a crash."""
+    if not os.path.exists(path):
+        return
+    with open(path, "rb+") as f:
+        content = f.read()
+        if content and not content.endswith(b"\n"):
+            f.truncate(content.rfind(b"\n") + 1)
+
+
+async def generate_brief_row(service, row: int, request: BriefRequest) -> Dict[str, Any]:
+    """Generate and validate one brief, capturing errors in the record."""
+    try:
+        brief = await service.generate_brief(
+            keyword=request.keyword,
+            content_type=request.content_type,
+            tone=request.tone,
+            target_audience=request.target_audience,
+            scraped_content=request.scraped_content,
+        )
+        brief = ResponseValidator.validate_brief_response(brief)
+        return {"row": row, "keyword": request.keyword, "status": "ok", "brief": brief}
+    except Exception as e:
+        return {"row": row, "keyword": request.keyword, "status": "error", "error": str(e)}
+
+
+async def generate_briefs(
+    service,
+    requests: Iterable[BriefRequest],
+    concurrency: int = DEFAULT_BATCH_CONCURRENCY,
+    skip_rows: Optional[Set[int]] = None,
+    on_result: Optional[Callable[[Dict[str, Any]], None]] = None,
+) -> List[Dict[str, Any]]:
+    """Generate briefs concurrently, at most ``concurrency`` at a time.
+
+    ``on_result`` is called as soon as each row finishes, in completion order.
+    """
+    skip_rows = skip_rows or set()
+    semaphore = asyncio.Semaphore(max(1, concurrency))
+
+    async def run(row: int, request: BriefRequest) -> Dict[str, Any]:
+        async with semaphore:
+            record = await generate_brief_row(service, row, request)
+        if on_result:
+            on_result(record)
+        return record
+
+    results = await asyncio.gather(*[
+        run(row, request)
+        for row, request in enumerate(requests)
+        if row not in skip_rows
+    ])
+    return sorted(results, key=lambda record: record["row"])
+
+
+async def run_batch(
+    input_path: str,
+    output_path: str,
+    concurrency: int = DEFAULT_BATCH_CONCURRENCY,
+    retry_failed: bool = False,
+    service=None,
+) -> Dict[str, int]:
+    """Generate briefs for every pending row of ``input_path`` into ``output_path``."""
+    if service is None:
+        from langchain_service import LangChainService
+        service = LangChainService()
+
+    requests = read_brief_requests(input_path)
+    truncate_partial_line(output_path)
+    completed = read_completed_rows(output_path, retry_failed)
+    if completed:
+        logger.info(f"Resuming: {len(completed)} of {len(requests)} rows already done")
+
+    with open(output_path, "a", encoding="utf-8") as output:
+        def write_result(record: Dict[str, Any]) -> None:
+            output.write(json.dumps(record) + "\n")
+            output.flush()
+            os.fsync(output.fileno())
+
+        results = await generate_briefs(
+            service, requests, concurrency, skip_rows=completed, on_result=write_result
+        )
+
+    succeeded = sum(1 for record in results if record["status"] == "ok")
+    return {
+        "total": len(requests),
+        "skipped": len(completed),
+        "succeeded": succeeded,
+        "failed": len(results) - succeeded,
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Generate content briefs for a keyword list")
+    parser.add_argument("input", help="CSV or JSONL file of BriefRequest rows")
+    parser.add_argument("output", help="JSONL file to append results to")
+    parser.add_argument("--concurrency", type=int, default=DEFAULT_BATCH_CONCURRENCY)
+    parser.add_argument(
+        "--retry-failed", action="store_true", help="Regenerate rows that previously failed"
+    )
+    args = parser.parse_args()
+
+    load_dotenv()
+    logging.basicConfig(level=logging.INFO)
+    summary = asyncio.run(
+        run_batch(args.input, args.output, args.concurrency, args.retry_failed)
+    )
+    print(json.dumps(summary))
+
+
+if __name__ == "__main__":
+    main()
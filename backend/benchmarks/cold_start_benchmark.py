@@ -0,0 +1,87 @@
+"""Measure import time and time-to-first-200 on /api/health.
+
+Usage (from the backend directory):
+    python -m benchmarks.cold_start_benchmark --runs 3
+
+Each run starts a fresh uvicorn process, with FAST_BOOT enabled and disabled,
+and polls /api/health until it answers 200.
+"""
+import argparse
+import json
+import os
+import socket
+import statistics
+import subprocess
+import sys
+import time
+import urllib.request
+from typing import Dict, List
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def _free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def measure_import(fast_boot: bool) -> float:
+    """Wall time of ``import main`` in a fresh interpreter."""
+    env = dict(os.environ, FAST_BOOT=str(fast_boot).lower())
+    code = "import time; t = time.perf_counter(); import main; print(time.perf_counter() - t)"
+    output = subprocess.check_output([sys.executable, "-c", code], cwd=BACKEND_DIR, env=env)
+    return float(output.decode().strip().splitlines()[-1])
+
+
+def measure_first_200(fast_boot: bool, timeout: float = 60.0) -> float:
+    """Seconds from spawning uvicorn until /api/health returns 200."""
+    port = _free_port()
+    env = dict(os.environ, FAST_BOOT=str(fast_boot).lower())
+    started = time.perf_counter()
+    server = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "main:app", "--port", str(port), "--log-level", "warning"],
+        cwd=BACKEND_DIR,
+        env=env,
+        stdout=subprocess.DEVNULL,
+        stderr=subprocess.DEVNULL,
+    )
+    try:
+        while time.perf_counter() - started < timeout:
+            try:
+                with urllib.request.urlopen(f"http://127.0.0.1:{port}/api/health", timeout=1) as response:
+                    if response.status == 200:
+                        return time.perf_counter() - started
+            except OSError:
+                time.sleep(0.01)
+        raise TimeoutError("Server did not become healthy in time")
+    finally:
+        server.terminate()
+        server.wait()
+
+
+def summarize(samples: List[float]) -> Dict[str, float]:
+    return {
+        "median_s": round(statistics.median(samples), 3),
+        "min_s": round(min(samples), 3),
+        "max_s": round(max(samples), 3),
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--runs", type=int, default=3)
+    args = parser.parse_args()
+
+    results = {}
+    for fast_boot in (True, False):
+        mode = "fast_boot" if fast_boot else "eager"
+        results[mode] = {
+            "import": summarize([measure_import(fast_boot) for _ in range(args.runs)]),
+            "first_200": summarize([measure_first_200(fast_boot) for _ in range(args.runs)]),
+        }
+    print(json.dumps(results, indent=2))
+
+
+if __name__ == "__main__":
+    main()
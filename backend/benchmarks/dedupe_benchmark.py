@@ -0,0 +1,122 @@
+"""Embedding calls, index size and wasted retrieval slots with and without ingestion dedupe.
+
+The fixture crawl is a hobby site as the scraper sees it when a page has no
+main/article element: every page starts with the same navigation and cookie
+banner text, some articles are republished under a second URL with a new
+date line, and some pages are re-scraped. Pages are ingested with fake
+embeddings, then queries count how many of the top-k results are
+near-duplicates of a higher-ranked result (slots that add no new text).
+
+Usage (from the backend directory):
+    python -m benchmarks.dedupe_benchmark --pages 60 --queries 100 --k 5
+"""
+import argparse
+import json
+import random
+from typing import Any, Dict, List, Tuple
+
+from benchmarks.fake_llm import FakeEmbeddings
+from chunk_dedup import hamming_distance, simhash
+from constants import DEDUPE_MAX_DISTANCE
+from rag_service import RAGService
+
+WORDS = (
+    "compost soil water seed harvest spring autumn tool hive bee honey bread flour "
+    "oven wood saw plank bird nest feeder light pump nutrient root mulch worm pest "
+    "prune graft yeast starter chisel glue finish clamp wing song migrate perch"
+).split()
+
+SITE_CHROME = (
+    "Home Guides Shop Community Newsletter About Contact Search "
+    "We use cookies to personalise content and ads, to provide social media features "
+    "and to analyse our traffic. We also share information about your use of our site "
+    "with our social media, advertising and analytics partners who may combine it with "
+    "other information that you have provided to them or that they have collected from "
+    "your use of their services. Accept all cookies Reject non-essential cookies "
+    "Manage preferences. Free shipping on orders over fifty dollars. Join our newsletter "
+    "for seasonal tips, new guides and members-only discounts delivered every week. "
+    "Popular guides: getting started, tools for beginners, common mistakes, seasonal calendar."
+)
+
+
+def article(index: int, words: int) -> str:
+    rng = random.Random(index)
+    return " ".join(rng.choice(WORDS) for _ in range(words)) + "."
+
+
+def fixture_crawl(pages: int, words: int, seed: int) -> List[Tuple[str, str]]:
+    """(url, scraped text) pairs for one crawl of the fixture site."""
+    rng = random.Random(seed)
+    crawl = []
+    for index in range(pages):
+        crawl.append((f"https://hobby.example/guide/{index}", f"{SITE_CHROME} {article(index, words)}"))
+        if rng.random() < 0.2:
+            # Republished under a new URL with a changed date line
+            crawl.append((
+                f"https://hobby.example/archive/{index}",
+                f"{SITE_CHROME} Updated March {rng.randint(1, 28)}. {article(index, words)}",
+            ))
+        if rng.random() < 0.1:
+            crawl.append(crawl[-1])
+    return crawl
+
+
+def wasted_slots(results: List[Dict[str, Any]]) -> int:
+    """Results that near-duplicate a higher-ranked result."""
+    fingerprints: List[int] = []
+    wasted = 0
+    for result in results:
+        fingerprint = simhash(result["content"])
+        if any(hamming_distance(fingerprint, seen) <= DEDUPE_MAX_DISTANCE for seen in fingerprints):
+            wasted += 1
+        fingerprints.append(fingerprint)
+    return wasted
+
+
+def measure(crawl: List[Tuple[str, str]], queries: List[str], k: int, dedupe: bool) -> Dict[str, Any]:
+    service = RAGService(dedupe=dedupe)
+    embeddings = FakeEmbeddings(call_latency=0, text_latency=0)
+    service.embedding = embeddings
+    for url, content in crawl:
+        service.process_scraped_content(url, content)
+    index_rows = service.vectorstore._collection.count()
+
+    slots = wasted = 0
+    for query in queries:
+        results = service.retrieve_relevant_content(query, k=k)
+        slots += len(results)
+        wasted += wasted_slots(results)
+
+    report = service.ingestion_report()
+    chunks = sum(stats["chunks"] for stats in report.values())
+    dropped = sum(stats["duplicates"] + stats["boilerplate"] for stats in report.values())
+    service.clear_vectorstore()
+    return {
+        "dedupe": dedupe,
+        "chunks": chunks,
+        "embedded_texts": int(embeddings.stats["texts"] - len(queries)),
+        "index_rows": index_rows,
+        "drop_rate": round(dropped / chunks, 3),
+        "wasted_slot_rate": round(wasted / slots, 3) if slots else 0.0,
+        "sources_with_drops": sum(1 for stats in report.values() if stats["drop_rate"] > 0),
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--pages", type=int, default=60)
+    parser.add_argument("--words", type=int, default=600, help="Article words per page")
+    parser.add_argument("--queries", type=int, default=100)
+    parser.add_argument("--k", type=int, default=5)
+    parser.add_argument("--seed", type=int, default=7)
+    args = parser.parse_args()
+
+    crawl = fixture_crawl(args.pages, args.words, args.seed)
+    rng = random.Random(args.seed)
+    queries = [" ".join(rng.choice(WORDS) for _ in range(6)) for _ in range(args.queries)]
+    results = [measure(crawl, queries, args.k, dedupe) for dedupe in (False, True)]
+    print(json.dumps({"pages": len(crawl), "k": args.k, "results": results}, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,98 @@
+"""Throughput of the embedding batcher against a fake backend with per-call overhead.
+
+Concurrent callers embed a mix of single queries and page-sized chunk lists,
+either with one backend call each or through the shared EmbeddingBatcher. The
+fake backend charges a fixed overhead per call plus a small cost per text, and
+like a rate-limited API only serves a few calls at a time.
+
+Usage (from the backend directory):
+    python -m benchmarks.embedding_batch_benchmark --callers 200 --concurrency 32
+"""
+import argparse
+import asyncio
+import json
+import time
+from typing import Any, Callable, Dict, List
+
+from benchmarks.fake_llm import FakeEmbeddings
+from embedding_batcher import EmbeddingBatcher
+
+
+class LimitedBackend:
+    """FakeEmbeddings behind a limit on calls in flight."""
+
+    def __init__(self, embeddings: FakeEmbeddings, max_in_flight: int):
+        self.embeddings = embeddings
+        self.semaphore = asyncio.Semaphore(max_in_flight)
+
+    async def embed(self, texts: List[str]) -> List[List[float]]:
+        async with self.semaphore:
+            return await self.embeddings.aembed_documents(texts)
+
+
+def caller_texts(index: int, chunks_per_page: int) -> List[str]:
+    # Every fourth caller ingests a page; the rest embed a retrieval query
+    if index % 4 == 0:
+        return [f"page {index} chunk {chunk} about composting and soil" for chunk in range(chunks_per_page)]
+    return [f"query {index} about compost moisture"]
+
+
+def percentile(values: List[float], pct: float) -> float:
+    ordered = sorted(values)
+    return ordered[max(0, min(len(ordered) - 1, int(round(pct / 100 * len(ordered))) - 1))]
+
+
+async def run(
+    embed: Callable, embeddings: FakeEmbeddings, callers: int, concurrency: int, chunks_per_page: int
+) -> Dict[str, Any]:
+    latencies: List[float] = []
+    next_index = iter(range(callers))
+
+    async def worker() -> None:
+        for index in next_index:
+            texts = caller_texts(index, chunks_per_page)
+            started = time.perf_counter()
+            vectors = await embed(texts)
+            latencies.append(time.perf_counter() - started)
+            assert len(vectors) == len(texts)
+
+    started = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    elapsed = time.perf_counter() - started
+    return {
+        "texts_per_s": round(embeddings.stats["texts"] / elapsed, 1),
+        "backend_calls": embeddings.stats["calls"],
+        "texts_per_call": round(embeddings.stats["texts"] / embeddings.stats["calls"], 1),
+        "p50_ms": round(percentile(latencies, 50) * 1000, 1),
+        "p95_ms": round(percentile(latencies, 95) * 1000, 1),
+    }
+
+
+async def measure(args: argparse.Namespace, batched: bool) -> Dict[str, Any]:
+    embeddings = FakeEmbeddings(call_latency=args.call_latency, text_latency=args.text_latency)
+    backend = LimitedBackend(embeddings, args.max_in_flight)
+    embed = backend.embed
+    if batched:
+        embed = EmbeddingBatcher(backend.embed, max_batch_size=args.max_batch_size, max_wait=args.max_wait_ms / 1000).embed
+    result = await run(embed, embeddings, args.callers, args.concurrency, args.chunks_per_page)
+    return {"mode": "batched" if batched else "direct", **result}
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--callers", type=int, default=200)
+    parser.add_argument("--concurrency", type=int, default=32)
+    parser.add_argument("--chunks-per-page", type=int, default=12)
+    parser.add_argument("--call-latency", type=float, default=0.05, help="Fixed seconds per backend call")
+    parser.add_argument("--text-latency", type=float, default=0.0005, help="Extra seconds per embedded text")
+    parser.add_argument("--max-in-flight", type=int, default=4, help="Backend calls served at once")
+    parser.add_argument("--max-batch-size", type=int, default=64)
+    parser.add_argument("--max-wait-ms", type=float, default=5.0)
+    args = parser.parse_args()
+
+    results = [asyncio.run(measure(args, batched)) for batched in (False, True)]
+    print(json.dumps({"callers": args.callers, "concurrency": args.concurrency, "results": results}, indent=2))
+
+
+if __name__ == "__main__":
+    main()
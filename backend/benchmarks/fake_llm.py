@@ -0,0 +1,235 @@
+"""Deterministic local stand-ins for the LLM providers used by the backend."""
+import asyncio
+import hashlib
+import time
+from typing import Any, Dict, List, Optional
+
+from langchain_core.embeddings import Embeddings
+from langchain_core.language_models.chat_models import BaseChatModel
+from langchain_core.messages import AIMessage, BaseMessage
+from langchain_core.outputs import ChatGeneration, ChatResult
+from langchain_core.pydantic_v1 import Field
+
+# USD per million tokens, mirroring Anthropic's prompt caching multipliers
+DEFAULT_PRICING = {
+    "input": 3.00,
+    "cache_write": 3.75,
+    "cache_read": 0.30,
+    "output": 15.00,
+}
+
+
+def estimate_tokens(text: str) -> int:
+    """Rough token estimate (about four characters per token)."""
+    return max(1, len(text) // 4) if text else 0
+
+
+class FakeChatAnthropic(BaseChatModel):
+    """Chat model that simulates Anthropic latency, usage and prefix-cache pricing.
+
+    Content blocks marked with ``cache_control`` end a cacheable prefix. A
+    prefix that was seen before (and is long enough) is billed and timed as a
+    cache read, otherwise as a cache write, exactly like the real API.
+    """
+
+    model: str = "fake-claude"
+    output_tokens: int = 200
+    base_latency: float = 0.05
+    input_token_latency: float = 0.00002
+    output_tokens_per_second: float = 2000.0
+    min_cacheable_tokens: int = 1024
+    cache_ttl: float = 300.0
+    pricing: Dict[str, float] = Field(default_factory=lambda: dict(DEFAULT_PRICING))
+    stats: Dict[str, float] = Field(default_factory=dict)
+    prompt_cache: Dict[str, float] = Field(default_factory=dict)
+    # Extra seconds added to successive calls (consumed in order), to simulate tail latency
+    injected_latencies: List[float] = Field(default_factory=list)
+    # Canned answers for successive calls: a string is returned as text, a dict
+    # as the input of a call to the tool the request forces via ``tool_choice``
+    responses: List[Any] = Field(default_factory=list)
+    # Standing answers per tool name, used whenever a request forces that tool
+    tool_inputs: Dict[str, Dict[str, Any]] = Field(default_factory=dict)
+
+    @property
+    def _llm_type(self) -> str:
+        return "fake-anthropic-chat"
+
+    def reset_stats(self) -> None:
+        """Clear usage counters and the simulated prompt cache."""
+        self.stats.clear()
+        self.prompt_cache.clear()
+
+    def _blocks(self, messages: List[BaseMessage]) -> List[Dict[str, Any]]:
+        blocks = []
+        for message in messages:
+            if isinstance(message.content, str):
+                blocks.append({"text": message.content})
+            else:
+                for item in message.content:
+                    if isinstance(item, str):
+                        blocks.append({"text": item})
+                    else:
+                        blocks.append(item)
+        return blocks
+
+    def _usage(self, messages: List[BaseMessage], max_tokens: Optional[int] = None) -> Dict[str, int]:
+        """Compute Anthropic-style usage for a request, updating the cache."""
+        blocks = self._blocks(messages)
+        total_tokens = sum(estimate_tokens(block.get("text", "")) for block in blocks)
+
+        # The longest cache breakpoint decides what is read from or written to cache
+        cached_prefix_tokens = 0
+        cache_key = None
+        digest = hashlib.sha256()
+        running_tokens = 0
+        for block in blocks:
+            digest.update(block.get("text", "").encode("utf-8"))
+            running_tokens += estimate_tokens(block.get("text", ""))
+            if block.get("cache_control") and running_tokens >= self.min_cacheable_tokens:
+                cache_key = digest.hexdigest()
+                cached_prefix_tokens = running_tokens
+
+        usage = {
+            "input_tokens": total_tokens,
+            "cache_creation_input_tokens": 0,
+            "cache_read_input_tokens": 0,
+            "output_tokens": min(self.output_tokens, max_tokens or self.output_tokens),
+        }
+        if cache_key is None:
+            return usage
+
+        now = time.monotonic()
+        expires_at = self.prompt_cache.get(cache_key)
+        if expires_at is not None and expires_at > now:
+            usage["cache_read_input_tokens"] = cached_prefix_tokens
+        else:
+            usage["cache_creation_input_tokens"] = cached_prefix_tokens
+        self.prompt_cache[cache_key] = now + self.cache_ttl
+        usage["input_tokens"] = total_tokens - cached_prefix_tokens
+        return usage
+
+    def _latency(self, usage: Dict[str, int]) -> float:
+        # Cache reads skip prefill for the cached prefix
+        prefill_tokens = usage["input_tokens"] + usage["cache_creation_input_tokens"]
+        injected = self.injected_latencies.pop(0) if self.injected_latencies else 0.0
+        return (
+            injected
+            + self.base_latency
+            + prefill_tokens * self.input_token_latency
+            + usage["output_tokens"] / self.output_tokens_per_second
+        )
+
+    def _cost(self, usage: Dict[str, int]) -> float:
+        return (
+            usage["input_tokens"] * self.pricing["input"]
+            + usage["cache_creation_input_tokens"] * self.pricing["cache_write"]
+            + usage["cache_read_input_tokens"] * self.pricing["cache_read"]
+            + usage["output_tokens"] * self.pricing["output"]
+        ) / 1_000_000
+
+    def _record(self, usage: Dict[str, int], latency: float) -> None:
+        self.stats["calls"] = self.stats.get("calls", 0) + 1
+        for key, value in usage.items():
+            self.stats[key] = self.stats.get(key, 0) + value
+        self.stats["cost_usd"] = self.stats.get("cost_usd", 0.0) + self._cost(usage)
+        self.stats["latency_s"] = self.stats.get("latency_s", 0.0) + latency
+
+    def _canned_content(self, extra_body: Optional[Dict[str, Any]]) -> Any:
+        response = self.responses.pop(0)
+        if isinstance(response, str):
+            return response
+        tool_name = ((extra_body or {}).get("tool_choice") or {}).get("name", "tool")
+        return [{"type": "tool_use", "id": "toolu_fake", "name": tool_name, "input": response}]
+
+    def _result(
+        self, messages: List[BaseMessage], usage: Dict[str, int], extra_body: Optional[Dict[str, Any]] = None
+    ) -> ChatResult:
+        forced_tool = ((extra_body or {}).get("tool_choice") or {}).get("name")
+        if self.responses:
+            content = self._canned_content(extra_body)
+        elif forced_tool in self.tool_inputs:
+            content = [{
+                "type": "tool_use",
+                "id": "toolu_fake",
+                "name": forced_tool,
+                "input": dict(self.tool_inputs[forced_tool]),
+            }]
+        else:
+            seed = hashlib.sha256(
+                "".join(block.get("text", "") for block in self._blocks(messages)).encode("utf-8")
+            ).hexdigest()[:8]
+            text = f"Generated text {seed}. " + "lorem " * max(0, usage["output_tokens"] - 4)
+            content = text.strip()
+        return ChatResult(
+            generations=[ChatGeneration(message=AIMessage(content=content))],
+            llm_output={"model": self.model, "usage": usage},
+        )
+
+    def _generate(
+        self,
+        messages: List[BaseMessage],
+        stop: Optional[List[str]] = None,
+        run_manager: Any = None,
+        **kwargs: Any,
+    ) -> ChatResult:
+        usage = self._usage(messages, kwargs.get("max_tokens"))
+        latency = self._latency(usage)
+        time.sleep(latency)
+        self._record(usage, latency)
+        return self._result(messages, usage, kwargs.get("extra_body"))
+
+    async def _agenerate(
+        self,
+        messages: List[BaseMessage],
+        stop: Optional[List[str]] = None,
+        run_manager: Any = None,
+        **kwargs: Any,
+    ) -> ChatResult:
+        usage = self._usage(messages, kwargs.get("max_tokens"))
+        latency = self._latency(usage)
+        self.stats["started"] = self.stats.get("started", 0) + 1
+        await asyncio.sleep(latency)
+        self._record(usage, latency)
+        return self._result(messages, usage, kwargs.get("extra_body"))
+
+
+class FakeEmbeddings(Embeddings):
+    """Deterministic embedding backend with per-call and per-text latency.
+
+    Vectors are hashed bags of words, so texts that share words are close and
+    retrieval over them behaves sensibly. Calls block like the real HTTP client.
+    """
+
+    def __init__(self, dimensions: int = 256, call_latency: float = 0.02, text_latency: float = 0.0005):
+        self.dimensions = dimensions
+        self.call_latency = call_latency
+        self.text_latency = text_latency
+        self.stats: Dict[str, float] = {"calls": 0, "texts": 0}
+
+    def _vector(self, text: str) -> List[float]:
+        vector = [0.0] * self.dimensions
+        for word in text.lower().split():
+            digest = hashlib.blake2b(word.encode("utf-8"), digest_size=8).digest()
+            index = int.from_bytes(digest[:4], "little") % self.dimensions
+            vector[index] += 1.0 if digest[4] % 2 else -1.0
+        norm = sum(value * value for value in vector) ** 0.5 or 1.0
+        return [value / norm for value in vector]
+
+    def _embed(self, texts: List[str]) -> List[List[float]]:
+        time.sleep(self.call_latency + self.text_latency * len(texts))
+        self.stats["calls"] += 1
+        self.stats["texts"] += len(texts)
+        return [self._vector(text) for text in texts]
+
+    async def aembed_documents(self, texts: List[str]) -> List[List[float]]:
+        # Like the real async client: the latency is awaited, not blocked on
+        await asyncio.sleep(self.call_latency + self.text_latency * len(texts))
+        self.stats["calls"] += 1
+        self.stats["texts"] += len(texts)
+        return [self._vector(text) for text in texts]
+
+    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        return self._embed(texts)
+
+    def embed_query(self, text: str) -> List[float]:
+        return self._embed([text])[0]
@@ -0,0 +1,66 @@
+"""Run the API with the fake LLM and embedding backends installed.
+
+Used by ``benchmarks.load_test``, which starts it as a subprocess; can also be
+run by hand (from the backend directory):
+    python -m benchmarks.fake_server --port 8001 --llm-latency 0.05
+"""
+import argparse
+from typing import Any, Dict
+
+from benchmarks.fake_llm import FakeChatAnthropic, FakeEmbeddings
+
+FAKE_BRIEF = {
+    "title": "A Practical Guide for Beginners",
+    "meta_description": "Everything a beginner needs to get started, step by step.",
+    "outline": [
+        {"heading": f"Step {index}: getting it right", "subpoints": ["tools", "common mistakes", "tips"]}
+        for index in range(1, 6)
+    ],
+    "key_points": ["start small", "keep a routine", "learn from mistakes"],
+    "recommendations": {"tone": "casual", "style": "how-to", "target_audience": "beginners"},
+}
+
+FAKE_ANALYSIS = {"keyword": "beginner guide", "target_audience": "hobbyists getting started"}
+
+
+def install_fakes(llm: Any, embeddings: Any) -> None:
+    """Route every LLM stage to ``llm`` and embed with ``embeddings``."""
+    from model_router import model_router
+    from rag_service import InstrumentedEmbeddings, rag_service
+
+    model_router.llm_factory = lambda model, route: llm
+    model_router._llms.clear()
+    rag_service.embedding = InstrumentedEmbeddings(embeddings)
+
+
+def build_fakes(args: argparse.Namespace) -> Dict[str, Any]:
+    llm = FakeChatAnthropic(
+        base_latency=args.llm_latency,
+        output_tokens=args.output_tokens,
+        output_tokens_per_second=args.tokens_per_second,
+        tool_inputs={"submit_content_brief": FAKE_BRIEF, "submit_content_analysis": FAKE_ANALYSIS},
+    )
+    embeddings = FakeEmbeddings(call_latency=args.embed_latency, text_latency=args.embed_text_latency)
+    return {"llm": llm, "embeddings": embeddings}
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8001)
+    parser.add_argument("--llm-latency", type=float, default=0.05)
+    parser.add_argument("--output-tokens", type=int, default=200)
+    parser.add_argument("--tokens-per-second", type=float, default=2000.0)
+    parser.add_argument("--embed-latency", type=float, default=0.02)
+    parser.add_argument("--embed-text-latency", type=float, default=0.0005)
+    args = parser.parse_args()
+
+    import uvicorn
+    from main import app
+
+    install_fakes(**build_fakes(args))
+    uvicorn.run(app, host=args.host, port=args.port, log_level="warning")
+
+
+if __name__ == "__main__":
+    main()
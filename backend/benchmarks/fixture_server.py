@@ -0,0 +1,73 @@
+"""Local HTML fixture site for exercising ``UrlScraper`` without network access."""
+import random
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import List
+
+TOPICS = ["composting", "beekeeping", "sourdough", "birdwatching", "woodworking", "hydroponics"]
+WORDS = (
+    "guide beginners practical tools season soil water light temperature mistakes "
+    "tips steps equipment budget routine results patience community safety basics"
+).split()
+
+PAGE_TEMPLATE = """<!DOCTYPE html>
+<html><head><title>{title}</title><style>body {{ font-family: sans-serif; }}</style></head>
+<body>
+<nav><a href="/">Home</a> <a href="/about">About</a> <a href="/contact">Contact</a></nav>
+<div class="cookie-banner">We use cookies to improve your experience. Accept all cookies?</div>
+<main><article><h1>{title}</h1>{paragraphs}</article></main>
+<footer>Copyright 2024 Example Hobby Site. All rights reserved. Privacy policy. Terms of use.</footer>
+<script>console.log("analytics");</script>
+</body></html>"""
+
+
+def render_page(index: int, paragraphs: int = 12) -> str:
+    """Deterministic article page with site chrome (nav, cookie banner, footer)."""
+    rng = random.Random(index)
+    topic = TOPICS[index % len(TOPICS)]
+    body = "".join(
+        "<p>" + " ".join([topic] + [rng.choice(WORDS) for _ in range(rng.randint(40, 80))]) + ".</p>"
+        for _ in range(paragraphs)
+    )
+    return PAGE_TEMPLATE.format(title=f"A {topic} guide, part {index}", paragraphs=body)
+
+
+class _FixtureHandler(BaseHTTPRequestHandler):
+    def do_GET(self):
+        parts = self.path.strip("/").split("/")
+        if len(parts) != 2 or parts[0] != "page" or not parts[1].isdigit():
+            self.send_error(404)
+            return
+        body = render_page(int(parts[1])).encode("utf-8")
+        self.send_response(200)
+        self.send_header("Content-Type", "text/html; charset=utf-8")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+
+class FixtureServer:
+    """Serve ``/page/<n>`` fixture pages on a free local port in a background thread."""
+
+    def __init__(self, host: str = "127.0.0.1", port: int = 0):
+        self.server = ThreadingHTTPServer((host, port), _FixtureHandler)
+        self.thread = threading.Thread(target=self.server.serve_forever, daemon=True)
+
+    @property
+    def base_url(self) -> str:
+        host, port = self.server.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def page_urls(self, count: int) -> List[str]:
+        return [f"{self.base_url}/page/{index}" for index in range(count)]
+
+    def __enter__(self) -> "FixtureServer":
+        self.thread.start()
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.server.shutdown()
+        self.server.server_close()
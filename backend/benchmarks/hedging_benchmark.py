@@ -0,0 +1,79 @@
+"""Measure tail latency with and without hedged LLM requests against a fake LLM.
+
+A small share of calls is slowed down to simulate the provider's latency tail.
+
+Usage (from the backend directory):
+    python -m benchmarks.hedging_benchmark --calls 300
+"""
+import argparse
+import asyncio
+import json
+import random
+import time
+from typing import Any, Dict, List
+
+from langchain.schema import HumanMessage
+
+from benchmarks.fake_llm import FakeChatAnthropic
+from llm_gateway import TokenBucket, llm_gateway
+from model_router import HedgePolicy, ModelRouter, percentile
+
+
+def tail_latencies(calls: int, tail_share: float, tail_latency: float, seed: int) -> List[float]:
+    """Injected extra latency per call: ``tail_share`` of calls are ``tail_latency`` slower."""
+    rng = random.Random(seed)
+    return [tail_latency if rng.random() < tail_share else rng.uniform(0, 0.02) for _ in range(calls)]
+
+
+async def run(hedging: bool, calls: int, tail_share: float, tail_latency: float, seed: int) -> Dict[str, Any]:
+    fake_llm = FakeChatAnthropic(base_latency=0.05, input_token_latency=0)
+    # Enough injected delays for every original call and any duplicates
+    fake_llm.injected_latencies = tail_latencies(calls * 2, tail_share, tail_latency, seed)
+    router = ModelRouter(
+        llm_factory=lambda model, route: fake_llm,
+        hedging=HedgePolicy(enabled=hedging, min_delay=0, min_samples=20),
+    )
+
+    latencies = []
+    # Articles issue their sections one after another; run several articles at once
+    async def article(count: int) -> None:
+        for _ in range(count):
+            started = time.perf_counter()
+            await router.ainvoke("section", [HumanMessage(content="Write the next section.")])
+            latencies.append(time.perf_counter() - started)
+
+    articles = 6
+    await asyncio.gather(*(article(calls // articles) for _ in range(articles)))
+    return {
+        "calls": len(latencies),
+        "p50_s": round(percentile(latencies, 50), 3),
+        "p95_s": round(percentile(latencies, 95), 3),
+        "p99_s": round(percentile(latencies, 99), 3),
+        "extra_calls": int(fake_llm.stats.get("started", 0) - len(latencies)),
+    }
+
+
+async def main(args: argparse.Namespace) -> Dict[str, Any]:
+    # The fake LLM has no provider rate limits to respect
+    llm_gateway.request_bucket = TokenBucket(1_000_000)
+    llm_gateway.token_bucket = TokenBucket(1_000_000_000)
+    llm_gateway.limiter.limit = llm_gateway.limiter.max_limit
+
+    options = (args.calls, args.tail_share, args.tail_latency, args.seed)
+    baseline = await run(False, *options)
+    hedged = await run(True, *options)
+    return {
+        "baseline": baseline,
+        "hedged": hedged,
+        "p99_reduction": round(1 - hedged["p99_s"] / baseline["p99_s"], 3),
+        "extra_call_ratio": round(hedged["extra_calls"] / hedged["calls"], 3),
+    }
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--calls", type=int, default=300)
+    parser.add_argument("--tail-share", type=float, default=0.03)
+    parser.add_argument("--tail-latency", type=float, default=1.0)
+    parser.add_argument("--seed", type=int, default=7)
+    print(json.dumps(asyncio.run(main(parser.parse_args())), indent=2))
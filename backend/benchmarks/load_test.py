@@ -0,0 +1,394 @@
+"""Offline end-to-end load test of every API endpoint against fake backends.
+
+Starts the API in a subprocess with the fake LLM and embeddings from
+``benchmarks.fake_llm`` installed, serves scrape targets from a local HTML
+fixture site, and drives each endpoint at a fixed concurrency. Reports req/s,
+p50/p95/p99 latency and the server's peak RSS per endpoint.
+
+Usage (from the backend directory):
+    python -m benchmarks.load_test --requests 40 --concurrency 8 --output results.json
+    python -m benchmarks.load_test --baseline results.json --max-regression 0.2
+
+With ``--baseline`` the run exits non-zero if any endpoint's throughput, p95
+or peak RSS regressed by more than ``--max-regression``.
+"""
+import argparse
+import asyncio
+import json
+import os
+import platform
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+from typing import Any, Awaitable, Callable, Dict, List, Optional
+
+import httpx
+
+from benchmarks.fake_server import FAKE_BRIEF
+from benchmarks.fixture_server import FixtureServer
+from model_router import percentile
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+FIXTURE_PAGES = 20
+JOB_POLL_INTERVAL = 0.05
+RSS_SAMPLE_INTERVAL = 0.02
+
+Scenario = Callable[[httpx.AsyncClient, int, Dict[str, Any]], Awaitable[None]]
+
+
+def _free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def rss_mb(pid: int) -> Optional[float]:
+    """Resident set size of ``pid`` in MB, from /proc (None where unavailable)."""
+    try:
+        with open(f"/proc/{pid}/status") as f:
+            for line in f:
+                if line.startswith("VmRSS:"):
+                    return int(line.split()[1]) / 1024
+    except OSError:
+        pass
+    return None
+
+
+def _brief(index: int, content_id: Optional[str] = None) -> Dict[str, Any]:
+    brief = json.loads(json.dumps(FAKE_BRIEF))
+    brief["title"] = f"{brief['title']} #{index}"
+    brief["content_id"] = content_id
+    return brief
+
+
+async def _ok(response: httpx.Response) -> httpx.Response:
+    response.raise_for_status()
+    return response
+
+
+async def _wait_for_job(client: httpx.AsyncClient, job_id: str) -> None:
+    while True:
+        job = (await _ok(await client.get(f"/api/jobs/{job_id}"))).json()
+        if job["status"] == "succeeded":
+            return
+        if job["status"] in ("failed", "cancelled"):
+            raise RuntimeError(f"Job {job_id} {job['status']}: {job.get('error')}")
+        await asyncio.sleep(JOB_POLL_INTERVAL)
+
+
+async def health(client, index, state):
+    await _ok(await client.get("/api/health"))
+
+
+async def ready(client, index, state):
+    await _ok(await client.get("/api/ready"))
+
+
+async def prometheus_metrics(client, index, state):
+    await _ok(await client.get("/metrics"))
+
+
+async def stage_stats(client, index, state):
+    await _ok(await client.get("/api/stage-stats"))
+
+
+async def analyze_url(client, index, state):
+    url = state["page_urls"][index % len(state["page_urls"])]
+    await _ok(await client.post("/api/analyze-url", json={"url": url}))
+
+
+async def content(client, index, state):
+    await _ok(await client.get(f"/api/content/{state['content_id']}"))
+
+
+async def generate_brief(client, index, state):
+    await _ok(await client.post("/api/generate-brief", json={
+        "keyword": f"beginner guide {index}",
+        "content_id": state["content_id"],
+    }))
+
+
+async def generate_article(client, index, state):
+    # A distinct title per request, so no request resumes another's checkpoint
+    await _ok(await client.post("/api/generate-article", json=_brief(index, state["content_id"])))
+
+
+async def regenerate_article(client, index, state):
+    # The same brief with one edited heading: one section (plus neighbours' inputs) changes
+    brief = _brief(0, state["content_id"])
+    brief["outline"][index % len(brief["outline"])]["heading"] = f"Edited heading {index}"
+    await _ok(await client.post("/api/regenerate-article", json=brief))
+
+
+async def article_job(client, index, state):
+    job = (await _ok(await client.post(
+        "/api/jobs/generate-article", json=_brief(100_000 + index, state["content_id"])
+    ))).json()
+    await _wait_for_job(client, job["job_id"])
+
+
+async def brief_batch_job(client, index, state):
+    rows = [{"keyword": f"batch keyword {index}-{row}"} for row in range(3)]
+    job = (await _ok(await client.post(
+        "/api/jobs/generate-briefs", json={"requests": rows, "concurrency": 3}
+    ))).json()
+    await _wait_for_job(client, job["job_id"])
+
+
+async def job_events(client, index, state):
+    job = (await _ok(await client.post(
+        "/api/jobs/generate-article", json=_brief(200_000 + index, state["content_id"])
+    ))).json()
+    async with client.stream("GET", f"/api/jobs/{job['job_id']}/events") as response:
+        response.raise_for_status()
+        last_event = None
+        async for line in response.aiter_lines():
+            if line.startswith("data: "):
+                last_event = json.loads(line[len("data: "):])
+    if not last_event or last_event["status"] != "succeeded":
+        raise RuntimeError(f"Job {job['job_id']} did not succeed")
+
+
+SCENARIOS: Dict[str, Scenario] = {
+    "health": health,
+    "ready": ready,
+    "metrics": prometheus_metrics,
+    "stage_stats": stage_stats,
+    "analyze_url": analyze_url,
+    "content": content,
+    "generate_brief": generate_brief,
+    "generate_article": generate_article,
+    "regenerate_article": regenerate_article,
+    "article_job": article_job,
+    "brief_batch_job": brief_batch_job,
+    "job_events": job_events,
+}
+
+
+async def run_endpoint(
+    client: httpx.AsyncClient,
+    scenario: Scenario,
+    requests: int,
+    concurrency: int,
+    state: Dict[str, Any],
+    server_pid: int,
+) -> Dict[str, Any]:
+    """Issue ``requests`` calls of ``scenario`` with ``concurrency`` in flight."""
+    latencies: List[float] = []
+    errors: List[str] = []
+    next_index = iter(range(requests))
+    peak_rss = {"mb": rss_mb(server_pid)}
+    done = asyncio.Event()
+
+    async def sample_rss() -> None:
+        while not done.is_set():
+            current = rss_mb(server_pid)
+            if current is not None:
+                peak_rss["mb"] = max(peak_rss["mb"] or 0.0, current)
+            await asyncio.sleep(RSS_SAMPLE_INTERVAL)
+
+    async def worker() -> None:
+        for index in next_index:
+            started = time.perf_counter()
+            try:
+                await scenario(client, index, state)
+                latencies.append(time.perf_counter() - started)
+            except Exception as e:
+                errors.append(f"{type(e).__name__}: {str(e)}")
+
+    sampler = asyncio.create_task(sample_rss())
+    started = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    elapsed = time.perf_counter() - started
+    done.set()
+    await sampler
+
+    return {
+        "requests": requests,
+        "errors": len(errors),
+        "first_error": errors[0] if errors else None,
+        "rps": round(len(latencies) / elapsed, 2) if elapsed else 0.0,
+        "p50_ms": round(percentile(latencies, 50) * 1000, 1),
+        "p95_ms": round(percentile(latencies, 95) * 1000, 1),
+        "p99_ms": round(percentile(latencies, 99) * 1000, 1),
+        "peak_rss_mb": round(peak_rss["mb"], 1) if peak_rss["mb"] is not None else None,
+    }
+
+
+async def _wait_until_ready(client: httpx.AsyncClient, server: subprocess.Popen, timeout: float) -> None:
+    deadline = time.perf_counter() + timeout
+    while time.perf_counter() < deadline:
+        if server.poll() is not None:
+            raise RuntimeError(f"Server exited with code {server.returncode}")
+        try:
+            # Warm every service so its construction is not billed to the first endpoint
+            response = await client.get("/api/ready", params={"warm": "true"})
+            if response.status_code == 200:
+                return
+            if response.json().get("status") == "failed":
+                raise RuntimeError(f"Server warm-up failed: {response.text}")
+        except httpx.TransportError:
+            pass
+        await asyncio.sleep(0.1)
+    raise TimeoutError("Server did not become ready in time")
+
+
+def server_command(port: int, args: argparse.Namespace) -> List[str]:
+    return [
+        sys.executable, "-m", "benchmarks.fake_server",
+        "--port", str(port),
+        "--llm-latency", str(args.llm_latency),
+        "--output-tokens", str(args.output_tokens),
+        "--tokens-per-second", str(args.tokens_per_second),
+        "--embed-latency", str(args.embed_latency),
+        "--embed-text-latency", str(args.embed_text_latency),
+    ]
+
+
+def server_env(data_dir: str) -> Dict[str, str]:
+    """Environment for the server under test: no provider limits, throwaway state."""
+    return dict(
+        os.environ,
+        FAST_BOOT="true",
+        ANONYMIZED_TELEMETRY="False",
+        LLM_REQUESTS_PER_MINUTE="1000000",
+        LLM_TOKENS_PER_MINUTE="1000000000",
+        LLM_MAX_CONCURRENCY="64",
+        LLM_HEDGING="false",
+        JOB_QUEUE_MAX_SIZE="10000",
+        JOB_STORE_PATH=os.path.join(data_dir, "jobs.sqlite3"),
+        SECTION_CACHE_DIR=os.path.join(data_dir, "section_cache"),
+        CHECKPOINT_DIR=os.path.join(data_dir, "checkpoints"),
+        CONTENT_STORE_DIR=os.path.join(data_dir, "content_store"),
+    )
+
+
+async def run_load_test(args: argparse.Namespace) -> Dict[str, Any]:
+    endpoints = args.endpoints.split(",") if args.endpoints else list(SCENARIOS)
+    unknown = [name for name in endpoints if name not in SCENARIOS]
+    if unknown:
+        raise ValueError(f"Unknown endpoints: {', '.join(unknown)}")
+
+    port = _free_port()
+    results: Dict[str, Any] = {}
+    with FixtureServer() as fixtures, tempfile.TemporaryDirectory() as data_dir:
+        server = subprocess.Popen(
+            server_command(port, args),
+            cwd=BACKEND_DIR,
+            env=server_env(data_dir),
+            stdout=subprocess.DEVNULL,
+            stderr=None if args.verbose else subprocess.DEVNULL,
+        )
+        try:
+            limits = httpx.Limits(max_connections=args.concurrency * 2)
+            async with httpx.AsyncClient(
+                base_url=f"http://127.0.0.1:{port}", timeout=args.timeout, limits=limits
+            ) as client:
+                await _wait_until_ready(client, server, args.startup_timeout)
+                state: Dict[str, Any] = {"page_urls": fixtures.page_urls(FIXTURE_PAGES)}
+                # One stored page for the endpoints that reference scraped content
+                analysis = (await _ok(await client.post(
+                    "/api/analyze-url", json={"url": state["page_urls"][0]}
+                ))).json()
+                state["content_id"] = analysis["content_id"]
+
+                for name in endpoints:
+                    results[name] = await run_endpoint(
+                        client, SCENARIOS[name], args.requests, args.concurrency, state, server.pid
+                    )
+                    print(_format_row(name, results[name]), file=sys.stderr)
+        finally:
+            server.terminate()
+            server.wait()
+
+    return {
+        "config": {
+            "requests": args.requests,
+            "concurrency": args.concurrency,
+            "llm_latency": args.llm_latency,
+            "output_tokens": args.output_tokens,
+            "tokens_per_second": args.tokens_per_second,
+            "embed_latency": args.embed_latency,
+            "embed_text_latency": args.embed_text_latency,
+            "python": platform.python_version(),
+            "created_at": time.time(),
+        },
+        "endpoints": results,
+    }
+
+
+def compare_to_baseline(
+    results: Dict[str, Any], baseline: Dict[str, Any], max_regression: float = 0.2
+) -> List[str]:
+    """Endpoints whose req/s, p95 or peak RSS regressed by more than ``max_regression``."""
+    regressions = []
+    for name, current in results["endpoints"].items():
+        previous = baseline.get("endpoints", {}).get(name)
+        if previous is None:
+            continue
+        if current["errors"] > previous["errors"]:
+            regressions.append(f"{name}: errors {previous['errors']} -> {current['errors']}")
+        if previous["rps"] and current["rps"] < previous["rps"] * (1 - max_regression):
+            regressions.append(f"{name}: req/s {previous['rps']} -> {current['rps']}")
+        if previous["p95_ms"] and current["p95_ms"] > previous["p95_ms"] * (1 + max_regression):
+            regressions.append(f"{name}: p95 {previous['p95_ms']}ms -> {current['p95_ms']}ms")
+        if previous.get("peak_rss_mb") and current.get("peak_rss_mb") and (
+            current["peak_rss_mb"] > previous["peak_rss_mb"] * (1 + max_regression)
+        ):
+            regressions.append(
+                f"{name}: peak RSS {previous['peak_rss_mb']}MB -> {current['peak_rss_mb']}MB"
+            )
+    return regressions
+
+
+def _format_row(name: str, result: Dict[str, Any]) -> str:
+    rss = f"{result['peak_rss_mb']:.0f}MB" if result["peak_rss_mb"] is not None else "n/a"
+    return (
+        f"{name:<20} {result['rps']:>8.1f} req/s  p50 {result['p50_ms']:>7.1f}ms  "
+        f"p95 {result['p95_ms']:>7.1f}ms  p99 {result['p99_ms']:>7.1f}ms  "
+        f"rss {rss:>6}  errors {result['errors']}"
+    )
+
+
+def build_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--requests", type=int, default=40, help="Requests per endpoint")
+    parser.add_argument("--concurrency", type=int, default=8)
+    parser.add_argument("--endpoints", default="", help="Comma-separated subset of: " + ", ".join(SCENARIOS))
+    parser.add_argument("--output", help="Write results JSON here")
+    parser.add_argument("--baseline", help="Results JSON to compare against")
+    parser.add_argument("--max-regression", type=float, default=0.2)
+    parser.add_argument("--llm-latency", type=float, default=0.05)
+    parser.add_argument("--output-tokens", type=int, default=200)
+    parser.add_argument("--tokens-per-second", type=float, default=2000.0)
+    parser.add_argument("--embed-latency", type=float, default=0.02)
+    parser.add_argument("--embed-text-latency", type=float, default=0.0005)
+    parser.add_argument("--timeout", type=float, default=120.0)
+    parser.add_argument("--startup-timeout", type=float, default=60.0)
+    parser.add_argument("--verbose", action="store_true", help="Show server logs")
+    return parser
+
+
+def main() -> None:
+    args = build_parser().parse_args()
+    results = asyncio.run(run_load_test(args))
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(results, f, indent=2)
+    print(json.dumps(results, indent=2))
+
+    if args.baseline:
+        with open(args.baseline) as f:
+            baseline = json.load(f)
+        regressions = compare_to_baseline(results, baseline, args.max_regression)
+        for regression in regressions:
+            print(f"REGRESSION {regression}", file=sys.stderr)
+        if regressions:
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
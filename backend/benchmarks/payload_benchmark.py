@@ -0,0 +1,80 @@
+"""Compare payload bytes and Pydantic validation time: inline scraped content vs a content id.
+
+Usage (from the backend directory):
+    python -m benchmarks.payload_benchmark --content-kb 10
+"""
+import argparse
+import json
+import time
+from typing import Any, Callable, Dict
+
+from models import ArticleRequest, BriefRequest, BriefResponse, UrlAnalysisResponse
+
+BRIEF = {
+    "title": "A Practical Guide to Home Composting",
+    "meta_description": "Everything you need to start composting at home.",
+    "outline": [
+        {"heading": f"Section {i}", "subpoints": ["Why it matters", "How to do it", "Common mistakes"]}
+        for i in range(1, 7)
+    ],
+    "key_points": ["Greens and browns", "Moisture", "Aeration", "Troubleshooting"],
+    "recommendations": {"tone": "friendly", "style": "practical", "target_audience": "beginners"},
+}
+ANALYSIS = {"keyword": "home composting", "target_audience": "beginners", "content_type": "blog", "tone": "casual"}
+REQUEST = {"keyword": "home composting", "content_type": "blog", "tone": "casual", "target_audience": "beginners"}
+
+
+def time_validation(model: Callable[..., Any], payload: Dict[str, Any], iterations: int) -> float:
+    """Average microseconds to parse and validate one JSON body."""
+    body = json.dumps(payload)
+    started = time.perf_counter()
+    for _ in range(iterations):
+        model(**json.loads(body))
+    return (time.perf_counter() - started) / iterations * 1_000_000
+
+
+def hop_payloads(handle: Dict[str, Any]) -> Dict[str, Dict[str, Any]]:
+    """The four hops of the analyze -> brief -> article flow."""
+    return {
+        "UrlAnalysisResponse": (UrlAnalysisResponse, {**ANALYSIS, **handle}),
+        "BriefRequest": (BriefRequest, {**REQUEST, **handle}),
+        "BriefResponse": (BriefResponse, {**BRIEF, **handle}),
+        "ArticleRequest": (ArticleRequest, {**BRIEF, **handle}),
+    }
+
+
+def main(content_kb: int, iterations: int) -> Dict[str, Any]:
+    content = ("Scraped paragraph about composting. " * (content_kb * 30))[: content_kb * 1024]
+    variants = {
+        "inline_text": {"scraped_content": content},
+        "content_id": {"content_id": "3f2a9c0d5e7b41a68c1d2e3f4a5b6c7d"},
+    }
+
+    results: Dict[str, Any] = {}
+    for name, handle in variants.items():
+        hops = {}
+        for hop, (model, payload) in hop_payloads(handle).items():
+            hops[hop] = {
+                "bytes": len(json.dumps(payload).encode("utf-8")),
+                "validate_us": round(time_validation(model, payload, iterations), 1),
+            }
+        results[name] = {
+            "hops": hops,
+            "total_bytes": sum(hop["bytes"] for hop in hops.values()),
+            "total_validate_us": round(sum(hop["validate_us"] for hop in hops.values()), 1),
+        }
+
+    inline, handle = results["inline_text"], results["content_id"]
+    results["bytes_reduction"] = round(1 - handle["total_bytes"] / inline["total_bytes"], 3)
+    results["validation_time_reduction"] = round(
+        1 - handle["total_validate_us"] / inline["total_validate_us"], 3
+    )
+    return results
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--content-kb", type=int, default=10)
+    parser.add_argument("--iterations", type=int, default=2000)
+    args = parser.parse_args()
+    print(json.dumps(main(args.content_kb, args.iterations), indent=2))
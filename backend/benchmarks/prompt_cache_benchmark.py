@@ -0,0 +1,70 @@
+"""Measure prompt-prefix caching savings for one article against a fake LLM.
+
+Usage (from the backend directory):
+    python -m benchmarks.prompt_cache_benchmark
+"""
+import asyncio
+import json
+from typing import Any, Dict, List
+
+from benchmarks.fake_llm import FakeChatAnthropic
+from langchain_service import LangChainService
+from model_router import ModelRouter
+from rag_service import rag_service
+
+SAMPLE_BRIEF = {
+    "title": "A Practical Guide to Home Composting",
+    "meta_description": "Everything you need to start composting at home.",
+    "outline": [
+        {"heading": f"Section {i}", "subpoints": ["Why it matters", "How to do it", "Common mistakes"]}
+        for i in range(1, 7)
+    ],
+    "key_points": ["Greens and browns", "Moisture", "Aeration", "Troubleshooting"],
+    "recommendations": {"tone": "friendly", "style": "practical", "target_audience": "beginners"},
+}
+
+
+def fixture_retrieval(query: str, k: int = 5) -> List[Dict[str, Any]]:
+    """Deterministic stand-in for RAG retrieval returning fixed source chunks."""
+    return [
+        {
+            "content": f"Reference paragraph {i} about composting. " * 25,
+            "source": "https://example.com/composting",
+            "chunk_index": i,
+            "score": 0.9,
+        }
+        for i in range(k)
+    ]
+
+
+async def afixture_retrieval(query: str, k: int = 5, deadline: Any = None) -> List[Dict[str, Any]]:
+    return fixture_retrieval(query, k)
+
+
+async def run_article(prompt_caching: bool) -> Dict[str, float]:
+    service = LangChainService()
+    fake_llm = FakeChatAnthropic()
+    service.generator.config.prompt_caching = prompt_caching
+    service.generator.config.router = ModelRouter(llm_factory=lambda model, route: fake_llm)
+
+    await service.generate_article_from_brief(SAMPLE_BRIEF)
+    return dict(fake_llm.stats)
+
+
+async def main() -> Dict[str, Any]:
+    rag_service.aretrieve_relevant_content = afixture_retrieval
+
+    uncached = await run_article(prompt_caching=False)
+    cached = await run_article(prompt_caching=True)
+
+    return {
+        "uncached": uncached,
+        "cached": cached,
+        "input_tokens_read_from_cache": cached["cache_read_input_tokens"],
+        "cost_reduction": 1 - cached["cost_usd"] / uncached["cost_usd"],
+        "latency_reduction": 1 - cached["latency_s"] / uncached["latency_s"],
+    }
+
+
+if __name__ == "__main__":
+    print(json.dumps(asyncio.run(main()), indent=2))
@@ -0,0 +1,114 @@
+"""Memory versus recall@k of the shared vector index with quantized storage.
+
+The fixture corpus is seeded, clustered, unit-length vectors with
+heavy-tailed noise and very different spreads per dimension (like real
+sentence embeddings), split into segments as
+they would be by successive ingestions. Queries are fresh draws from the same
+distribution, and recall@k is measured against an exact float32 brute-force
+search. With ``rerank_factor`` 1 only the first-pass top k are re-scored, so
+its recall is that of the quantized scan alone.
+
+Usage (from the backend directory):
+    python -m benchmarks.quantization_benchmark --vectors 20000 --dim 768 --k 10
+"""
+import argparse
+import json
+import tempfile
+import time
+from typing import Any, Dict, List, Tuple
+
+import numpy as np
+
+from vector_index import SharedVectorIndex
+
+
+def fixture_vectors(vectors: int, queries: int, dim: int, seed: int, clusters: int = 64) -> Tuple[np.ndarray, np.ndarray]:
+    """Corpus and query vectors drawn from the same clustered distribution."""
+    rng = np.random.default_rng(seed)
+    spread = np.exp(rng.uniform(np.log(0.05), np.log(2.0), size=dim))
+    centers = rng.normal(size=(clusters, dim)) * spread
+
+    def sample(size: int) -> np.ndarray:
+        members = rng.integers(0, clusters, size=size)
+        # Heavy-tailed noise: a few outliers stretch each dimension's range, as in real embeddings
+        points = centers[members] + rng.standard_t(3, size=(size, dim)) * 0.5 * spread
+        # Unit length, like mpnet and OpenAI embeddings
+        return (points / np.linalg.norm(points, axis=1, keepdims=True)).astype(np.float32)
+
+    return sample(vectors), sample(queries)
+
+
+def exact_top_k(corpus: np.ndarray, queries: np.ndarray, k: int) -> List[set]:
+    norms = np.einsum("ij,ij->i", corpus, corpus)
+    results = []
+    for query in queries:
+        distances = norms - 2 * (corpus @ query)
+        results.append(set(np.argpartition(distances, k - 1)[:k].tolist()))
+    return results
+
+
+def measure(
+    corpus: np.ndarray,
+    queries: np.ndarray,
+    truth: List[set],
+    k: int,
+    quantization: str,
+    rerank_factor: int,
+    segment_rows: int,
+) -> Dict[str, Any]:
+    with tempfile.TemporaryDirectory() as directory:
+        index = SharedVectorIndex(directory, quantization=quantization, rerank_factor=rerank_factor)
+        for start in range(0, len(corpus), segment_rows):
+            rows = range(start, min(start + segment_rows, len(corpus)))
+            index.add(corpus[start:start + segment_rows], [{"id": row} for row in rows])
+
+        started = time.perf_counter()
+        hits = 0
+        for query, expected in zip(queries, truth):
+            found = {metadata["id"] for metadata, _ in index.search(query, k=k)}
+            hits += len(found & expected)
+        elapsed = time.perf_counter() - started
+
+        # Scanned vectors (and int8 scales) must stay in memory; float32 rows
+        # of re-ranked candidates are read from disk per query
+        scanned_bytes = sum(
+            segment.codes.nbytes + (segment.scale.nbytes * 2 if segment.scale is not None else 0)
+            for segment in index._segments
+        )
+        reranked_rows = 0 if quantization == "none" else sum(
+            min(k * rerank_factor, len(segment.codes)) for segment in index._segments
+        )
+        return {
+            "quantization": quantization,
+            "rerank_factor": rerank_factor if quantization != "none" else None,
+            "resident_mb": round(scanned_bytes / 2**20, 1),
+            "bytes_per_vector": round(scanned_bytes / len(corpus), 1),
+            "reranked_kb_per_query": round(reranked_rows * corpus.shape[1] * 4 / 1024, 1),
+            f"recall@{k}": round(hits / (len(queries) * k), 4),
+            "ms_per_query": round(elapsed / len(queries) * 1000, 2),
+        }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--vectors", type=int, default=20000)
+    parser.add_argument("--dim", type=int, default=768)
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("--k", type=int, default=10)
+    parser.add_argument("--segment-rows", type=int, default=5000)
+    parser.add_argument("--seed", type=int, default=7)
+    args = parser.parse_args()
+
+    corpus, queries = fixture_vectors(args.vectors, args.queries, args.dim, args.seed)
+    truth = exact_top_k(corpus, queries, args.k)
+
+    configurations = [("none", 1), ("float16", 1), ("float16", 4), ("int8", 1), ("int8", 4), ("int8", 8)]
+    results = [
+        measure(corpus, queries, truth, args.k, quantization, factor, args.segment_rows)
+        for quantization, factor in configurations
+    ]
+    print(json.dumps({"vectors": args.vectors, "dim": args.dim, "k": args.k, "results": results}, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,97 @@
+"""Serialization time and bytes on the wire for typical article and brief responses.
+
+Compares FastAPI's default JSONResponse with ORJSONResponse, and the body
+size uncompressed, gzip-compressed and (when installed) brotli-compressed.
+
+Usage (from the backend directory):
+    python -m benchmarks.serialization_benchmark --iterations 2000
+"""
+import argparse
+import json
+import random
+import time
+from typing import Any, Callable, Dict
+
+from fastapi.responses import JSONResponse, ORJSONResponse
+
+from compression import CompressionMiddleware, brotli
+from models import ArticleResponse, BriefResponse
+
+
+VOCABULARY = (
+    "compost soil garden kitchen scraps greens browns moisture aeration pile bin worms "
+    "nitrogen carbon heat decompose turn layer leaves grass coffee eggshells microbes "
+    "balance smell troubleshoot harvest mature finished beginners practical season"
+).split()
+
+
+def sample_article(words: int = 2000, seed: int = 7) -> Dict[str, Any]:
+    """Article-sized body with varied prose, so compression ratios are realistic."""
+    rng = random.Random(seed)
+    sentences = []
+    while sum(len(sentence.split()) for sentence in sentences) < words:
+        sentence = " ".join(rng.choice(VOCABULARY) for _ in range(rng.randint(8, 20)))
+        sentences.append(sentence.capitalize() + ".")
+    content = "# A Practical Guide to Home Composting\n\n" + " ".join(sentences)
+    body = {
+        "title": "A Practical Guide to Home Composting",
+        "content": content,
+        "word_count": len(content.split()),
+        "sections": 8,
+    }
+    ArticleResponse(**body)
+    return body
+
+
+def sample_brief() -> Dict[str, Any]:
+    body = {
+        "title": "A Practical Guide to Home Composting",
+        "meta_description": "Everything you need to start composting at home, from bins to troubleshooting.",
+        "outline": [
+            {"heading": f"Section {i}", "subpoints": ["Why it matters", "How to do it", "Common mistakes"]}
+            for i in range(1, 7)
+        ],
+        "key_points": ["Greens and browns", "Moisture", "Aeration", "Troubleshooting"],
+        "recommendations": {"tone": "friendly", "style": "practical", "target_audience": "beginners"},
+        "scraped_content": "",
+        "content_id": None,
+    }
+    BriefResponse(**body)
+    return body
+
+
+def time_render(response_class: Callable[..., Any], body: Dict[str, Any], iterations: int) -> float:
+    """Average microseconds to render one response body."""
+    started = time.perf_counter()
+    for _ in range(iterations):
+        response_class(content=body)
+    return (time.perf_counter() - started) / iterations * 1_000_000
+
+
+def wire_bytes(body: Dict[str, Any]) -> Dict[str, int]:
+    raw = json.dumps(body).encode("utf-8")
+    middleware = CompressionMiddleware(app=None)
+    sizes = {"identity": len(raw), "gzip": len(middleware._encoder("gzip").finish(raw))}
+    if brotli is not None:
+        sizes["br"] = len(middleware._encoder("br").finish(raw))
+    return sizes
+
+
+def main(iterations: int) -> Dict[str, Any]:
+    results = {}
+    for name, body in (("ArticleResponse", sample_article()), ("BriefResponse", sample_brief())):
+        json_us = time_render(JSONResponse, body, iterations)
+        orjson_us = time_render(ORJSONResponse, body, iterations)
+        results[name] = {
+            "json_response_us": round(json_us, 1),
+            "orjson_response_us": round(orjson_us, 1),
+            "serialization_speedup": round(json_us / orjson_us, 2),
+            "bytes": wire_bytes(body),
+        }
+    return results
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--iterations", type=int, default=2000)
+    print(json.dumps(main(parser.parse_args().iterations), indent=2))
@@ -0,0 +1,68 @@
+import json
+import logging
+import os
+import time
+from typing import Any, Dict
+
+from section_cache import atomic_write_json, section_cache_key
+
+logger = logging.getLogger(__name__)
+
+
+def checkpoint_key(brief_data: Dict[str, Any]) -> str:
+    """Identify a generation request by its brief, so reruns find their checkpoint."""
+    return section_cache_key({"brief": brief_data})
+
+
+class CheckpointStore:
+    """Per-request checkpoints of finished article stages, one JSON file per request.
+
+    Each completed stage (the intro and every section) is saved as soon as it
+    finishes; a rerun of the same brief loads them and resumes after the last
+    good stage. Checkpoints are cleared once the article succeeds.
+    """
+
+    def __init__(self, directory: str = ".checkpoints", ttl_seconds: float = 24 * 3600):
+        self.directory = directory
+        self.ttl_seconds = ttl_seconds
+
+    def _path(self, key: str) -> str:
+        return os.path.join(self.directory, f"{key}.json")
+
+    def load(self, key: str) -> Dict[str, str]:
+        """Completed stage outputs for ``key``, by stage name (empty if none)."""
+        path = self._path(key)
+        try:
+            if time.time() - os.path.getmtime(path) > self.ttl_seconds:
+                return {}
+            with open(path, "r", encoding="utf-8") as f:
+                return json.load(f)["stages"]
+        except FileNotFoundError:
+            return {}
+        except (OSError, ValueError, KeyError) as e:
+            logger.warning(f"Ignoring unreadable checkpoint {key}: {str(e)}")
+            return {}
+
+    def save_stage(self, key: str, stages: Dict[str, str], stage: str, content: str) -> None:
+        """Record ``stage`` in ``stages`` and persist the checkpoint."""
+        stages[stage] = content
+        try:
+            atomic_write_json(self._path(key), {"stages": stages, "updated_at": time.time()})
+        except OSError as e:
+            # Losing a checkpoint only costs a regeneration on rerun
+            logger.warning(f"Failed to write checkpoint {key}: {str(e)}")
+
+    def clear(self, key: str) -> None:
+        try:
+            os.remove(self._path(key))
+        except FileNotFoundError:
+            pass
+        except OSError as e:
+            logger.warning(f"Failed to remove checkpoint {key}: {str(e)}")
+
+
+# Shared store so a rerun in any worker resumes where the last attempt stopped
+checkpoint_store = CheckpointStore(
+    directory=os.getenv("CHECKPOINT_DIR", ".checkpoints"),
+    ttl_seconds=float(os.getenv("CHECKPOINT_TTL_SECONDS", 24 * 3600)),
+)
@@ -0,0 +1,85 @@
+import collections
+import hashlib
+import re
+from typing import Dict, List, Optional, Set, Tuple
+
+import numpy as np
+
+from constants import DEDUPE_MAX_DISTANCE, DEDUPE_SHINGLE_SIZE
+
+FINGERPRINT_BITS = 64
+
+_WORD = re.compile(r"\w+")
+_BIT_POSITIONS = np.arange(FINGERPRINT_BITS, dtype=np.uint64)
+
+
+def simhash(text: str, shingle_size: int = DEDUPE_SHINGLE_SIZE) -> int:
+    """64-bit SimHash of the word shingles of ``text``.
+
+    Texts that share most of their shingles get fingerprints that differ in
+    only a few bits, so near-duplicates are found by Hamming distance.
+    """
+    words = _WORD.findall(text.lower())
+    shingles = [
+        " ".join(words[start:start + shingle_size])
+        for start in range(max(1, len(words) - shingle_size + 1))
+    ]
+    hashes = np.array(
+        [int.from_bytes(hashlib.blake2b(shingle.encode("utf-8"), digest_size=8).digest(), "little") for shingle in shingles],
+        dtype=np.uint64,
+    )
+    # Each bit is set when most shingle hashes have it set
+    bits = (hashes[:, None] >> _BIT_POSITIONS) & np.uint64(1)
+    majority = bits.sum(axis=0) * 2 > len(shingles)
+    return int(sum(1 << int(position) for position in np.flatnonzero(majority)))
+
+
+def hamming_distance(a: int, b: int) -> int:
+    return bin(a ^ b).count("1")
+
+
+class ChunkDeduplicator:
+    """LSH index of chunk SimHashes for finding near-duplicates of new chunks.
+
+    Fingerprints are split into ``max_distance + 1`` bands: two fingerprints
+    within ``max_distance`` bits of each other must agree exactly on at least
+    one band, so only chunks sharing a band are compared.
+    """
+
+    def __init__(self, max_distance: int = DEDUPE_MAX_DISTANCE):
+        self.max_distance = max_distance
+        bands = max_distance + 1
+        edges = [round(FINGERPRINT_BITS * band / bands) for band in range(bands + 1)]
+        self._bands = [(start, (1 << (end - start)) - 1) for start, end in zip(edges, edges[1:])]
+        self._buckets: List[Dict[int, List[int]]] = [collections.defaultdict(list) for _ in self._bands]
+        self._entries: List[Tuple[int, str]] = []
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def _keys(self, fingerprint: int) -> List[int]:
+        return [(fingerprint >> start) & mask for start, mask in self._bands]
+
+    def add(self, fingerprint: int, source: str) -> None:
+        entry = len(self._entries)
+        self._entries.append((fingerprint, source))
+        for buckets, key in zip(self._buckets, self._keys(fingerprint)):
+            buckets[key].append(entry)
+
+    def find(self, fingerprint: int) -> Optional[str]:
+        """Source of a stored near-duplicate of ``fingerprint``, if there is one."""
+        seen: Set[int] = set()
+        for buckets, key in zip(self._buckets, self._keys(fingerprint)):
+            for entry in buckets.get(key, ()):
+                if entry in seen:
+                    continue
+                seen.add(entry)
+                stored, source = self._entries[entry]
+                if hamming_distance(stored, fingerprint) <= self.max_distance:
+                    return source
+        return None
+
+    def clear(self) -> None:
+        for buckets in self._buckets:
+            buckets.clear()
+        self._entries = []
@@ -0,0 +1,133 @@
+import zlib
+from typing import Any, Optional
+
+from starlette.datastructures import Headers, MutableHeaders
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+try:
+    import brotli
+except ImportError:  # brotli is optional; gzip is always available
+    brotli = None
+
+# Streams that must reach the client event by event are never compressed
+UNCOMPRESSED_CONTENT_TYPES = ("text/event-stream",)
+
+
+class _GzipEncoder:
+    def __init__(self, level: int):
+        self._compressor = zlib.compressobj(level, zlib.DEFLATED, 31)
+
+    def compress(self, data: bytes) -> bytes:
+        return self._compressor.compress(data) + self._compressor.flush(zlib.Z_SYNC_FLUSH)
+
+    def finish(self, data: bytes = b"") -> bytes:
+        return self._compressor.compress(data) + self._compressor.flush()
+
+
+class _BrotliEncoder:
+    def __init__(self, quality: int):
+        self._compressor = brotli.Compressor(quality=quality)
+
+    def compress(self, data: bytes) -> bytes:
+        return self._compressor.process(data) + self._compressor.flush()
+
+    def finish(self, data: bytes = b"") -> bytes:
+        return self._compressor.process(data) + self._compressor.finish()
+
+
+def negotiate_encoding(accept_encoding: str, brotli_available: bool = brotli is not None) -> Optional[str]:
+    """Pick ``br`` or ``gzip`` from an Accept-Encoding header, honouring q-values."""
+    offered = {}
+    for part in accept_encoding.lower().split(","):
+        name, _, params = part.strip().partition(";")
+        quality = 1.0
+        params = params.strip()
+        if params.startswith("q="):
+            try:
+                quality = float(params[2:])
+            except ValueError:
+                quality = 0.0
+        if name:
+            offered[name] = quality
+
+    candidates = ["br", "gzip"] if brotli_available else ["gzip"]
+    best = None
+    for encoding in candidates:
+        quality = offered.get(encoding, offered.get("*", 0.0))
+        if quality > 0 and (best is None or quality > offered.get(best, offered.get("*", 0.0))):
+            best = encoding
+    return best
+
+
+class CompressionMiddleware:
+    """Negotiated brotli/gzip compression for responses of at least ``minimum_size`` bytes.
+
+    Works like Starlette's GZipMiddleware, but prefers brotli when the client
+    accepts it and the optional ``brotli`` package is installed, and leaves
+    server-sent event streams alone.
+    """
+
+    def __init__(self, app: ASGIApp, minimum_size: int = 1024, gzip_level: int = 6, brotli_quality: int = 4):
+        self.app = app
+        self.minimum_size = minimum_size
+        self.gzip_level = gzip_level
+        self.brotli_quality = brotli_quality
+
+    def _encoder(self, encoding: str) -> Any:
+        if encoding == "br":
+            return _BrotliEncoder(self.brotli_quality)
+        return _GzipEncoder(self.gzip_level)
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        encoding = negotiate_encoding(Headers(scope=scope).get("accept-encoding", ""))
+        if encoding is None:
+            await self.app(scope, receive, send)
+            return
+
+        initial_message: Message = {}
+        state = {"started": False, "encoder": None}
+
+        async def send_compressed(message: Message) -> None:
+            nonlocal initial_message
+            if message["type"] == "http.response.start":
+                # Hold the headers back until the first body chunk decides the encoding
+                initial_message = message
+                return
+            if message["type"] != "http.response.body":
+                await send(message)
+                return
+
+            body = message.get("body", b"")
+            more_body = message.get("more_body", False)
+            if not state["started"]:
+                state["started"] = True
+                headers = MutableHeaders(raw=initial_message["headers"])
+                skip = (
+                    "content-encoding" in headers
+                    or headers.get("content-type", "").startswith(UNCOMPRESSED_CONTENT_TYPES)
+                    or (len(body) < self.minimum_size and not more_body)
+                )
+                if not skip:
+                    state["encoder"] = self._encoder(encoding)
+                    headers["Content-Encoding"] = encoding
+                    headers.add_vary_header("Accept-Encoding")
+                    if more_body:
+                        del headers["Content-Length"]
+                    else:
+                        body = state["encoder"].finish(body)
+                        headers["Content-Length"] = str(len(body))
+                        message["body"] = body
+                        await send(initial_message)
+                        await send(message)
+                        return
+                await send(initial_message)
+
+            encoder = state["encoder"]
+            if encoder is not None:
+                message["body"] = encoder.compress(body) if more_body else encoder.finish(body)
+            await send(message)
+
+        await self.app(scope, receive, send_compressed)
@@ -12,3 +12,70 @@ CONCLUSION_CONTEXT_LIMIT = 800
 MAX_TOKENS_INTRO = 1000
 MAX_TOKENS_SECTION = 1500
 MAX_TOKENS_CONCLUSION = 1000
+
+# RAG retrieval sizes
+ARTICLE_REFERENCE_K = 5
+SECTION_REFERENCE_K = 3
+
+# Anthropic prompt caching
+PROMPT_CACHING_BETA = "prompt-caching-2024-07-31"
+
+# Model routing
+DEFAULT_MODEL = "claude-3-5-sonnet-latest"
+FAST_MODEL = "claude-3-haiku-20240307"
+STAGE_LATENCY_WINDOW_SECONDS = 300
+STAGE_LATENCY_MIN_SAMPLES = 5
+
+# LLM request hedging: hedge after this latency percentile, at most this share of extra calls
+HEDGE_PERCENTILE = 95
+HEDGE_MIN_DELAY_SECONDS = 2.0
+HEDGE_MIN_SAMPLES = 20
+HEDGE_MAX_EXTRA_RATIO = 0.1
+HEDGE_BURST = 3
+
+# USD per million tokens; cache writes and reads are billed relative to input
+MODEL_PRICING = {
+    "claude-3-5-sonnet-latest": {"input": 3.00, "output": 15.00},
+    "claude-3-5-haiku-latest": {"input": 0.80, "output": 4.00},
+    "claude-3-haiku-20240307": {"input": 0.25, "output": 1.25},
+}
+CACHE_WRITE_PRICE_MULTIPLIER = 1.25
+CACHE_READ_PRICE_MULTIPLIER = 0.1
+
+# Batch brief generation
+MAX_BATCH_BRIEFS = 500
+MAX_BATCH_CONCURRENCY = 10
+
+# Article pipeline: attempts per stage before the article fails, and backoff base (s)
+STAGE_MAX_ATTEMPTS = 3
+STAGE_RETRY_BASE_DELAY = 2.0
+
+# Quantized vector index: candidates per result re-ranked with exact distances
+VECTOR_INDEX_RERANK_FACTOR = 4
+# Shared vector index: segments kept before the newest ones are merged
+VECTOR_INDEX_MAX_SEGMENTS = 8
+
+# Embedding micro-batching: texts per batched call, and how long to wait for more
+EMBED_BATCH_MAX_SIZE = 64
+EMBED_BATCH_MAX_WAIT_SECONDS = 0.005
+
+# Request deadlines (s) per endpoint; clients can ask for less with X-Request-Deadline
+REQUEST_DEADLINE_SECONDS = {
+    "analyze_url": 30,
+    "generate_brief": 60,
+    "generate_article": 300,
+}
+# RAG embedding is skipped once less than this is left for the LLM stages
+DEADLINE_RAG_RESERVE_SECONDS = 15
+# Below its latency budget a stage uses the fallback model; below this share
+# of the budget it is also limited to this share of its max_tokens
+DEADLINE_REDUCED_TOKENS_THRESHOLD = 0.5
+DEADLINE_REDUCED_TOKENS_RATIO = 0.5
+
+# Ingestion dedupe: chunks whose SimHash (over word shingles of this size) is
+# within this many bits of a stored chunk are dropped before embedding
+DEDUPE_SHINGLE_SIZE = 3
+DEDUPE_MAX_DISTANCE = 7
+
+# Background job store (SQLite); the directory is created on first use
+JOB_STORE_PATH = ".job_store/jobs.sqlite3"
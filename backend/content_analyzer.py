@@ -1,9 +1,18 @@
-import json
 import os
-from typing import Dict, Any
-from langchain_anthropic import ChatAnthropic
+from typing import Dict, Any, Optional
 from langchain.prompts import PromptTemplate
 from langchain.schema import HumanMessage
+from deadline import Deadline, DeadlineExceededError
+from model_router import model_router
+from models import UrlAnalysisResponse
+from structured_output import (
+    message_text,
+    parse_json_output,
+    pydantic_tool,
+    record_wasted_call,
+    tool_call_input,
+    tool_call_kwargs,
+)
 import logging
 from dotenv import load_dotenv
 
@@ -19,12 +28,17 @@ class ContentAnalyzer:
         api_key = os.getenv("ANTHROPIC_API_KEY")
         if not api_key:
             logger.warning("ANTHROPIC_API_KEY not found in environment variables")
-            
-        self.llm = ChatAnthropic(
-            model="claude-3-haiku-20240307",
-            anthropic_api_key=api_key,
-            temperature=0.3,
-            max_tokens=500
+        
+        # Analysis is latency-sensitive and routed to the fast model
+        self.router = model_router
+        
+        # Ask for the analysis as a tool call bound to the UrlAnalysisResponse schema
+        self.structured_output = os.getenv("STRUCTURED_OUTPUT", "true").lower() == "true"
+        self.analysis_tool = pydantic_tool(
+            UrlAnalysisResponse,
+            "submit_content_analysis",
+            "Submit the primary keyword and target audience of the content.",
+            exclude=("content_type", "tone", "scraped_content", "content_id", "degradations", "ingestion"),
         )
         
         self.analysis_prompt = PromptTemplate(
@@ -45,8 +59,12 @@ Return ONLY a JSON object in this exact format:
 Be specific and concise. The keyword should be the core topic of the content."""
         )
     
-    async def analyze_content(self, content: str) -> Dict[str, str]:
-        """Analyze content and extract keyword and target audience."""
+    async def analyze_content(self, content: str, deadline: Optional[Deadline] = None) -> Dict[str, str]:
+        """Analyze content and extract keyword and target audience.
+        
+        Falls back to generic defaults on failure, including when ``deadline``
+        runs out (recorded as a degradation).
+        """
         try:
             # Truncate content if too long
             if len(content) > 5000:
@@ -55,13 +73,23 @@ Be specific and concise. The keyword should be the core topic of the content."""
             prompt = self.analysis_prompt.format(content=content)
             
             # Get response from LLM
-            response = await self.llm.ainvoke([HumanMessage(content=prompt)])
+            messages = [HumanMessage(content=prompt)]
+            result = None
+            if self.structured_output:
+                response = await self.router.ainvoke(
+                    "analysis", messages, deadline=deadline, **tool_call_kwargs(self.analysis_tool)
+                )
+                result = tool_call_input(response, self.analysis_tool["name"], task="analysis")
+            else:
+                response = await self.router.ainvoke("analysis", messages, deadline=deadline)
             
-            # Parse JSON response
-            result = self._parse_json_response(response.content)
+            # Fall back to parsing a JSON answer from the text
+            if result is None:
+                result = self._parse_json_response(message_text(response))
             
             # Validate result
             if not result.get("keyword") or not result.get("target_audience"):
+                record_wasted_call("analysis")
                 raise ValueError("Missing required fields in analysis result")
             
             # Clean and validate the extracted data
@@ -69,9 +97,11 @@ Be specific and concise. The keyword should be the core topic of the content."""
             result["target_audience"] = result["target_audience"].strip()[:200]  # Limit audience description
             
             return result
-            
+        
         except Exception as e:
             logger.error(f"Error analyzing content: {str(e)}")
+            if isinstance(e, DeadlineExceededError):
+                deadline.degrade("analysis", "default_result")
             # Return defaults on error
             return {
                 "keyword": "general content",
@@ -79,31 +109,8 @@ Be specific and concise. The keyword should be the core topic of the content."""
             }
     
     def _parse_json_response(self, response: str) -> Dict[str, str]:
-        """Parse JSON from LLM response, handling common formatting issues."""
-        try:
-            # Try direct parsing first
-            return json.loads(response)
-        except json.JSONDecodeError:
-            # Try to extract JSON from response
-            import re
-            json_match = re.search(r'\{[^{}]*\}', response, re.DOTALL)
-            if json_match:
-                try:
-                    return json.loads(json_match.group())
-                except json.JSONDecodeError:
-                    pass
-            
-            # If all else fails, try to extract key-value pairs
-            keyword_match = re.search(r'"keyword"\s*:\s*"([^"]+)"', response)
-            audience_match = re.search(r'"target_audience"\s*:\s*"([^"]+)"', response)
-            
-            if keyword_match and audience_match:
-                return {
-                    "keyword": keyword_match.group(1),
-                    "target_audience": audience_match.group(1)
-                }
-            
-            raise ValueError("Could not parse JSON response")
+        """Parse JSON from LLM response, ignoring surrounding text and repairing truncation."""
+        return parse_json_output(response, task="analysis")
 
 # Singleton instance
 content_analyzer = ContentAnalyzer()
\ No newline at end of file
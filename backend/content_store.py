@@ -0,0 +1,83 @@
+import contextlib
+import hashlib
+import logging
+import os
+import tempfile
+import time
+from typing import Iterator, Optional
+
+logger = logging.getLogger(__name__)
+
+# Bytes per chunk when streaming stored content back to a client
+CONTENT_STREAM_CHUNK_SIZE = 64 * 1024
+
+
+class ContentStore:
+    """Server-side store of scraped page text, addressed by a compact content id.
+
+    Clients pass the id between endpoints instead of round-tripping the full
+    text. Ids are content hashes, so scraping the same page twice reuses the
+    entry; entries older than ``ttl_seconds`` are treated as missing.
+    """
+
+    def __init__(self, directory: str = ".content_store", ttl_seconds: float = 24 * 3600):
+        self.directory = directory
+        self.ttl_seconds = ttl_seconds
+
+    @staticmethod
+    def content_id(content: str) -> str:
+        return hashlib.sha256(content.encode("utf-8")).hexdigest()[:32]
+
+    def _path(self, content_id: str) -> Optional[str]:
+        # Ids are hex digests; anything else cannot name a stored entry
+        if not content_id or not all(c in "0123456789abcdef" for c in content_id):
+            return None
+        return os.path.join(self.directory, f"{content_id}.txt")
+
+    def put(self, content: str) -> str:
+        """Store ``content`` and return its id."""
+        content_id = self.content_id(content)
+        path = self._path(content_id)
+        os.makedirs(self.directory, exist_ok=True)
+        fd, tmp_path = tempfile.mkstemp(dir=self.directory, suffix=".tmp")
+        try:
+            with os.fdopen(fd, "w", encoding="utf-8") as f:
+                f.write(content)
+            os.replace(tmp_path, path)
+        except BaseException:
+            with contextlib.suppress(OSError):
+                os.remove(tmp_path)
+            raise
+        return content_id
+
+    def exists(self, content_id: str) -> bool:
+        path = self._path(content_id)
+        try:
+            return path is not None and time.time() - os.path.getmtime(path) <= self.ttl_seconds
+        except OSError:
+            return False
+
+    def get(self, content_id: str) -> Optional[str]:
+        if not self.exists(content_id):
+            return None
+        try:
+            with open(self._path(content_id), "r", encoding="utf-8") as f:
+                return f.read()
+        except OSError:
+            return None
+
+    def iter_chunks(self, content_id: str, chunk_size: int = CONTENT_STREAM_CHUNK_SIZE) -> Iterator[bytes]:
+        """Stream stored content without loading it into memory at once."""
+        with open(self._path(content_id), "rb") as f:
+            while True:
+                chunk = f.read(chunk_size)
+                if not chunk:
+                    break
+                yield chunk
+
+
+# Shared store; point CONTENT_STORE_DIR at shared storage when running several workers
+content_store = ContentStore(
+    directory=os.getenv("CONTENT_STORE_DIR", ".content_store"),
+    ttl_seconds=float(os.getenv("CONTENT_STORE_TTL_SECONDS", 24 * 3600)),
+)
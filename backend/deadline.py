@@ -0,0 +1,69 @@
+import asyncio
+import logging
+import time
+from typing import Any, Awaitable, Dict, List, Optional
+
+from constants import REQUEST_DEADLINE_SECONDS
+from metrics import DEADLINE_DEGRADATIONS, DEADLINE_EXCEEDED
+
+logger = logging.getLogger(__name__)
+
+
+class DeadlineExceededError(Exception):
+    """Raised when a request's time budget runs out before a stage finishes."""
+
+    def __init__(self, stage: str):
+        super().__init__(f"Request deadline exceeded during {stage}")
+        self.stage = stage
+
+
+class Deadline:
+    """Time budget for one request, shared by every stage it runs.
+
+    Stages look at ``remaining()`` to decide whether to degrade (skip
+    retrieval, use a faster model, fewer output tokens) and record what they
+    did with ``degrade``; ``degradations`` is reported back to the client.
+    """
+
+    def __init__(self, seconds: float):
+        self.seconds = seconds
+        self.expires_at = time.monotonic() + seconds
+        self.degradations: List[Dict[str, str]] = []
+        # Degradations applied so far, counting repeats of the same one
+        self.applied = 0
+
+    def remaining(self) -> float:
+        return max(0.0, self.expires_at - time.monotonic())
+
+    def timeout(self, default: float) -> float:
+        """``default`` capped to the remaining budget."""
+        return min(default, self.remaining())
+
+    def check(self, stage: str) -> None:
+        if self.remaining() <= 0:
+            DEADLINE_EXCEEDED.inc(stage=stage)
+            raise DeadlineExceededError(stage)
+
+    def degrade(self, stage: str, action: str) -> None:
+        self.applied += 1
+        entry = {"stage": stage, "action": action}
+        if entry not in self.degradations:
+            logger.info(f"Degrading stage '{stage}' ({action}) with {self.remaining():.1f}s left")
+            self.degradations.append(entry)
+        DEADLINE_DEGRADATIONS.inc(stage=stage, action=action)
+
+    async def wait(self, stage: str, awaitable: Awaitable[Any]) -> Any:
+        """Await ``awaitable``, giving up when the budget runs out."""
+        try:
+            return await asyncio.wait_for(awaitable, self.remaining())
+        except asyncio.TimeoutError:
+            DEADLINE_EXCEEDED.inc(stage=stage)
+            raise DeadlineExceededError(stage) from None
+
+
+def request_deadline(endpoint: str, requested: Optional[float] = None) -> Deadline:
+    """Deadline for one call to ``endpoint``; clients may ask for a shorter one."""
+    seconds = REQUEST_DEADLINE_SECONDS[endpoint]
+    if requested is not None and requested > 0:
+        seconds = min(seconds, requested)
+    return Deadline(seconds)
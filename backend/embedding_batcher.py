@@ -0,0 +1,95 @@
+import asyncio
+import logging
+from typing import Awaitable, Callable, List, Optional, Set, Tuple
+
+from constants import EMBED_BATCH_MAX_SIZE, EMBED_BATCH_MAX_WAIT_SECONDS
+from metrics import EMBED_BATCH_SIZE
+
+logger = logging.getLogger(__name__)
+
+EmbedFunction = Callable[[List[str]], Awaitable[List[List[float]]]]
+
+
+class EmbeddingBatcher:
+    """Coalesces embedding requests from concurrent callers into batched calls.
+
+    Texts are collected for up to ``max_wait`` seconds, or until
+    ``max_batch_size`` texts are pending, then embedded with a single call to
+    ``embed`` and the vectors handed back to each waiting caller. A caller's
+    texts always stay in one batch, so a single large request may exceed
+    ``max_batch_size`` on its own.
+    """
+
+    def __init__(
+        self,
+        embed: EmbedFunction,
+        max_batch_size: int = EMBED_BATCH_MAX_SIZE,
+        max_wait: float = EMBED_BATCH_MAX_WAIT_SECONDS,
+    ):
+        self.embed_batch = embed
+        self.max_batch_size = max_batch_size
+        self.max_wait = max_wait
+        self._pending: List[Tuple[List[str], asyncio.Future]] = []
+        self._pending_texts = 0
+        self._timer: Optional[asyncio.TimerHandle] = None
+        # The loop only keeps weak references to tasks
+        self._tasks: Set[asyncio.Task] = set()
+
+    async def embed(self, texts: List[str]) -> List[List[float]]:
+        """Embed ``texts`` as part of the next batch."""
+        if not texts:
+            return []
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+        self._pending.append((list(texts), future))
+        self._pending_texts += len(texts)
+
+        if self._pending_texts >= self.max_batch_size or self.max_wait <= 0:
+            self._flush()
+        elif self._timer is None:
+            self._timer = loop.call_later(self.max_wait, self._flush)
+        return await future
+
+    def _flush(self) -> None:
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+        if not self._pending:
+            return
+        batch, self._pending, self._pending_texts = self._pending, [], 0
+        # The next batch collects while this one is in flight
+        task = asyncio.get_running_loop().create_task(self._run(batch))
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+
+    async def _run(self, batch: List[Tuple[List[str], asyncio.Future]]) -> None:
+        # Callers that gave up while the batch was collecting aren't embedded
+        batch = [(request_texts, future) for request_texts, future in batch if not future.done()]
+        if not batch:
+            return
+        texts = [text for request_texts, _ in batch for text in request_texts]
+        EMBED_BATCH_SIZE.observe(len(texts))
+        try:
+            vectors = await self.embed_batch(texts)
+            if len(vectors) != len(texts):
+                raise ValueError(f"Expected {len(texts)} embeddings, got {len(vectors)}")
+        except BaseException as e:
+            # Callers must not be left waiting, even when this task is cancelled
+            logger.warning(f"Batched embedding of {len(texts)} texts failed: {str(e)}")
+            for _, future in batch:
+                if future.done():
+                    continue
+                if isinstance(e, asyncio.CancelledError):
+                    future.cancel()
+                else:
+                    future.set_exception(e)
+            if not isinstance(e, Exception):
+                raise
+            return
+
+        start = 0
+        for request_texts, future in batch:
+            end = start + len(request_texts)
+            if not future.done():
+                future.set_result(vectors[start:end])
+            start = end
@@ -0,0 +1,320 @@
+import asyncio
+import hashlib
+import json
+import logging
+import os
+import sqlite3
+import threading
+import time
+import uuid
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Tuple
+
+from constants import JOB_STORE_PATH
+
+logger = logging.getLogger(__name__)
+
+JOB_QUEUED = "queued"
+JOB_RUNNING = "running"
+JOB_SUCCEEDED = "succeeded"
+JOB_FAILED = "failed"
+TERMINAL_STATUSES = {JOB_SUCCEEDED, JOB_FAILED}
+
+
+class JobQueueFullError(Exception):
+    """Raised when the queue has no room for another job."""
+
+
+class IdempotencyConflictError(Exception):
+    """Raised when an idempotency key is reused with a different payload."""
+
+
+def request_fingerprint(payload: Dict[str, Any]) -> str:
+    """Stable hash of a job payload, used to validate idempotency keys."""
+    return hashlib.sha256(json.dumps(payload, sort_keys=True).encode("utf-8")).hexdigest()
+
+
+def _process_alive(pid: int) -> bool:
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        pass
+    return True
+
+
+class JobStore:
+    """SQLite-backed job store; finished jobs are kept for ``ttl_seconds``.
+
+    The database is opened on first use, so importing the module creates nothing.
+    """
+
+    def __init__(self, path: str = JOB_STORE_PATH, ttl_seconds: float = 3600):
+        self.path = path
+        self.ttl_seconds = ttl_seconds
+        # Reentrant: the connection is opened lazily while the lock is held
+        self._lock = threading.RLock()
+        self._db: Optional[sqlite3.Connection] = None
+
+    @property
+    def _conn(self) -> sqlite3.Connection:
+        if self._db is None:
+            with self._lock:
+                if self._db is None:
+                    self._db = self._connect()
+        return self._db
+
+    def _connect(self) -> sqlite3.Connection:
+        directory = os.path.dirname(self.path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        conn = sqlite3.connect(self.path, check_same_thread=False)
+        conn.row_factory = sqlite3.Row
+        with conn:
+            conn.execute(
+                """CREATE TABLE IF NOT EXISTS jobs (
+                    id TEXT PRIMARY KEY,
+                    kind TEXT NOT NULL,
+                    idempotency_key TEXT UNIQUE,
+                    fingerprint TEXT NOT NULL,
+                    status TEXT NOT NULL,
+                    payload TEXT NOT NULL,
+                    progress TEXT NOT NULL,
+                    result TEXT,
+                    error TEXT,
+                    created_at REAL NOT NULL,
+                    updated_at REAL NOT NULL,
+                    expires_at REAL NOT NULL,
+                    owner_pid INTEGER
+                )"""
+            )
+            # Stores created before jobs recorded the process running them
+            columns = {row["name"] for row in conn.execute("PRAGMA table_info(jobs)")}
+            if "owner_pid" not in columns:
+                conn.execute("ALTER TABLE jobs ADD COLUMN owner_pid INTEGER")
+        return conn
+
+    def _row_to_job(self, row: Optional[sqlite3.Row]) -> Optional[Dict[str, Any]]:
+        if row is None:
+            return None
+        return {
+            "job_id": row["id"],
+            "kind": row["kind"],
+            "status": row["status"],
+            "payload": json.loads(row["payload"]),
+            "progress": json.loads(row["progress"]),
+            "result": json.loads(row["result"]) if row["result"] else None,
+            "error": row["error"],
+            "created_at": row["created_at"],
+            "updated_at": row["updated_at"],
+        }
+
+    def purge_expired(self) -> None:
+        with self._lock, self._conn:
+            self._conn.execute("DELETE FROM jobs WHERE expires_at < ?", (time.time(),))
+
+    def get(self, job_id: str) -> Optional[Dict[str, Any]]:
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT * FROM jobs WHERE id = ? AND expires_at >= ?", (job_id, time.time())
+            ).fetchone()
+        return self._row_to_job(row)
+
+    def get_or_create(
+        self,
+        kind: str,
+        payload: Dict[str, Any],
+        idempotency_key: Optional[str] = None,
+        has_room: Optional[Callable[[], bool]] = None,
+    ) -> Tuple[Dict[str, Any], bool]:
+        """Create a queued job, or return the live job for ``idempotency_key``.
+
+        Returns the job and whether it was newly created. ``has_room`` is only
+        consulted before creating a job; JobQueueFullError is raised if it fails.
+        """
+        self.purge_expired()
+        fingerprint = request_fingerprint(payload)
+        now = time.time()
+        with self._lock, self._conn:
+            if idempotency_key:
+                row = self._conn.execute(
+                    "SELECT * FROM jobs WHERE idempotency_key = ?", (idempotency_key,)
+                ).fetchone()
+                if row is not None:
+                    if row["fingerprint"] != fingerprint or row["kind"] != kind:
+                        raise IdempotencyConflictError(
+                            "Idempotency key was already used for a different request"
+                        )
+                    if row["status"] != JOB_FAILED:
+                        return self._row_to_job(row), False
+                    # Retrying a failed job starts a new one; the old one stays readable by id
+                    self._conn.execute(
+                        "UPDATE jobs SET idempotency_key = NULL WHERE id = ?", (row["id"],)
+                    )
+
+            if has_room is not None and not has_room():
+                raise JobQueueFullError("Job queue is full, try again later")
+
+            job_id = uuid.uuid4().hex
+            self._conn.execute(
+                """INSERT INTO jobs (id, kind, idempotency_key, fingerprint, status, payload,
+                                     progress, created_at, updated_at, expires_at)
+                   VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)""",
+                (
+                    job_id, kind, idempotency_key, fingerprint, JOB_QUEUED,
+                    json.dumps(payload), json.dumps({}), now, now, now + self.ttl_seconds,
+                ),
+            )
+            row = self._conn.execute("SELECT * FROM jobs WHERE id = ?", (job_id,)).fetchone()
+        return self._row_to_job(row), True
+
+    def update(self, job_id: str, **fields: Any) -> None:
+        """Update status/progress/result/error/owner_pid and push the expiry out by the TTL."""
+        columns = {}
+        for key in ("status", "error", "owner_pid"):
+            if key in fields:
+                columns[key] = fields[key]
+        for key in ("progress", "result"):
+            if key in fields:
+                columns[key] = json.dumps(fields[key])
+        now = time.time()
+        columns["updated_at"] = now
+        columns["expires_at"] = now + self.ttl_seconds
+
+        assignments = ", ".join(f"{column} = ?" for column in columns)
+        with self._lock, self._conn:
+            self._conn.execute(
+                f"UPDATE jobs SET {assignments} WHERE id = ?", (*columns.values(), job_id)
+            )
+
+    def claim(self, job_id: str) -> bool:
+        """Mark a queued job as running in this process; False if another process has it."""
+        now = time.time()
+        with self._lock, self._conn:
+            cursor = self._conn.execute(
+                """UPDATE jobs SET status = ?, owner_pid = ?, updated_at = ?, expires_at = ?
+                   WHERE id = ? AND status = ?""",
+                (JOB_RUNNING, os.getpid(), now, now + self.ttl_seconds, job_id, JOB_QUEUED),
+            )
+        return cursor.rowcount == 1
+
+    def recover(self) -> List[str]:
+        """Fail jobs whose process died mid-run; return the ids of jobs still queued."""
+        self.purge_expired()
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT id, status, owner_pid FROM jobs WHERE status IN (?, ?) ORDER BY created_at",
+                (JOB_QUEUED, JOB_RUNNING),
+            ).fetchall()
+        queued = []
+        for row in rows:
+            if row["status"] == JOB_QUEUED:
+                queued.append(row["id"])
+            elif row["owner_pid"] is None or not _process_alive(row["owner_pid"]):
+                logger.warning(f"Job {row['id']} was interrupted by a server restart")
+                self.update(
+                    row["id"], status=JOB_FAILED, error="Interrupted by a server restart; resubmit to retry"
+                )
+        return queued
+
+    def delete(self, job_id: str) -> None:
+        with self._lock, self._conn:
+            self._conn.execute("DELETE FROM jobs WHERE id = ?", (job_id,))
+
+
+JobHandler = Callable[[Dict[str, Any], Callable[[Dict[str, Any]], None]], Awaitable[Dict[str, Any]]]
+
+
+class JobQueue:
+    """Bounded in-process worker pool running long jobs in the background."""
+
+    def __init__(self, store: JobStore, workers: int = 2, max_queue_size: int = 100):
+        self.store = store
+        self.workers = workers
+        self.max_queue_size = max_queue_size
+        self.handlers: Dict[str, JobHandler] = {}
+        self._queue: Optional[asyncio.Queue] = None
+        self._tasks: List[asyncio.Task] = []
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+
+    def register(self, kind: str, handler: JobHandler) -> None:
+        """Register the coroutine that runs jobs of ``kind``.
+
+        The handler receives the job payload and a ``report_progress`` callback.
+        """
+        self.handlers[kind] = handler
+
+    def start(self) -> None:
+        """Start the workers on the running loop, picking up jobs left by a restart.
+
+        Called at server startup and lazily on first submit.
+        """
+        loop = asyncio.get_running_loop()
+        if self._loop is loop and self._tasks:
+            return
+        self._loop = loop
+        self._queue = asyncio.Queue(maxsize=self.max_queue_size)
+        self._tasks = [loop.create_task(self._worker()) for _ in range(self.workers)]
+
+        for job_id in self.store.recover():
+            if self._queue.full():
+                self.store.update(job_id, status=JOB_FAILED, error="Job queue was full after a server restart")
+                continue
+            self._queue.put_nowait(job_id)
+
+    async def submit(
+        self, kind: str, payload: Dict[str, Any], idempotency_key: Optional[str] = None
+    ) -> Tuple[Dict[str, Any], bool]:
+        """Queue a job and return it immediately, reusing an idempotent match."""
+        if kind not in self.handlers:
+            raise ValueError(f"Unknown job kind: {kind}")
+        self.start()
+        # Resubmitting a known key returns its job even when the queue is full
+        job, created = self.store.get_or_create(
+            kind, payload, idempotency_key, has_room=lambda: not self._queue.full()
+        )
+        if created:
+            self._queue.put_nowait(job["job_id"])
+        return job, created
+
+    async def shutdown(self) -> None:
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+
+    async def _worker(self) -> None:
+        while True:
+            job_id = await self._queue.get()
+            try:
+                await self._run(job_id)
+            finally:
+                self._queue.task_done()
+
+    async def _run(self, job_id: str) -> None:
+        job = self.store.get(job_id)
+        # Another worker process may have recovered the same queued job
+        if job is None or not self.store.claim(job_id):
+            return
+
+        def report_progress(progress: Dict[str, Any]) -> None:
+            self.store.update(job_id, progress=progress)
+
+        try:
+            result = await self.handlers[job["kind"]](job["payload"], report_progress)
+        except Exception as e:
+            logger.error(f"Job {job_id} failed: {str(e)}")
+            self.store.update(job_id, status=JOB_FAILED, error=str(e))
+            return
+        self.store.update(job_id, status=JOB_SUCCEEDED, result=result)
+
+
+# Shared job queue for long-running generation requests
+job_queue = JobQueue(
+    JobStore(
+        path=os.getenv("JOB_STORE_PATH", JOB_STORE_PATH),
+        ttl_seconds=float(os.getenv("JOB_TTL_SECONDS", 3600)),
+    ),
+    workers=int(os.getenv("JOB_WORKERS", 2)),
+    max_queue_size=int(os.getenv("JOB_QUEUE_MAX_SIZE", 100)),
+)
@@ -1,29 +1,39 @@
 import os
-from typing import Dict, Any
-from langchain_anthropic import ChatAnthropic
-from langchain.prompts import PromptTemplate
-from langchain.chains import LLMChain
+from typing import Dict, Any, Optional
+
+from model_router import ModelRouter, model_router, prompt_caching_enabled, served_models
 
 
 class LangChainConfig:
     """Configuration for LangChain LLMs and chains."""
     
-    def __init__(self):
-        self.anthropic_llm = ChatAnthropic(
-            model=os.getenv("ANTHROPIC_MODEL", "claude-3-5-sonnet-latest"),
-            anthropic_api_key=os.getenv("ANTHROPIC_API_KEY"),
-            temperature=float(os.getenv("TEMPERATURE", 0.7)),
-            max_tokens=int(os.getenv("MAX_TOKENS", 2000))
-        )
+    def __init__(self, router: Optional[ModelRouter] = None):
+        # Article stages share a cached prompt prefix, see LangChainContentGenerator
+        self.prompt_caching = prompt_caching_enabled()
+        
+        # JSON outputs (briefs, URL analysis) are requested as schema-bound tool calls
+        self.structured_output = os.getenv("STRUCTURED_OUTPUT", "true").lower() == "true"
         
-        # For now, use Claude for all content types
-        # We can later add OpenAI when tiktoken dependency is resolved
-        self.conclusion_llm = self.anthropic_llm
+        # Each stage (brief, introduction, section, conclusion) is routed to its
+        # own model, max_tokens and timeout, see model_router.STAGE_ROUTES
+        self.router = router or model_router
+    
+    def get_llm(self, stage: str):
+        """Get the LLM currently routed for a pipeline stage."""
+        return self.router.get_llm(stage, self.router.select_model(stage))
     
     def get_anthropic_llm(self):
         """Get Anthropic LLM for intro and sections."""
-        return self.anthropic_llm
+        return self.get_llm("section")
     
     def get_conclusion_llm(self):
-        """Get LLM for conclusions (currently also Claude)."""
-        return self.conclusion_llm
\ No newline at end of file
+        """Get LLM for conclusions."""
+        return self.get_llm("conclusion")
+    
+    def get_model_info(self) -> Dict[str, Any]:
+        """Describe which models served each stage of the current request.
+        
+        Calls per model are recorded by the router once a request sets
+        ``served_models``; stages reused from a cache or checkpoint are absent.
+        """
+        return {stage: dict(calls) for stage, calls in (served_models.get() or {}).items()}
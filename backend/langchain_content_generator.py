@@ -1,47 +1,61 @@
-from typing import Dict, Any
-from langchain.chains import LLMChain
+import json
+from typing import Dict, Any, List, Optional
+from langchain.schema import HumanMessage
+from deadline import Deadline, DeadlineExceededError
 from langchain_config import LangChainConfig
 from langchain_prompts import LangChainPrompts
+from llm_gateway import LLMOverloadedError
+from models import BriefResponse
 from rag_service import rag_service
+from response_validator import ResponseValidator
+from structured_output import (
+    message_text,
+    parse_json_output,
+    pydantic_tool,
+    tool_call_input,
+    tool_call_kwargs,
+)
 from constants import (
     DEFAULT_TONE,
     DEFAULT_TARGET_AUDIENCE,
     SECTION_CONTEXT_LIMIT,
     CONCLUSION_CONTEXT_LIMIT,
+    ARTICLE_REFERENCE_K,
+    SECTION_REFERENCE_K,
 )
 
 
+NO_REFERENCE_CONTENT = "No reference content available."
+
+
+class StageOutputError(Exception):
+    """Raised when a stage's model output is unusable (e.g. empty)."""
+
+
 class LangChainContentGenerator:
     """Content generator using LangChain for multi-LLM workflow."""
     
     def __init__(self):
         self.config = LangChainConfig()
         
-        # Create chains for different content types
-        self.brief_chain = LLMChain(
-            llm=self.config.get_anthropic_llm(),
-            prompt=LangChainPrompts.get_brief_prompt(),
-            output_key="brief"
-        )
+        # Every LLM call is routed per stage and goes through the shared gateway
+        self.brief_prompt = LangChainPrompts.get_brief_prompt()
         
-        self.intro_chain = LLMChain(
-            llm=self.config.get_anthropic_llm(),
-            prompt=LangChainPrompts.get_introduction_prompt(),
-            output_key="introduction"
+        # In structured-output mode the brief is returned as a tool call whose
+        # schema is derived from BriefResponse (scraped_content and content_id are added by us)
+        self.brief_tool = pydantic_tool(
+            BriefResponse,
+            "submit_content_brief",
+            "Submit the finished content brief.",
+            exclude=("scraped_content", "content_id", "degradations"),
         )
         
-        self.section_chain = LLMChain(
-            llm=self.config.get_anthropic_llm(),
-            prompt=LangChainPrompts.get_section_prompt(),
-            output_key="section"
-        )
-        
-        # Use separate LLM for conclusions (currently also Claude, but shows multi-LLM pattern)
-        self.conclusion_chain = LLMChain(
-            llm=self.config.get_conclusion_llm(),
-            prompt=LangChainPrompts.get_conclusion_prompt(),
-            output_key="conclusion"
-        )
+        # Article stages are sent as a shared, cacheable prefix (article context
+        # and source material) followed by a small per-stage suffix
+        self.context_prompt = LangChainPrompts.get_article_context_prompt()
+        self.intro_prompt = LangChainPrompts.get_introduction_prompt()
+        self.section_prompt = LangChainPrompts.get_section_prompt()
+        self.conclusion_prompt = LangChainPrompts.get_conclusion_prompt()
     
     def _get_recommendations(self, brief_data: Dict[str, Any]) -> Dict[str, str]:
         """Extract recommendations with defaults."""
@@ -53,110 +67,256 @@ class LangChainContentGenerator:
             ),
         }
     
-    async def generate_brief(self, keyword: str, content_type: str, tone: str, target_audience: str) -> str:
-        """Generate content brief using LangChain."""
+    @staticmethod
+    def _format_reference_content(docs: List[Dict]) -> str:
+        """Combine retrieved chunks into reference content."""
+        return "\n\n".join([
+            f"[Source: {doc['source']}]\n{doc['content']}"
+            for doc in docs
+        ]) if docs else NO_REFERENCE_CONTENT
+    
+    async def build_article_context(
+        self, brief_data: Dict[str, Any], deadline: Optional[Deadline] = None
+    ) -> Dict[str, Any]:
+        """Build the shared prompt prefix used by every stage of one article.
+        
+        The source material is retrieved once for the whole article so the
+        prefix stays byte-identical between the intro, sections and conclusion.
+        """
+        key_points_str = ", ".join(brief_data.get("key_points", []))
+        recommendations = self._get_recommendations(brief_data)
+        
+        query = f"{brief_data.get('title', '')} {key_points_str}"
+        shared_docs = await rag_service.aretrieve_relevant_content(
+            query, k=ARTICLE_REFERENCE_K, deadline=deadline
+        )
+        
+        prefix = self.context_prompt.format(
+            title=brief_data.get("title", ""),
+            key_points=key_points_str,
+            target_audience=recommendations["target_audience"],
+            tone=recommendations["tone"],
+            reference_content=self._format_reference_content(shared_docs),
+        )
+        return {
+            "prefix": prefix,
+            "doc_ids": {(doc["source"], doc["chunk_index"]) for doc in shared_docs},
+        }
+    
+    def _build_messages(self, prefix: str, suffix: str) -> List[HumanMessage]:
+        """Build the chat messages for a cached prefix and a per-stage suffix."""
+        if not self.config.prompt_caching:
+            return [HumanMessage(content=f"{prefix}\n\n{suffix}")]
+        
+        return [HumanMessage(content=[
+            {"type": "text", "text": prefix, "cache_control": {"type": "ephemeral"}},
+            {"type": "text", "text": suffix},
+        ])]
+    
+    async def _generate_with_context(
+        self, stage: str, article_context: Dict[str, Any], suffix: str, deadline: Optional[Deadline] = None
+    ) -> str:
+        """Run one article stage against the shared article context."""
+        response = await self.config.router.ainvoke(
+            stage, self._build_messages(article_context["prefix"], suffix), deadline=deadline
+        )
+        if not isinstance(response.content, str) or not response.content.strip():
+            raise StageOutputError(f"Model returned no text for stage '{stage}'")
+        return response.content
+    
+    async def generate_brief(
+        self,
+        keyword: str,
+        content_type: str,
+        tone: str,
+        target_audience: str,
+        deadline: Optional[Deadline] = None,
+    ) -> Dict[str, Any]:
+        """Generate content brief using LangChain.
+        
+        Uses a forced tool call in structured-output mode; plain-text answers
+        are read with the tolerant JSON parser, which also repairs truncation.
+        """
         try:
-            result = await self.brief_chain.arun(
+            prompt = self.brief_prompt.format(
                 keyword=keyword,
                 content_type=content_type,
                 tone=tone,
                 target_audience=target_audience
             )
-            return result.strip()
+            messages = [HumanMessage(content=prompt)]
+            
+            if self.config.structured_output:
+                result = await self.config.router.ainvoke(
+                    "brief", messages, deadline=deadline, **tool_call_kwargs(self.brief_tool)
+                )
+                brief_data = tool_call_input(result, self.brief_tool["name"], task="brief")
+                if brief_data is not None:
+                    return brief_data
+            else:
+                result = await self.config.router.ainvoke("brief", messages, deadline=deadline)
+            
+            content = ResponseValidator.clean_json_response(message_text(result).strip())
+            return parse_json_output(content, task="brief")
+        except (LLMOverloadedError, DeadlineExceededError, json.JSONDecodeError):
+            raise
         except Exception as e:
             raise Exception(f"Brief generation failed: {str(e)}")
     
-    async def generate_introduction(self, brief_data: Dict[str, Any]) -> str:
+    async def generate_introduction(
+        self,
+        brief_data: Dict[str, Any],
+        article_context: Optional[Dict[str, Any]] = None,
+        deadline: Optional[Deadline] = None,
+    ) -> str:
         """Generate introduction using Claude via LangChain."""
-        key_points_str = ", ".join(brief_data.get("key_points", []))
-        recommendations = self._get_recommendations(brief_data)
-        
-        # Use RAG to retrieve relevant content
-        query = f"{brief_data.get('title', '')} introduction {key_points_str}"
-        relevant_docs = rag_service.retrieve_relevant_content(query, k=3)
-        
-        # Combine retrieved chunks as reference content
-        reference_content = "\n\n".join([
-            f"[Source: {doc['source']}]\n{doc['content']}" 
-            for doc in relevant_docs
-        ]) if relevant_docs else "No reference content available."
+        if article_context is None:
+            article_context = await self.build_article_context(brief_data, deadline)
         
         try:
-            result = await self.intro_chain.arun(
-                title=brief_data.get("title", ""),
-                key_points=key_points_str,
-                target_audience=recommendations["target_audience"],
-                tone=recommendations["tone"],
-                reference_content=reference_content
+            result = await self._generate_with_context(
+                "introduction",
+                article_context,
+                self.intro_prompt.format(),
+                deadline,
             )
             return result.strip()
+        except (LLMOverloadedError, DeadlineExceededError):
+            raise
         except Exception as e:
             raise Exception(f"Introduction generation failed: {str(e)}")
     
+    async def retrieve_section_docs(
+        self,
+        section: Dict[str, Any],
+        brief_data: Dict[str, Any],
+        article_context: Dict[str, Any],
+        deadline: Optional[Deadline] = None,
+    ) -> List[Dict]:
+        """Retrieve reference chunks for one section that are not already in the shared context."""
+        subpoints_str = ", ".join(section.get("subpoints", []))
+        recommendations = self._get_recommendations(brief_data)
+        
+        query = f"{section.get('heading', '')} {subpoints_str} {recommendations['target_audience']}"
+        return [
+            doc for doc in await rag_service.aretrieve_relevant_content(
+                query, k=SECTION_REFERENCE_K, deadline=deadline
+            )
+            if (doc["source"], doc["chunk_index"]) not in article_context["doc_ids"]
+        ]
+    
+    def stage_cache_inputs(
+        self,
+        stage: str,
+        brief_data: Dict[str, Any],
+        article_context: Dict[str, Any],
+        section: Optional[Dict[str, Any]] = None,
+        relevant_docs: Optional[List[Dict]] = None,
+        article_content: Optional[str] = None,
+    ) -> Dict[str, Any]:
+        """Everything a stage's output depends on, used as its section cache address.
+        
+        Every stage depends on the article title and key points (part of the
+        shared prompt prefix), tone, audience, the retrieved chunk ids and the
+        model; sections also on their own heading and subpoints. The prompt
+        templates are included so prompt changes invalidate old entries.
+        ``previous_content`` is left out on purpose so editing one section does
+        not invalidate every later one.
+        """
+        recommendations = self._get_recommendations(brief_data)
+        prompt = {
+            "introduction": self.intro_prompt,
+            "section": self.section_prompt,
+            "conclusion": self.conclusion_prompt,
+        }[stage]
+        context_ids = sorted(article_context["doc_ids"]) + sorted(
+            (doc["source"], doc["chunk_index"]) for doc in relevant_docs or []
+        )
+        
+        inputs = {
+            "stage": stage,
+            "title": brief_data.get("title", ""),
+            "key_points": brief_data.get("key_points", []),
+            "tone": recommendations["tone"],
+            "target_audience": recommendations["target_audience"],
+            "context_ids": context_ids,
+            "model": self.config.router.select_model(stage),
+            "prompt": [self.context_prompt.template, prompt.template],
+        }
+        if stage == "section":
+            inputs["heading"] = section.get("heading", "")
+            inputs["subpoints"] = section.get("subpoints", [])
+        if stage == "conclusion":
+            inputs["article_content"] = article_content[-CONCLUSION_CONTEXT_LIMIT:]
+        return inputs
+    
     async def generate_section(
-        self, section: Dict[str, Any], brief_data: Dict[str, Any], previous_content: str
+        self,
+        section: Dict[str, Any],
+        brief_data: Dict[str, Any],
+        previous_content: str,
+        article_context: Optional[Dict[str, Any]] = None,
+        relevant_docs: Optional[List[Dict]] = None,
+        deadline: Optional[Deadline] = None,
     ) -> str:
         """Generate section using Claude via LangChain."""
+        if article_context is None:
+            article_context = await self.build_article_context(brief_data, deadline)
+        
         subpoints_str = ", ".join(section.get("subpoints", []))
-        recommendations = self._get_recommendations(brief_data)
         
         # Truncate previous content if too long
         if len(previous_content) > SECTION_CONTEXT_LIMIT:
             previous_content = previous_content[-SECTION_CONTEXT_LIMIT:]
         
-        # Use RAG to retrieve relevant content for this section
-        query = f"{section.get('heading', '')} {subpoints_str} {recommendations['target_audience']}"
-        relevant_docs = rag_service.retrieve_relevant_content(query, k=3)
-        
-        # Combine retrieved chunks as reference content
-        reference_content = "\n\n".join([
-            f"[Source: {doc['source']}]\n{doc['content']}" 
-            for doc in relevant_docs
-        ]) if relevant_docs else "No reference content available."
+        # Use RAG to retrieve relevant content for this section, keeping only
+        # chunks that are not already part of the shared article context
+        if relevant_docs is None:
+            relevant_docs = await self.retrieve_section_docs(section, brief_data, article_context, deadline)
         
         try:
-            result = await self.section_chain.arun(
-                heading=section.get("heading", ""),
-                subpoints=subpoints_str,
-                previous_content=previous_content,
-                tone=recommendations["tone"],
-                target_audience=recommendations["target_audience"],
-                reference_content=reference_content
+            result = await self._generate_with_context(
+                "section",
+                article_context,
+                self.section_prompt.format(
+                    heading=section.get("heading", ""),
+                    subpoints=subpoints_str,
+                    previous_content=previous_content,
+                    section_reference_content=self._format_reference_content(relevant_docs),
+                ),
+                deadline,
             )
             return result.strip()
+        except (LLMOverloadedError, DeadlineExceededError):
+            raise
         except Exception as e:
             raise Exception(f"Section generation failed: {str(e)}")
     
     async def generate_conclusion(
-        self, brief_data: Dict[str, Any], article_content: str
+        self,
+        brief_data: Dict[str, Any],
+        article_content: str,
+        article_context: Optional[Dict[str, Any]] = None,
+        deadline: Optional[Deadline] = None,
     ) -> str:
         """Generate conclusion using LangChain (currently Claude, but pattern supports multiple LLMs)."""
-        key_points_str = ", ".join(brief_data.get("key_points", []))
-        recommendations = self._get_recommendations(brief_data)
+        if article_context is None:
+            article_context = await self.build_article_context(brief_data, deadline)
         
         # Truncate article content if too long
         if len(article_content) > CONCLUSION_CONTEXT_LIMIT:
             article_content = article_content[-CONCLUSION_CONTEXT_LIMIT:]
         
-        # Use RAG to retrieve relevant content for conclusion
-        query = f"{brief_data.get('title', '')} conclusion summary {key_points_str}"
-        relevant_docs = rag_service.retrieve_relevant_content(query, k=3)
-        
-        # Combine retrieved chunks as reference content
-        reference_content = "\n\n".join([
-            f"[Source: {doc['source']}]\n{doc['content']}" 
-            for doc in relevant_docs
-        ]) if relevant_docs else "No reference content available."
-        
         try:
-            result = await self.conclusion_chain.arun(
-                title=brief_data.get("title", ""),
-                key_points=key_points_str,
-                article_content=article_content,
-                tone=recommendations["tone"],
-                reference_content=reference_content
+            result = await self._generate_with_context(
+                "conclusion",
+                article_context,
+                self.conclusion_prompt.format(article_content=article_content),
+                deadline,
             )
             return result.strip()
+        except (LLMOverloadedError, DeadlineExceededError):
+            raise
         except Exception as e:
             raise Exception(f"Conclusion generation failed: {str(e)}")
     
@@ -175,4 +335,4 @@ class LangChainContentGenerator:
         
         article_parts.extend(["", conclusion])
         
-        return "\n".join(article_parts)
\ No newline at end of file
+        return "\n".join(article_parts)
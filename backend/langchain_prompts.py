@@ -40,47 +40,58 @@ Important: Return ONLY valid JSON, no markdown formatting or additional text."""
         )
     
     @staticmethod
-    def get_introduction_prompt():
-        """Prompt template for generating introductions."""
+    def get_article_context_prompt():
+        """Prompt template for the shared, cacheable article context.
+
+        Everything in here is identical for the introduction, every section
+        and the conclusion of one article, so it is sent as a stable prefix
+        and marked for provider-side prompt caching.
+        """
         return PromptTemplate(
             input_variables=["title", "key_points", "target_audience", "tone", "reference_content"],
-            template="""Write an engaging introduction for an article titled "{title}".
+            template="""You are writing an article titled "{title}".
 
 Target audience: {target_audience}
 Tone: {tone}
-Key points to preview: {key_points}
+Key points of the article: {key_points}
 
 Reference content from original source:
 {reference_content}
 
+Guidelines for every part of the article:
+- Use the reference content to ensure accuracy and avoid hallucination, especially for niche topics.
+- Use examples and explanations appropriate for the target audience.
+- Use proper line breaks (\\n\\n) between paragraphs and logical breaks within paragraphs to improve readability."""
+        )
+    
+    @staticmethod
+    def get_introduction_prompt():
+        """Per-stage prompt suffix for generating introductions."""
+        return PromptTemplate(
+            input_variables=[],
+            template="""Write an engaging introduction for the article.
+
 Create a compelling hook, provide context, and end with a clear thesis statement.
-Write 1 concise paragraph that draws readers in and sets up the article's main points.
-Use the reference content to ensure accuracy and avoid hallucination, especially for niche topics.
-Use proper line breaks (\\n\\n) between sentences or logical breaks to improve readability.
+Write 1 concise paragraph that draws readers in and previews the key points.
 
 Return only the introduction text, no additional formatting."""
         )
     
     @staticmethod
     def get_section_prompt():
-        """Prompt template for generating sections."""
+        """Per-stage prompt suffix for generating sections."""
         return PromptTemplate(
-            input_variables=["heading", "subpoints", "previous_content", "tone", "target_audience", "reference_content"],
+            input_variables=["heading", "subpoints", "previous_content", "section_reference_content"],
             template="""Write a detailed section for the heading "{heading}".
 
 Subpoints to cover: {subpoints}
-Target audience: {target_audience}
-Tone: {tone}
 Previous content for context: {previous_content}
 
-Reference content from original source:
-{reference_content}
+Additional reference content for this section:
+{section_reference_content}
 
 Write 1-2 focused paragraphs that thoroughly cover the subpoints.
-Use proper line breaks (\\n\\n) between paragraphs and logical breaks within paragraphs to improve readability.
 Ensure smooth transitions from the previous content.
-Use the reference content to provide accurate information and avoid hallucination, especially for niche topics.
-Use examples and explanations appropriate for the target audience.
 Keep it concise but comprehensive.
 
 Return only the section content with the heading, no additional formatting."""
@@ -88,18 +99,13 @@ Return only the section content with the heading, no additional formatting."""
     
     @staticmethod
     def get_conclusion_prompt():
-        """Prompt template for generating conclusions."""
+        """Per-stage prompt suffix for generating conclusions."""
         return PromptTemplate(
-            input_variables=["title", "key_points", "article_content", "tone", "reference_content"],
-            template="""Write a compelling conclusion for an article titled "{title}".
+            input_variables=["article_content"],
+            template="""Write a compelling conclusion for the article.
 
-Key points covered: {key_points}
-Tone: {tone}
 Article content for context: {article_content}
 
-Reference content from original source:
-{reference_content}
-
 Create a conclusion that:
 1. Summarizes the main points
 2. Reinforces the article's value
@@ -107,8 +113,6 @@ Create a conclusion that:
 4. Ends with a memorable final thought
 
 Write 1 concise paragraph that provides closure and inspires action.
-Use the reference content to ensure accuracy and avoid hallucination.
-Use proper line breaks (\\n\\n) between sentences or logical breaks to improve readability.
 
 Return only the conclusion text, no additional formatting."""
-        )
\ No newline at end of file
+        )
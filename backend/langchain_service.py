@@ -1,8 +1,34 @@
+import asyncio
 import json
-from typing import Dict, Any
+import logging
+import random
+from typing import Dict, Any, Awaitable, Callable, Optional, Tuple
 
+from checkpoint_store import checkpoint_key, checkpoint_store
+from constants import STAGE_MAX_ATTEMPTS, STAGE_RETRY_BASE_DELAY
+from deadline import Deadline, DeadlineExceededError
+from llm_gateway import LLMOverloadedError
+from metrics import STAGE_RETRIES, record_cache
+from model_router import served_models
 from response_validator import ResponseValidator
-from langchain_content_generator import LangChainContentGenerator
+from langchain_content_generator import LangChainContentGenerator, StageOutputError
+from section_cache import section_cache, section_cache_key
+from structured_output import record_wasted_call
+
+logger = logging.getLogger(__name__)
+
+
+def _is_output_failure(error: BaseException) -> bool:
+    """Whether ``error``, or an error it wraps, is an unusable model output.
+    
+    The generators re-raise errors as plain Exceptions, so the original
+    error is found through the exception chain.
+    """
+    while error is not None:
+        if isinstance(error, StageOutputError):
+            return True
+        error = error.__cause__ or error.__context__
+    return False
 
 
 class LangChainService:
@@ -10,73 +36,269 @@ class LangChainService:
     
     def __init__(self):
         self.generator = LangChainContentGenerator()
+        self.section_cache = section_cache
+        self.checkpoints = checkpoint_store
+        self.stage_max_attempts = STAGE_MAX_ATTEMPTS
+        self.stage_retry_base_delay = STAGE_RETRY_BASE_DELAY
     
     async def generate_brief(
-        self, keyword: str, content_type: str, tone: str, target_audience: str, scraped_content: str = ""
+        self,
+        keyword: str,
+        content_type: str,
+        tone: str,
+        target_audience: str,
+        scraped_content: str = "",
+        content_id: Optional[str] = None,
+        deadline: Optional[Deadline] = None,
     ) -> Dict[str, Any]:
         """Generate content brief using LangChain."""
         try:
-            response = await self.generator.generate_brief(
-                keyword, content_type, tone, target_audience
+            brief_data = await self.generator.generate_brief(
+                keyword, content_type, tone, target_audience, deadline
             )
             
-            content = ResponseValidator.clean_json_response(response)
-            brief_data = json.loads(content)
+            try:
+                validated_brief = ResponseValidator.validate_and_format_brief(brief_data)
+            except ValueError:
+                record_wasted_call("brief")
+                raise
             
-            validated_brief = ResponseValidator.validate_and_format_brief(brief_data)
-            
-            # Include scraped content in the response
+            # Include scraped content in the response; content stored server-side
+            # is referenced by its id instead of being echoed back
             validated_brief["scraped_content"] = scraped_content
+            validated_brief["content_id"] = content_id
+            validated_brief["degradations"] = deadline.degradations if deadline else []
             
             return validated_brief
-            
+        
         except json.JSONDecodeError as e:
             raise Exception(f"Failed to parse JSON response: {str(e)}")
+        except (LLMOverloadedError, DeadlineExceededError):
+            raise
         except Exception as e:
             raise Exception(f"Brief generation error: {str(e)}")
     
+    async def _cached_stage(
+        self,
+        inputs: Dict[str, Any],
+        generate: Callable[[], Awaitable[str]],
+        reuse_cached: bool,
+        deadline: Optional[Deadline] = None,
+        degraded: bool = False,
+    ) -> Tuple[str, bool, bool]:
+        """Return a stage's cached output for ``inputs`` or generate (and cache) it.
+        
+        Returns the content, whether it was reused from the cache and whether
+        it was degraded to meet ``deadline``. Degraded output is not cached;
+        ``degraded`` marks inputs that were already cut short (skipped retrieval).
+        """
+        key = section_cache_key(inputs)
+        if reuse_cached:
+            cached = self.section_cache.get(key)
+            record_cache("section", hit=cached is not None)
+            if cached is not None:
+                return cached, True, False
+        
+        applied = deadline.applied if deadline else 0
+        content = await generate()
+        degraded = degraded or (deadline is not None and deadline.applied > applied)
+        if not degraded:
+            self.section_cache.put(key, content)
+        return content, False, degraded
+    
+    async def _generate_with_retries(
+        self, stage: str, generate: Callable[[], Awaitable[str]], deadline: Optional[Deadline] = None
+    ) -> str:
+        """Run one stage, retrying only that stage with jittered exponential backoff.
+        
+        Only unusable model output (StageOutputError) is retried here.
+        Timeouts, connection errors, 5xx and throttling have already been
+        retried by the gateway for every call, so retrying them again would
+        multiply provider calls; anything else is a bug and fails at once.
+        Neither is a stage whose backoff would outlast the request deadline.
+        """
+        for attempt in range(1, self.stage_max_attempts + 1):
+            try:
+                return await generate()
+            except (LLMOverloadedError, DeadlineExceededError):
+                raise
+            except Exception as e:
+                if attempt == self.stage_max_attempts or not _is_output_failure(e):
+                    raise
+                delay = random.uniform(0, self.stage_retry_base_delay * 2 ** (attempt - 1))
+                if deadline is not None and delay >= deadline.remaining():
+                    raise
+                STAGE_RETRIES.inc(stage=stage)
+                logger.warning(
+                    f"Stage '{stage}' failed (attempt {attempt}/{self.stage_max_attempts}), "
+                    f"retrying in {delay:.1f}s: {str(e)}"
+                )
+                await asyncio.sleep(delay)
+    
+    async def _run_stage(
+        self,
+        stage: str,
+        checkpoint: Dict[str, Any],
+        name: str,
+        inputs: Dict[str, Any],
+        generate: Callable[[], Awaitable[str]],
+        reuse_cached: bool,
+        deadline: Optional[Deadline] = None,
+        degraded: bool = False,
+    ) -> Tuple[str, bool]:
+        """Resume a stage from the request checkpoint, or run it and checkpoint the output.
+        
+        Returns the content and whether it was reused (from the checkpoint or
+        the section cache). Output degraded to meet the deadline is not
+        checkpointed, so a rerun with more time regenerates it in full.
+        """
+        if name in checkpoint["stages"]:
+            checkpoint["resumed"].append(name)
+            return checkpoint["stages"][name], True
+        
+        content, reused, degraded = await self._cached_stage(
+            inputs, lambda: self._generate_with_retries(stage, generate, deadline), reuse_cached, deadline, degraded
+        )
+        if not degraded:
+            self.checkpoints.save_stage(checkpoint["key"], checkpoint["stages"], name, content)
+        return content, reused
+    
     async def generate_article_from_brief(
-        self, brief_data: Dict[str, Any]
+        self,
+        brief_data: Dict[str, Any],
+        on_progress: Optional[Callable[[Dict[str, Any]], None]] = None,
+        reuse_cached: bool = False,
+        deadline: Optional[Deadline] = None,
     ) -> Dict[str, Any]:
-        """Generate article using LangChain with Claude for content and ChatGPT for conclusion."""
+        """Generate article using LangChain with Claude for content and ChatGPT for conclusion.
+        
+        Every stage output is stored in the section cache. With ``reuse_cached``
+        only stages whose inputs changed are regenerated; the result's ``reuse``
+        field reports which parts came from the cache.
+        
+        Finished stages are checkpointed per request and a failing stage is
+        retried on its own; if it still fails, rerunning the same brief resumes
+        after the last checkpointed stage (listed in ``resumed_stages``).
+        
+        With a ``deadline``, stages degrade as the budget runs low and the
+        result's ``degradations`` lists what was skipped or cut short.
+        """
+        total_stages = len(brief_data.get("outline", [])) + 2
+        generator = self.generator
+        
+        def report(stage: str, completed: int) -> None:
+            if on_progress:
+                on_progress({"stage": stage, "completed_stages": completed, "total_stages": total_stages})
+        
+        key = checkpoint_key(brief_data)
+        checkpoint = {"key": key, "stages": self.checkpoints.load(key), "resumed": []}
+        # Collects the models that actually serve this article's stages
+        served_token = served_models.set({})
+        
         try:
+            # Shared, cacheable prompt prefix reused by every article stage; if
+            # its retrieval was skipped, no stage built on it is cached or checkpointed
+            applied = deadline.applied if deadline else 0
+            article_context = await generator.build_article_context(brief_data, deadline)
+            context_degraded = deadline is not None and deadline.applied > applied
+            
             # Generate introduction using Claude with RAG context
-            intro_content = await self.generator.generate_introduction(brief_data)
+            intro_content, intro_reused = await self._run_stage(
+                "introduction",
+                checkpoint,
+                "introduction",
+                generator.stage_cache_inputs("introduction", brief_data, article_context),
+                lambda: generator.generate_introduction(brief_data, article_context, deadline),
+                reuse_cached,
+                deadline,
+                context_degraded,
+            )
+            report("introduction", 1)
             
             # Generate body sections using Claude with scraped content as context
             sections_content = []
-            for section in brief_data.get("outline", []):
-                section_content = await self.generator.generate_section(
-                    section,
-                    brief_data,
-                    intro_content + "\n\n" + "\n\n".join(sections_content)
+            sections_reuse = []
+            for index, section in enumerate(brief_data.get("outline", [])):
+                applied = deadline.applied if deadline else 0
+                relevant_docs = await generator.retrieve_section_docs(
+                    section, brief_data, article_context, deadline
+                )
+                section_degraded = context_degraded or (deadline is not None and deadline.applied > applied)
+                previous_content = intro_content + "\n\n" + "\n\n".join(sections_content)
+                section_content, section_reused = await self._run_stage(
+                    "section",
+                    checkpoint,
+                    f"section:{index}",
+                    generator.stage_cache_inputs(
+                        "section", brief_data, article_context, section=section, relevant_docs=relevant_docs
+                    ),
+                    lambda: generator.generate_section(
+                        section, brief_data, previous_content, article_context, relevant_docs, deadline
+                    ),
+                    reuse_cached,
+                    deadline,
+                    section_degraded,
                 )
                 sections_content.append(section_content)
+                sections_reuse.append({
+                    "index": index,
+                    "heading": section.get("heading", ""),
+                    "reused": section_reused,
+                })
+                report("section", len(sections_content) + 1)
             
             # Generate conclusion using LangChain with RAG context
-            conclusion_content = await self.generator.generate_conclusion(
-                brief_data, intro_content + "\n\n" + "\n\n".join(sections_content)
+            body_content = intro_content + "\n\n" + "\n\n".join(sections_content)
+            conclusion_content, conclusion_reused = await self._run_stage(
+                "conclusion",
+                checkpoint,
+                "conclusion",
+                generator.stage_cache_inputs(
+                    "conclusion", brief_data, article_context, article_content=body_content
+                ),
+                lambda: generator.generate_conclusion(brief_data, body_content, article_context, deadline),
+                reuse_cached,
+                deadline,
+                context_degraded,
             )
+            report("conclusion", total_stages)
             
             # Assemble complete article
-            complete_article = self.generator.assemble_article(
+            complete_article = generator.assemble_article(
                 brief_data, intro_content, sections_content, conclusion_content
             )
             
             # Calculate final word count
             actual_word_count = len(complete_article.split())
             
+            self.checkpoints.clear(key)
+            
             return {
                 "title": brief_data.get("title", ""),
                 "content": complete_article,
                 "word_count": actual_word_count,
                 "sections": len(sections_content) + 2,  # intro + sections + conclusion
+                "reuse": {
+                    "introduction": intro_reused,
+                    "sections": sections_reuse,
+                    "conclusion": conclusion_reused,
+                },
+                "resumed_stages": checkpoint["resumed"],
+                "degradations": deadline.degradations if deadline else [],
                 "llm_info": {
-                    "brief_and_content": "Claude 3.5 Sonnet (via LangChain)",
-                    "conclusion": "Claude 3.5 Sonnet (via LangChain)",
+                    "models": generator.config.get_model_info(),
                     "framework": "LangChain with RAG"
                 }
             }
-            
+        
+        except (LLMOverloadedError, DeadlineExceededError):
+            raise
         except Exception as e:
-            raise Exception(f"Article generation error: {str(e)}")
\ No newline at end of file
+            if checkpoint["stages"]:
+                raise Exception(
+                    f"Article generation error: {str(e)} "
+                    f"({len(checkpoint['stages'])} completed stages were saved; rerun to resume)"
+                )
+            raise Exception(f"Article generation error: {str(e)}")
+        finally:
+            served_models.reset(served_token)
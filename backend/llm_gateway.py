@@ -0,0 +1,293 @@
+import asyncio
+import collections
+import logging
+import os
+import random
+import time
+from typing import TYPE_CHECKING, Any, Deque, Dict, List, Optional
+
+from metrics import LLM_RETRIES, LLM_THROTTLED
+
+if TYPE_CHECKING:
+    from langchain.schema import BaseMessage
+
+logger = logging.getLogger(__name__)
+
+# HTTP statuses worth retrying: rate limited, server errors and Anthropic "overloaded"
+RETRYABLE_STATUS_CODES = {408, 409, 429, 500, 502, 503, 504, 529}
+THROTTLE_STATUS_CODES = {429, 529}
+
+
+class LLMOverloadedError(Exception):
+    """Raised when the provider keeps throttling us after all retries."""
+
+    def __init__(self, message: str, retry_after: Optional[float] = None):
+        super().__init__(message)
+        self.retry_after = retry_after
+
+
+def status_code(error: BaseException) -> Optional[int]:
+    """HTTP status of a provider error, if it carries one."""
+    status = getattr(error, "status_code", None)
+    if status is None and getattr(error, "response", None) is not None:
+        status = getattr(error.response, "status_code", None)
+    return status
+
+
+def is_transient_error(error: BaseException) -> bool:
+    """Whether ``error`` is worth retrying: a retryable HTTP status, a timeout or a connection error."""
+    status = status_code(error)
+    if status is not None:
+        return status in RETRYABLE_STATUS_CODES
+    # Connection errors and timeouts carry no status code
+    return isinstance(error, (asyncio.TimeoutError, ConnectionError)) or type(error).__name__ in (
+        "APIConnectionError",
+        "APITimeoutError",
+    )
+
+
+def estimate_tokens(text: str) -> int:
+    """Rough token estimate (about four characters per token)."""
+    return len(text) // 4 + 1
+
+
+class TokenBucket:
+    """Token bucket refilled continuously at ``rate_per_minute``.
+
+    Callers reserve capacity up front and sleep off any deficit, which keeps
+    waiters in FIFO order without needing a loop-bound asyncio lock.
+    """
+
+    def __init__(self, rate_per_minute: float):
+        self.capacity = float(rate_per_minute)
+        self.tokens = self.capacity
+        self.fill_rate = self.capacity / 60.0
+        self.updated = time.monotonic()
+
+    def _refill(self) -> None:
+        now = time.monotonic()
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.fill_rate)
+        self.updated = now
+
+    async def acquire(self, amount: float = 1) -> None:
+        """Take ``amount`` tokens, waiting until the bucket can cover them."""
+        self._refill()
+        self.tokens -= min(amount, self.capacity)
+        if self.tokens < 0:
+            await asyncio.sleep(-self.tokens / self.fill_rate)
+
+    def refund(self, amount: float) -> None:
+        """Return unused tokens, e.g. when actual usage was below the estimate."""
+        self._refill()
+        self.tokens = min(self.capacity, self.tokens + amount)
+
+
+class AdaptiveConcurrencyLimiter:
+    """AIMD concurrency limit driven by throttling signals and latency.
+
+    The limit grows by roughly one slot per window of successful fast calls
+    and is cut multiplicatively on 429/overloaded responses or slow calls.
+    """
+
+    def __init__(
+        self,
+        initial_limit: int,
+        min_limit: int = 1,
+        max_limit: int = 32,
+        latency_target: float = 30.0,
+        backoff_ratio: float = 0.5,
+    ):
+        self.limit = float(initial_limit)
+        self.min_limit = min_limit
+        self.max_limit = max_limit
+        self.latency_target = latency_target
+        self.backoff_ratio = backoff_ratio
+        self.in_flight = 0
+        self._waiters: Deque[asyncio.Future] = collections.deque()
+
+    async def acquire(self) -> None:
+        while self.in_flight >= int(self.limit):
+            waiter = asyncio.get_running_loop().create_future()
+            self._waiters.append(waiter)
+            try:
+                await waiter
+            except asyncio.CancelledError:
+                # Already woken for a free slot: pass it on rather than lose it
+                if waiter not in self._waiters:
+                    self._wake()
+                raise
+            finally:
+                if waiter in self._waiters:
+                    self._waiters.remove(waiter)
+        self.in_flight += 1
+
+    def release(self) -> None:
+        self.in_flight -= 1
+        self._wake()
+
+    def _wake(self) -> None:
+        free_slots = int(self.limit) - self.in_flight
+        while free_slots > 0 and self._waiters:
+            waiter = self._waiters.popleft()
+            if not waiter.done():
+                waiter.get_loop().call_soon_threadsafe(self._resolve, waiter)
+                free_slots -= 1
+
+    @staticmethod
+    def _resolve(waiter: asyncio.Future) -> None:
+        if not waiter.done():
+            waiter.set_result(None)
+
+    def on_success(self, latency: float) -> None:
+        if latency > self.latency_target:
+            self.limit = max(self.min_limit, self.limit * 0.9)
+        else:
+            self.limit = min(self.max_limit, self.limit + 1.0 / self.limit)
+        self._wake()
+
+    def on_throttled(self) -> None:
+        self.limit = max(self.min_limit, self.limit * self.backoff_ratio)
+
+
+class LLMGateway:
+    """Process-wide gateway that every LLM call goes through.
+
+    Combines request and token rate limits, adaptive concurrency and
+    jittered retries that honour the provider's ``retry-after`` header.
+    """
+
+    def __init__(
+        self,
+        requests_per_minute: int = 50,
+        tokens_per_minute: int = 80000,
+        max_concurrency: int = 8,
+        max_retries: int = 4,
+        base_delay: float = 1.0,
+        max_delay: float = 30.0,
+        latency_target: float = 60.0,
+    ):
+        self.request_bucket = TokenBucket(requests_per_minute)
+        self.token_bucket = TokenBucket(tokens_per_minute)
+        self.limiter = AdaptiveConcurrencyLimiter(
+            initial_limit=max(1, max_concurrency // 2),
+            max_limit=max_concurrency,
+            latency_target=latency_target,
+        )
+        self.max_retries = max_retries
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.paused_until = 0.0
+        self.stats: Dict[str, int] = collections.Counter()
+
+    @staticmethod
+    def _retry_after(error: Exception) -> Optional[float]:
+        response = getattr(error, "response", None)
+        headers = getattr(response, "headers", None) or {}
+        value = headers.get("retry-after")
+        if value is None:
+            return None
+        try:
+            return max(0.0, float(value))
+        except ValueError:
+            return None
+
+    def _backoff(self, attempt: int, retry_after: Optional[float]) -> float:
+        """Full-jitter exponential backoff, never shorter than ``retry-after``."""
+        delay = random.uniform(0, min(self.max_delay, self.base_delay * 2 ** attempt))
+        if retry_after is not None:
+            delay = max(delay, retry_after)
+        return delay
+
+    def _estimate_request_tokens(self, llm: Any, messages: List["BaseMessage"]) -> int:
+        input_tokens = 0
+        for message in messages:
+            if isinstance(message.content, str):
+                input_tokens += estimate_tokens(message.content)
+            else:
+                for block in message.content:
+                    text = block if isinstance(block, str) else block.get("text", "")
+                    input_tokens += estimate_tokens(text)
+        return input_tokens + int(getattr(llm, "max_tokens", 0) or 0)
+
+    @staticmethod
+    def _actual_tokens(llm_output: Optional[Dict[str, Any]]) -> Optional[int]:
+        usage = (llm_output or {}).get("usage") or {}
+        if not usage:
+            return None
+        return sum(
+            usage.get(key) or 0
+            for key in ("input_tokens", "cache_creation_input_tokens", "output_tokens")
+        )
+
+    async def _wait_for_pause(self) -> None:
+        delay = self.paused_until - time.monotonic()
+        if delay > 0:
+            await asyncio.sleep(delay)
+
+    async def ainvoke(self, llm: Any, messages: List["BaseMessage"], **kwargs: Any) -> Any:
+        """Call ``llm`` with ``messages`` under the shared limits and retry policy."""
+        estimated_tokens = self._estimate_request_tokens(llm, messages)
+
+        for attempt in range(self.max_retries + 1):
+            await self._wait_for_pause()
+            await self.request_bucket.acquire(1)
+            await self.token_bucket.acquire(estimated_tokens)
+            await self.limiter.acquire()
+
+            started = time.monotonic()
+            error: Optional[Exception] = None
+            try:
+                result = await llm.agenerate([messages], **kwargs)
+            except Exception as e:
+                error = e
+            finally:
+                self.limiter.release()
+
+            if error is None:
+                self.limiter.on_success(time.monotonic() - started)
+                self.stats["succeeded"] += 1
+
+                actual_tokens = self._actual_tokens(result.llm_output)
+                if actual_tokens is not None and actual_tokens < estimated_tokens:
+                    self.token_bucket.refund(estimated_tokens - actual_tokens)
+
+                # Expose provider usage to callers that track cost per stage
+                message = result.generations[0][0].message
+                if result.llm_output and result.llm_output.get("usage"):
+                    message.response_metadata.setdefault("usage", result.llm_output["usage"])
+                return message
+
+            status = status_code(error)
+            retry_after = self._retry_after(error)
+
+            if status in THROTTLE_STATUS_CODES:
+                self.stats["throttled"] += 1
+                LLM_THROTTLED.inc()
+                self.limiter.on_throttled()
+                if retry_after is not None:
+                    self.paused_until = max(self.paused_until, time.monotonic() + retry_after)
+
+            if not is_transient_error(error) or attempt == self.max_retries:
+                self.stats["failed"] += 1
+                if status in THROTTLE_STATUS_CODES:
+                    raise LLMOverloadedError(
+                        f"LLM provider is overloaded: {str(error)}", retry_after=retry_after
+                    ) from error
+                raise error
+
+            delay = self._backoff(attempt, retry_after)
+            self.stats["retries"] += 1
+            LLM_RETRIES.inc()
+            logger.warning(
+                f"LLM call failed with {status or type(error).__name__}, retrying in {delay:.1f}s"
+            )
+            await asyncio.sleep(delay)
+
+
+# Shared instance used by every chain in the process
+llm_gateway = LLMGateway(
+    requests_per_minute=int(os.getenv("LLM_REQUESTS_PER_MINUTE", 50)),
+    tokens_per_minute=int(os.getenv("LLM_TOKENS_PER_MINUTE", 80000)),
+    max_concurrency=int(os.getenv("LLM_MAX_CONCURRENCY", 8)),
+    max_retries=int(os.getenv("LLM_MAX_RETRIES", 4)),
+)
@@ -1,17 +1,44 @@
-from fastapi import FastAPI, HTTPException
+from fastapi import FastAPI, HTTPException, Header, Request, Response
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import JSONResponse, ORJSONResponse, PlainTextResponse, StreamingResponse
+import asyncio
+import math
 import os
+import time
+from typing import Optional
 from dotenv import load_dotenv
 
-from langchain_service import LangChainService
-from models import BriefRequest, BriefResponse, ArticleRequest, ArticleResponse, UrlAnalysisRequest, UrlAnalysisResponse
-from url_scraper import url_scraper
-from content_analyzer import content_analyzer
-from rag_service import rag_service
+from batch_briefs import generate_briefs
+from compression import CompressionMiddleware
+from constants import MAX_BATCH_BRIEFS, MAX_BATCH_CONCURRENCY
+from content_store import content_store
+from deadline import DeadlineExceededError, request_deadline
+from job_queue import job_queue, IdempotencyConflictError, JobQueueFullError, TERMINAL_STATUSES
+from llm_gateway import LLMOverloadedError
+from metrics import metrics, HTTP_DURATION, HTTP_IN_FLIGHT
+from model_router import model_router
+from models import BriefRequest, BatchBriefRequest, BriefResponse, ArticleRequest, ArticleResponse, PartialArticleResponse, UrlAnalysisRequest, UrlAnalysisResponse, JobResponse
+from services import (
+    FAST_BOOT,
+    get_content_analyzer,
+    get_langchain_service,
+    get_rag_service,
+    get_url_scraper,
+    start_warm_up,
+    warm_up,
+    warmup_state,
+)
+
+try:
+    import orjson  # noqa: F401
+    DefaultResponse = ORJSONResponse
+except ImportError:
+    DefaultResponse = JSONResponse
 
 load_dotenv()
 
-app = FastAPI(title="Content Brief Generator API")
+# orjson serializes large article and brief bodies several times faster
+app = FastAPI(title="Content Brief Generator API", default_response_class=DefaultResponse)
 
 # Configure CORS - allow all origins by default
 allow_all_cors = os.getenv("ALLOW_ALL_CORS", "true").lower() == "true"
@@ -22,7 +49,7 @@ if allow_all_cors:
         "allow_origins": ["*"],
         "allow_credentials": False,
         "allow_methods": ["GET", "POST", "OPTIONS"],
-        "allow_headers": ["Content-Type"],
+        "allow_headers": ["Content-Type", "Idempotency-Key", "X-Request-Deadline"],
     }
 else:
     # Specific origins for security
@@ -45,13 +72,116 @@ else:
         "allow_origins": cors_origins,
         "allow_credentials": False,
         "allow_methods": ["GET", "POST", "OPTIONS"],
-        "allow_headers": ["Content-Type", "Authorization"],
+        "allow_headers": ["Content-Type", "Authorization", "Idempotency-Key", "X-Request-Deadline"],
     }
 
 app.add_middleware(CORSMiddleware, **cors_config)
 
-# Initialize LangChain service
-langchain_service = LangChainService()
+# Negotiated brotli/gzip for responses over the size threshold
+app.add_middleware(
+    CompressionMiddleware, minimum_size=int(os.getenv("COMPRESSION_MIN_SIZE", 1024))
+)
+
+
+@app.middleware("http")
+async def record_request_metrics(request: Request, call_next):
+    HTTP_IN_FLIGHT.inc()
+    started = time.perf_counter()
+    status = 500
+    try:
+        response = await call_next(request)
+        status = response.status_code
+        return response
+    finally:
+        HTTP_IN_FLIGHT.dec()
+        # Label by route template, not raw path, to keep cardinality bounded
+        route = request.scope.get("route")
+        HTTP_DURATION.observe(
+            time.perf_counter() - started,
+            method=request.method,
+            route=getattr(route, "path", "unmatched"),
+            status=str(status),
+        )
+
+# Heavy services (LangChain, provider clients, Chroma, BeautifulSoup) are built
+# on first use in fast-boot mode, otherwise right here at import time
+if not FAST_BOOT:
+    warm_up()
+
+
+@app.on_event("startup")
+async def warm_on_startup():
+    if os.getenv("WARM_ON_STARTUP", "false").lower() == "true":
+        start_warm_up()
+
+
+@app.on_event("startup")
+async def start_job_queue():
+    # Re-queues jobs a previous process left queued and fails its interrupted ones
+    job_queue.start()
+
+# Seconds between job status checks when streaming job events
+JOB_EVENTS_POLL_INTERVAL = 0.5
+
+
+async def run_article_job(payload, report_progress):
+    """Background job handler for full article generation."""
+    return await get_langchain_service().generate_article_from_brief(
+        payload, on_progress=report_progress
+    )
+
+
+async def run_brief_batch_job(payload, report_progress):
+    """Background job handler for generating briefs for a keyword list."""
+    requests = [BriefRequest(**row) for row in payload["requests"]]
+    finished = []
+    
+    def on_result(record):
+        finished.append(record)
+        report_progress({
+            "completed_rows": len(finished),
+            "failed_rows": sum(1 for r in finished if r["status"] != "ok"),
+            "total_rows": len(requests),
+        })
+    
+    results = await generate_briefs(
+        get_langchain_service(), requests, payload["concurrency"], on_result=on_result
+    )
+    return {"results": results}
+
+
+job_queue.register("generate-article", run_article_job)
+job_queue.register("generate-briefs", run_brief_batch_job)
+
+
+def overloaded_exception(error: LLMOverloadedError) -> HTTPException:
+    """Map provider throttling to a retryable 503 instead of a 500."""
+    headers = None
+    if error.retry_after is not None:
+        headers = {"Retry-After": str(math.ceil(error.retry_after))}
+    return HTTPException(status_code=503, detail=str(error), headers=headers)
+
+
+def deadline_exception(error: DeadlineExceededError) -> HTTPException:
+    """The request's time budget ran out; clients may retry with a longer one."""
+    return HTTPException(status_code=504, detail=str(error))
+
+
+def require_content(content_id: Optional[str]) -> None:
+    """Reject requests that read unknown or expired stored content."""
+    if content_id and not content_store.exists(content_id):
+        raise HTTPException(
+            status_code=404, detail="Content not found or expired; analyze the URL again"
+        )
+
+
+def live_content_id(content_id: Optional[str]) -> Optional[str]:
+    """``content_id`` if its content is still stored, else None.
+
+    Generation never reads the stored text, so an expired id is dropped
+    rather than failing the request.
+    """
+    return content_id if content_id and content_store.exists(content_id) else None
 
 
 @app.get("/")
@@ -64,42 +194,204 @@ async def health_check():
     return {"status": "healthy", "service": "Content Brief Generator API"}
 
 
+@app.get("/api/ready")
+async def readiness(response: Response, warm: bool = False):
+    """Report whether heavy services are built; ``warm=true`` starts warming them."""
+    if warm:
+        start_warm_up()
+    if warmup_state["status"] != "ready":
+        response.status_code = 503
+    return warmup_state
+
+
+@app.get("/metrics", response_class=PlainTextResponse)
+async def prometheus_metrics():
+    """Pipeline metrics in Prometheus text exposition format."""
+    return PlainTextResponse(metrics.render(), media_type="text/plain; version=0.0.4")
+
+
+@app.get("/api/stage-stats")
+async def stage_stats():
+    """Per-stage model routing, latency and cost statistics."""
+    return model_router.report()
+
+
+@app.get("/api/ingest-stats")
+async def ingest_stats():
+    """Per-source chunk counts and near-duplicate drop rates of RAG ingestion."""
+    return get_rag_service().ingestion_report()
+
+
 @app.post("/api/generate-brief", response_model=BriefResponse)
-async def generate_brief(request: BriefRequest):
+async def generate_brief(request: BriefRequest, x_request_deadline: Optional[float] = Header(None)):
     try:
-        brief = await langchain_service.generate_brief(
+        brief = await get_langchain_service().generate_brief(
             keyword=request.keyword,
             content_type=request.content_type,
             tone=request.tone,
             target_audience=request.target_audience,
             scraped_content=request.scraped_content,
+            content_id=live_content_id(request.content_id),
+            deadline=request_deadline("generate_brief", x_request_deadline),
         )
         return brief
+    except LLMOverloadedError as e:
+        raise overloaded_exception(e)
+    except DeadlineExceededError as e:
+        raise deadline_exception(e)
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
 
 @app.post("/api/generate-article", response_model=ArticleResponse)
-async def generate_article(request: ArticleRequest):
+async def generate_article(request: ArticleRequest, x_request_deadline: Optional[float] = Header(None)):
+    """Generate a full article within the request deadline.
+
+    Stages degrade as the budget runs low (see ``degradations``); if it runs
+    out, finished stages are kept and rerunning the brief resumes after them.
+    """
+    try:
+        brief_data = request.dict()
+        article = await get_langchain_service().generate_article_from_brief(
+            brief_data, deadline=request_deadline("generate_article", x_request_deadline)
+        )
+        return article
+    except LLMOverloadedError as e:
+        raise overloaded_exception(e)
+    except DeadlineExceededError as e:
+        raise deadline_exception(e)
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+
+@app.post("/api/regenerate-article", response_model=PartialArticleResponse)
+async def regenerate_article(request: ArticleRequest, x_request_deadline: Optional[float] = Header(None)):
+    """Regenerate only the parts of an article whose inputs changed.
+
+    Unchanged sections are served from the section cache and reassembled;
+    ``reuse`` reports which parts were reused.
+    """
     try:
         brief_data = request.dict()
-        article = await langchain_service.generate_article_from_brief(brief_data)
+        article = await get_langchain_service().generate_article_from_brief(
+            brief_data,
+            reuse_cached=True,
+            deadline=request_deadline("generate_article", x_request_deadline),
+        )
         return article
+    except LLMOverloadedError as e:
+        raise overloaded_exception(e)
+    except DeadlineExceededError as e:
+        raise deadline_exception(e)
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
 
+@app.post("/api/jobs/generate-article", response_model=JobResponse, status_code=202)
+async def submit_article_job(
+    request: ArticleRequest,
+    response: Response,
+    idempotency_key: Optional[str] = Header(None),
+):
+    """Queue article generation and return the job immediately.
+
+    Resubmitting with the same Idempotency-Key returns the existing job.
+    """
+    try:
+        job, created = await job_queue.submit(
+            "generate-article", request.dict(), idempotency_key
+        )
+    except IdempotencyConflictError as e:
+        raise HTTPException(status_code=409, detail=str(e))
+    except JobQueueFullError as e:
+        raise HTTPException(status_code=503, detail=str(e), headers={"Retry-After": "30"})
+    
+    if not created:
+        response.status_code = 200
+    return job
+
+
+@app.post("/api/jobs/generate-briefs", response_model=JobResponse, status_code=202)
+async def submit_brief_batch_job(
+    request: BatchBriefRequest,
+    response: Response,
+    idempotency_key: Optional[str] = Header(None),
+):
+    """Queue brief generation for a list of keywords.
+
+    Poll the job for per-row results; rows that fail are reported with their error.
+    """
+    if not request.requests:
+        raise HTTPException(status_code=400, detail="No brief requests provided")
+    if len(request.requests) > MAX_BATCH_BRIEFS:
+        raise HTTPException(
+            status_code=400, detail=f"At most {MAX_BATCH_BRIEFS} briefs per batch"
+        )
+    
+    payload = request.dict()
+    payload["concurrency"] = max(1, min(request.concurrency, MAX_BATCH_CONCURRENCY))
+    try:
+        job, created = await job_queue.submit("generate-briefs", payload, idempotency_key)
+    except IdempotencyConflictError as e:
+        raise HTTPException(status_code=409, detail=str(e))
+    except JobQueueFullError as e:
+        raise HTTPException(status_code=503, detail=str(e), headers={"Retry-After": "30"})
+    
+    if not created:
+        response.status_code = 200
+    return job
+
+
+@app.get("/api/jobs/{job_id}", response_model=JobResponse)
+async def get_job(job_id: str):
+    job = job_queue.store.get(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Job not found or expired")
+    return job
+
+
+@app.get("/api/jobs/{job_id}/events")
+async def stream_job_events(job_id: str):
+    """Stream job status changes as server-sent events until the job finishes."""
+    if job_queue.store.get(job_id) is None:
+        raise HTTPException(status_code=404, detail="Job not found or expired")
+    
+    async def events():
+        last_event = None
+        while True:
+            job = job_queue.store.get(job_id)
+            if job is None:
+                break
+            event = JobResponse(**job).json()
+            if event != last_event:
+                yield f"data: {event}\n\n"
+                last_event = event
+            if job["status"] in TERMINAL_STATUSES:
+                break
+            await asyncio.sleep(JOB_EVENTS_POLL_INTERVAL)
+    
+    return StreamingResponse(events(), media_type="text/event-stream")
+
+
 @app.post("/api/analyze-url", response_model=UrlAnalysisResponse)
-async def analyze_url(request: UrlAnalysisRequest):
+async def analyze_url(request: UrlAnalysisRequest, x_request_deadline: Optional[float] = Header(None)):
+    deadline = request_deadline("analyze_url", x_request_deadline)
     try:
-        # Scrape URL content
-        content = url_scraper.scrape_url(request.url)
+        # Scrape URL content off the event loop; the request timeout only bounds
+        # each socket read, so the deadline also bounds the whole fetch
+        content = await deadline.wait(
+            "scrape", asyncio.to_thread(get_url_scraper().scrape_url, request.url, deadline)
+        )
+        
+        # Process scraped content into RAG system (skipped if the deadline is close);
+        # chunks already in the store are dropped before embedding
+        ingestion = await get_rag_service().aprocess_scraped_content(request.url, content, deadline)
         
-        # Process scraped content into RAG system
-        rag_service.process_scraped_content(request.url, content)
+        # Keep the text server-side; clients pass the id on to later requests
+        content_id = content_store.put(content)
         
         # Analyze content to extract keyword and audience
-        analysis_result = await content_analyzer.analyze_content(content)
+        analysis_result = await get_content_analyzer().analyze_content(content, deadline)
         
         # Prepare response
         response = UrlAnalysisResponse(
@@ -107,18 +399,41 @@ async def analyze_url(request: UrlAnalysisRequest):
             target_audience=analysis_result["target_audience"],
             content_type="blog",
             tone="casual",
-            scraped_content=content
+            scraped_content=content if request.include_content else "",
+            content_id=content_id,
+            degradations=deadline.degradations,
+            ingestion=ingestion,
         )
         
         return response
     except ValueError as e:
         raise HTTPException(status_code=400, detail=str(e))
+    except LLMOverloadedError as e:
+        raise overloaded_exception(e)
+    except DeadlineExceededError as e:
+        raise deadline_exception(e)
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Failed to analyze URL: {str(e)}")
 
 
+@app.get("/api/content/{content_id}")
+async def get_content(content_id: str):
+    """Stream the full text behind a content id from /api/analyze-url."""
+    require_content(content_id)
+    return StreamingResponse(
+        content_store.iter_chunks(content_id), media_type="text/plain; charset=utf-8"
+    )
+
+
 if __name__ == "__main__":
     import uvicorn
 
     port = int(os.getenv("PORT", 8000))
-    uvicorn.run(app, host="0.0.0.0", port=port)
+    workers = int(os.getenv("WEB_CONCURRENCY", 1))
+    if workers > 1:
+        # Workers must see each other's scraped content, so the RAG corpus
+        # moves to the shared on-disk index (see vector_index.py)
+        os.environ.setdefault("VECTOR_INDEX_DIR", ".vector_index")
+        uvicorn.run("main:app", host="0.0.0.0", port=port, workers=workers)
+    else:
+        uvicorn.run(app, host="0.0.0.0", port=port)
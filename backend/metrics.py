@@ -0,0 +1,242 @@
+import bisect
+import contextlib
+import time
+from typing import Dict, Iterator, List, Optional, Sequence, Tuple
+
+# Seconds; covers sub-millisecond chunking up to multi-minute LLM calls
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60, 120)
+
+
+def _escape(value: str) -> str:
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format_labels(labelnames: Sequence[str], values: Tuple[str, ...], extra: str = "") -> str:
+    pairs = [f'{name}="{_escape(value)}"' for name, value in zip(labelnames, values)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+def _format_value(value: float) -> str:
+    if value == float("inf"):
+        return "+Inf"
+    return repr(float(value)) if isinstance(value, float) and not value.is_integer() else str(int(value))
+
+
+class _Metric:
+    kind = ""
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+
+    def _key(self, labels: Dict[str, str]) -> Tuple[str, ...]:
+        return tuple(str(labels.get(name, "")) for name in self.labelnames)
+
+    def header(self) -> List[str]:
+        return [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} {self.kind}"]
+
+
+class Counter(_Metric):
+    """Monotonically increasing count, e.g. tokens or cache hits."""
+
+    kind = "counter"
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.values: Dict[Tuple[str, ...], float] = {}
+        if not self.labelnames:
+            self.values[()] = 0
+
+    def inc(self, amount: float = 1, **labels: str) -> None:
+        key = self._key(labels)
+        self.values[key] = self.values.get(key, 0) + amount
+
+    def value(self, **labels: str) -> float:
+        return self.values.get(self._key(labels), 0)
+
+    def render(self) -> List[str]:
+        return self.header() + [
+            f"{self.name}{_format_labels(self.labelnames, key)} {_format_value(value)}"
+            for key, value in sorted(self.values.items())
+        ]
+
+
+class Gauge(Counter):
+    """Value that goes up and down, e.g. in-flight requests."""
+
+    kind = "gauge"
+
+    def dec(self, amount: float = 1, **labels: str) -> None:
+        self.inc(-amount, **labels)
+
+    def set(self, value: float, **labels: str) -> None:
+        self.values[self._key(labels)] = value
+
+
+class Histogram(_Metric):
+    """Cumulative-bucket latency histogram in the Prometheus format."""
+
+    kind = "histogram"
+
+    def __init__(self, *args, buckets: Sequence[float] = DEFAULT_BUCKETS, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.buckets = tuple(sorted(buckets))
+        # Per label set: [per-bucket counts..., +Inf count], sum
+        self.counts: Dict[Tuple[str, ...], List[int]] = {}
+        self.sums: Dict[Tuple[str, ...], float] = {}
+
+    def observe(self, value: float, **labels: str) -> None:
+        key = self._key(labels)
+        counts = self.counts.get(key)
+        if counts is None:
+            counts = self.counts[key] = [0] * (len(self.buckets) + 1)
+            self.sums[key] = 0.0
+        counts[bisect.bisect_left(self.buckets, value)] += 1
+        self.sums[key] += value
+
+    def count(self, **labels: str) -> int:
+        return sum(self.counts.get(self._key(labels), ()))
+
+    @contextlib.contextmanager
+    def time(self, **labels: str) -> Iterator[None]:
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - started, **labels)
+
+    def render(self) -> List[str]:
+        lines = self.header()
+        for key, counts in sorted(self.counts.items()):
+            cumulative = 0
+            for bound, count in zip(self.buckets + (float("inf"),), counts):
+                cumulative += count
+                le = f'le="{_format_value(bound) if bound == float("inf") else bound}"'
+                lines.append(f"{self.name}_bucket{_format_labels(self.labelnames, key, le)} {cumulative}")
+            labels = _format_labels(self.labelnames, key)
+            lines.append(f"{self.name}_sum{labels} {_format_value(self.sums[key])}")
+            lines.append(f"{self.name}_count{labels} {cumulative}")
+        return lines
+
+
+class MetricsRegistry:
+    """Holds all metrics and renders them in Prometheus text format."""
+
+    def __init__(self):
+        self.metrics: Dict[str, _Metric] = {}
+
+    def _register(self, metric: _Metric) -> _Metric:
+        if metric.name in self.metrics:
+            raise ValueError(f"Metric already registered: {metric.name}")
+        self.metrics[metric.name] = metric
+        return metric
+
+    def counter(self, name: str, documentation: str, labelnames: Sequence[str] = ()) -> Counter:
+        return self._register(Counter(name, documentation, labelnames))
+
+    def gauge(self, name: str, documentation: str, labelnames: Sequence[str] = ()) -> Gauge:
+        return self._register(Gauge(name, documentation, labelnames))
+
+    def histogram(
+        self,
+        name: str,
+        documentation: str,
+        labelnames: Sequence[str] = (),
+        buckets: Optional[Sequence[float]] = None,
+    ) -> Histogram:
+        return self._register(Histogram(name, documentation, labelnames, buckets=buckets or DEFAULT_BUCKETS))
+
+    def render(self) -> str:
+        lines: List[str] = []
+        for metric in self.metrics.values():
+            lines.extend(metric.render())
+        return "\n".join(lines) + "\n"
+
+
+# Shared registry exposed on /metrics
+metrics = MetricsRegistry()
+
+STAGE_DURATION = metrics.histogram(
+    "adaptify_stage_duration_seconds",
+    "Time spent in each pipeline stage (scrape, extract, chunk, dedupe, embed, vector_store, vector_search).",
+    ["stage"],
+)
+STAGE_IN_FLIGHT = metrics.gauge(
+    "adaptify_stage_in_flight", "Pipeline stage executions currently running.", ["stage"]
+)
+LLM_DURATION = metrics.histogram(
+    "adaptify_llm_duration_seconds",
+    "LLM chain latency per stage and model, including gateway queueing and retries.",
+    ["stage", "model"],
+)
+LLM_IN_FLIGHT = metrics.gauge("adaptify_llm_in_flight", "LLM chain calls currently running.", ["stage"])
+LLM_TOKENS = metrics.counter(
+    "adaptify_llm_tokens_total",
+    "LLM tokens per chain; type is input, output, cache_read or cache_write.",
+    ["stage", "model", "type"],
+)
+LLM_ERRORS = metrics.counter("adaptify_llm_errors_total", "Failed LLM chain calls.", ["stage", "model"])
+LLM_RETRIES = metrics.counter("adaptify_llm_retries_total", "LLM calls retried by the gateway.")
+LLM_THROTTLED = metrics.counter(
+    "adaptify_llm_throttled_total", "LLM calls rejected by the provider with 429/529."
+)
+STAGE_RETRIES = metrics.counter(
+    "adaptify_stage_retries_total", "Article pipeline stages retried after a failure.", ["stage"]
+)
+LLM_HEDGES = metrics.counter(
+    "adaptify_llm_hedges_total",
+    "Hedged LLM calls; outcome is won (duplicate finished first), lost, or skipped (over the spend cap).",
+    ["stage", "outcome"],
+)
+STRUCTURED_OUTPUT = metrics.counter(
+    "adaptify_structured_output_total",
+    "LLM JSON outputs by task and how they were read: tool, parsed, repaired or failed.",
+    ["task", "result"],
+)
+LLM_WASTED_CALLS = metrics.counter(
+    "adaptify_llm_wasted_calls_total", "LLM calls whose output could not be used.", ["task"]
+)
+CACHE_REQUESTS = metrics.counter(
+    "adaptify_cache_requests_total", "Cache lookups by cache and result (hit or miss).", ["cache", "result"]
+)
+EMBED_BATCH_SIZE = metrics.histogram(
+    "adaptify_embed_batch_size",
+    "Texts per batched embedding call made by the embedding batcher.",
+    buckets=(1, 2, 4, 8, 16, 32, 64, 128, 256, 512),
+)
+INGEST_CHUNKS = metrics.counter(
+    "adaptify_ingest_chunks_total",
+    "Scraped chunks at RAG ingestion by result: kept, duplicate (of the same page), boilerplate (of another page) or skipped (deadline).",
+    ["result"],
+)
+DEADLINE_DEGRADATIONS = metrics.counter(
+    "adaptify_deadline_degradations_total",
+    "Stages degraded to fit the request deadline, by action (skipped, fast_model, reduced_max_tokens, ...).",
+    ["stage", "action"],
+)
+DEADLINE_EXCEEDED = metrics.counter(
+    "adaptify_deadline_exceeded_total", "Requests whose deadline ran out, by the stage that was running.", ["stage"]
+)
+HTTP_DURATION = metrics.histogram(
+    "adaptify_http_request_duration_seconds", "HTTP request latency per route.", ["method", "route", "status"]
+)
+HTTP_IN_FLIGHT = metrics.gauge("adaptify_http_in_flight", "HTTP requests currently being served.")
+
+
+@contextlib.contextmanager
+def track_stage(stage: str) -> Iterator[None]:
+    """Time a pipeline stage and count it as in flight while it runs."""
+    STAGE_IN_FLIGHT.inc(stage=stage)
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        STAGE_DURATION.observe(time.perf_counter() - started, stage=stage)
+        STAGE_IN_FLIGHT.dec(stage=stage)
+
+
+def record_cache(cache: str, hit: bool) -> None:
+    CACHE_REQUESTS.inc(cache=cache, result="hit" if hit else "miss")
@@ -0,0 +1,401 @@
+import asyncio
+import collections
+import logging
+import os
+import time
+from contextvars import ContextVar
+from typing import TYPE_CHECKING, Any, Callable, Deque, Dict, List, Optional, Tuple
+
+from constants import (
+    DEFAULT_MODEL,
+    FAST_MODEL,
+    MAX_TOKENS_INTRO,
+    MAX_TOKENS_SECTION,
+    MAX_TOKENS_CONCLUSION,
+    MODEL_PRICING,
+    CACHE_WRITE_PRICE_MULTIPLIER,
+    CACHE_READ_PRICE_MULTIPLIER,
+    PROMPT_CACHING_BETA,
+    STAGE_LATENCY_WINDOW_SECONDS,
+    STAGE_LATENCY_MIN_SAMPLES,
+    HEDGE_PERCENTILE,
+    HEDGE_MIN_DELAY_SECONDS,
+    HEDGE_MIN_SAMPLES,
+    HEDGE_MAX_EXTRA_RATIO,
+    HEDGE_BURST,
+    DEADLINE_REDUCED_TOKENS_THRESHOLD,
+    DEADLINE_REDUCED_TOKENS_RATIO,
+)
+from llm_gateway import llm_gateway
+from metrics import LLM_DURATION, LLM_ERRORS, LLM_HEDGES, LLM_IN_FLIGHT, LLM_TOKENS, record_cache
+
+if TYPE_CHECKING:
+    from langchain.schema import BaseMessage
+    from deadline import Deadline
+
+logger = logging.getLogger(__name__)
+
+_model = os.getenv("ANTHROPIC_MODEL", DEFAULT_MODEL)
+_fast_model = os.getenv("ANTHROPIC_FAST_MODEL", FAST_MODEL)
+_temperature = float(os.getenv("TEMPERATURE", 0.7))
+
+# Calls per model for each stage of the current request, filled in by
+# ModelRouter.ainvoke when a request sets it (fallbacks make this differ from the route)
+served_models: ContextVar[Optional[Dict[str, Dict[str, int]]]] = ContextVar("served_models", default=None)
+
+# Routing table: model, max_tokens, timeout (s) and p95 latency budget (s) per stage.
+# When a stage's p95 exceeds its budget, calls fall back to ``fallback_model``.
+STAGE_ROUTES: Dict[str, Dict[str, Any]] = {
+    "brief": {
+        "model": _model,
+        "fallback_model": _fast_model,
+        "max_tokens": int(os.getenv("MAX_TOKENS", 2000)),
+        "temperature": _temperature,
+        "timeout": 60,
+        "latency_budget": 40,
+    },
+    "introduction": {
+        "model": _model,
+        "fallback_model": _fast_model,
+        "max_tokens": MAX_TOKENS_INTRO,
+        "temperature": _temperature,
+        "timeout": 45,
+        "latency_budget": 20,
+    },
+    "section": {
+        "model": _model,
+        "fallback_model": _fast_model,
+        "max_tokens": MAX_TOKENS_SECTION,
+        "temperature": _temperature,
+        "timeout": 60,
+        "latency_budget": 30,
+    },
+    # Short, latency-sensitive stages run on the fast model
+    "conclusion": {
+        "model": _fast_model,
+        "fallback_model": _fast_model,
+        "max_tokens": MAX_TOKENS_CONCLUSION,
+        "temperature": _temperature,
+        "timeout": 30,
+        "latency_budget": 10,
+    },
+    "analysis": {
+        "model": _fast_model,
+        "fallback_model": _fast_model,
+        "max_tokens": 500,
+        "temperature": 0.3,
+        "timeout": 20,
+        "latency_budget": 8,
+    },
+}
+
+
+def prompt_caching_enabled() -> bool:
+    """ENABLE_PROMPT_CACHING switch, shared by the prompts and the client headers."""
+    return os.getenv("ENABLE_PROMPT_CACHING", "true").lower() == "true"
+
+
+def create_anthropic_llm(model: str, route: Dict[str, Any]) -> Any:
+    """Create a ChatAnthropic client for one route."""
+    # Imported here so the router can be loaded without the provider SDK
+    from langchain_anthropic import ChatAnthropic
+
+    # The beta header opts every request into caching; only send it when enabled
+    headers = {"anthropic-beta": PROMPT_CACHING_BETA} if prompt_caching_enabled() else None
+    return ChatAnthropic(
+        model=model,
+        anthropic_api_key=os.getenv("ANTHROPIC_API_KEY"),
+        temperature=route["temperature"],
+        max_tokens=route["max_tokens"],
+        default_request_timeout=route["timeout"],
+        default_headers=headers,
+    )
+
+
+def estimate_cost(model: str, usage: Dict[str, int]) -> float:
+    """Estimate the USD cost of one call from Anthropic-style usage."""
+    pricing = MODEL_PRICING.get(model, MODEL_PRICING[DEFAULT_MODEL])
+    input_cost = (
+        (usage.get("input_tokens") or 0)
+        + (usage.get("cache_creation_input_tokens") or 0) * CACHE_WRITE_PRICE_MULTIPLIER
+        + (usage.get("cache_read_input_tokens") or 0) * CACHE_READ_PRICE_MULTIPLIER
+    ) * pricing["input"]
+    output_cost = (usage.get("output_tokens") or 0) * pricing["output"]
+    return (input_cost + output_cost) / 1_000_000
+
+
+def percentile(values: List[float], pct: float) -> float:
+    """Nearest-rank percentile of ``values`` (0 for an empty list)."""
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    index = max(0, min(len(ordered) - 1, int(round(pct / 100 * len(ordered))) - 1))
+    return ordered[index]
+
+
+class HedgePolicy:
+    """When to send a duplicate of a slow LLM call, and how many we can afford.
+
+    A call that has not returned after the stage's recent ``percentile``
+    latency gets one duplicate; whichever finishes first wins. Every call earns
+    ``max_extra_ratio`` of a hedge credit (up to ``burst``), which caps the
+    extra spend at roughly that share of calls.
+    """
+
+    def __init__(
+        self,
+        enabled: bool = False,
+        percentile: float = HEDGE_PERCENTILE,
+        min_delay: float = HEDGE_MIN_DELAY_SECONDS,
+        min_samples: int = HEDGE_MIN_SAMPLES,
+        max_extra_ratio: float = HEDGE_MAX_EXTRA_RATIO,
+        burst: float = HEDGE_BURST,
+    ):
+        self.enabled = enabled
+        self.percentile = percentile
+        self.min_delay = min_delay
+        self.min_samples = min_samples
+        self.max_extra_ratio = max_extra_ratio
+        self.burst = burst
+        self.credits = float(burst)
+
+    def delay(self, latencies: List[float]) -> Optional[float]:
+        """Seconds to wait before hedging, or None when there is too little history."""
+        if not self.enabled or len(latencies) < self.min_samples:
+            return None
+        return max(self.min_delay, percentile(latencies, self.percentile))
+
+    def on_call(self) -> None:
+        self.credits = min(self.burst, self.credits + self.max_extra_ratio)
+
+    def try_acquire(self) -> bool:
+        """Spend one hedge credit if the extra-spend cap allows it."""
+        if self.credits < 1:
+            return False
+        self.credits -= 1
+        return True
+
+
+class ModelRouter:
+    """Route each pipeline stage to a model and track its latency and cost."""
+
+    def __init__(
+        self,
+        routes: Optional[Dict[str, Dict[str, Any]]] = None,
+        llm_factory: Optional[Callable[[str, Dict[str, Any]], Any]] = None,
+        window_seconds: float = STAGE_LATENCY_WINDOW_SECONDS,
+        min_samples: int = STAGE_LATENCY_MIN_SAMPLES,
+        hedging: Optional[HedgePolicy] = None,
+    ):
+        self.routes = routes or STAGE_ROUTES
+        self.hedging = hedging or HedgePolicy()
+        self.llm_factory = llm_factory or create_anthropic_llm
+        self.window_seconds = window_seconds
+        self.min_samples = min_samples
+        self._llms: Dict[Tuple[str, str], Any] = {}
+        self._latencies: Dict[Tuple[str, str], Deque[Tuple[float, float]]] = (
+            collections.defaultdict(collections.deque)
+        )
+        self.stats: Dict[Tuple[str, str], Dict[str, float]] = collections.defaultdict(
+            lambda: collections.defaultdict(float)
+        )
+
+    def get_route(self, stage: str) -> Dict[str, Any]:
+        if stage not in self.routes:
+            raise ValueError(f"Unknown pipeline stage: {stage}")
+        return self.routes[stage]
+
+    def get_llm(self, stage: str, model: Optional[str] = None) -> Any:
+        """Get (and cache) the client for ``stage``, optionally for a specific model."""
+        route = self.get_route(stage)
+        model = model or route["model"]
+        key = (stage, model)
+        if key not in self._llms:
+            self._llms[key] = self.llm_factory(model, route)
+        return self._llms[key]
+
+    def _recent_latencies(self, stage: str, model: str) -> List[float]:
+        samples = self._latencies[(stage, model)]
+        cutoff = time.monotonic() - self.window_seconds
+        while samples and samples[0][0] < cutoff:
+            samples.popleft()
+        return [latency for _, latency in samples]
+
+    def p95(self, stage: str, model: str) -> float:
+        return percentile(self._recent_latencies(stage, model), 95)
+
+    def select_model(self, stage: str) -> str:
+        """Pick the primary model unless its recent p95 is over the stage budget.
+
+        Samples expire after ``window_seconds``, so a stage that fell back
+        returns to its primary model once the slow window has passed.
+        """
+        route = self.get_route(stage)
+        latencies = self._recent_latencies(stage, route["model"])
+        if (
+            len(latencies) >= self.min_samples
+            and percentile(latencies, 95) > route["latency_budget"]
+        ):
+            return route["fallback_model"]
+        return route["model"]
+
+    def plan_for_deadline(self, stage: str, model: str, deadline: "Deadline") -> Tuple[str, Dict[str, Any]]:
+        """Model and call overrides for ``stage`` given the request's remaining budget.
+
+        With less time left than the stage's latency budget the fallback model
+        is used; with less than ``DEADLINE_REDUCED_TOKENS_THRESHOLD`` of it,
+        max_tokens is cut as well. Applied degradations are recorded on ``deadline``.
+        """
+        route = self.get_route(stage)
+        remaining = deadline.remaining()
+        overrides: Dict[str, Any] = {}
+        if remaining < route["latency_budget"] and model != route["fallback_model"]:
+            model = route["fallback_model"]
+            deadline.degrade(stage, "fast_model")
+        if remaining < route["latency_budget"] * DEADLINE_REDUCED_TOKENS_THRESHOLD:
+            overrides["max_tokens"] = max(1, int(route["max_tokens"] * DEADLINE_REDUCED_TOKENS_RATIO))
+            deadline.degrade(stage, "reduced_max_tokens")
+        return model, overrides
+
+    def record(
+        self, stage: str, model: str, latency: float, usage: Optional[Dict[str, int]] = None, failed: bool = False
+    ) -> None:
+        """Record one call's latency, token usage and cost."""
+        self._latencies[(stage, model)].append((time.monotonic(), latency))
+        stats = self.stats[(stage, model)]
+        stats["calls"] += 1
+        stats["latency_total"] += latency
+        LLM_DURATION.observe(latency, stage=stage, model=model)
+        if failed:
+            stats["failures"] += 1
+            LLM_ERRORS.inc(stage=stage, model=model)
+        if model != self.get_route(stage)["model"]:
+            stats["fallbacks"] += 1
+        if usage:
+            stats["input_tokens"] += (
+                (usage.get("input_tokens") or 0)
+                + (usage.get("cache_creation_input_tokens") or 0)
+                + (usage.get("cache_read_input_tokens") or 0)
+            )
+            stats["cached_input_tokens"] += usage.get("cache_read_input_tokens") or 0
+            stats["output_tokens"] += usage.get("output_tokens") or 0
+            stats["cost_usd"] += estimate_cost(model, usage)
+
+            LLM_TOKENS.inc(usage.get("input_tokens") or 0, stage=stage, model=model, type="input")
+            LLM_TOKENS.inc(usage.get("output_tokens") or 0, stage=stage, model=model, type="output")
+            cache_read = usage.get("cache_read_input_tokens") or 0
+            cache_write = usage.get("cache_creation_input_tokens") or 0
+            LLM_TOKENS.inc(cache_read, stage=stage, model=model, type="cache_read")
+            LLM_TOKENS.inc(cache_write, stage=stage, model=model, type="cache_write")
+            if cache_read or cache_write:
+                record_cache("prompt_prefix", hit=cache_read > 0)
+
+    async def ainvoke(
+        self, stage: str, messages: List["BaseMessage"], deadline: Optional["Deadline"] = None, **kwargs: Any
+    ) -> Any:
+        """Run ``messages`` on the model routed for ``stage`` through the LLM gateway.
+
+        Extra ``kwargs`` (e.g. tool definitions) are passed on to the model call.
+        With a ``deadline`` the call is degraded to fit the remaining budget and
+        abandoned with DeadlineExceededError when the budget runs out.
+        """
+        model = self.select_model(stage)
+        if model != self.get_route(stage)["model"]:
+            logger.warning(f"Stage '{stage}' is over its latency budget, falling back to {model}")
+        if deadline is not None:
+            deadline.check(stage)
+            model, overrides = self.plan_for_deadline(stage, model, deadline)
+            kwargs.update(overrides)
+
+        started = time.monotonic()
+        LLM_IN_FLIGHT.inc(stage=stage)
+        try:
+            call = self._hedged_invoke(stage, model, messages, **kwargs)
+            response = await (call if deadline is None else deadline.wait(stage, call))
+        except Exception:
+            self.record(stage, model, time.monotonic() - started, failed=True)
+            raise
+        finally:
+            LLM_IN_FLIGHT.dec(stage=stage)
+
+        self.record(stage, model, time.monotonic() - started, response.response_metadata.get("usage"))
+        served = served_models.get()
+        if served is not None:
+            calls = served.setdefault(stage, {})
+            calls[model] = calls.get(model, 0) + 1
+        return response
+
+    async def _hedged_invoke(
+        self, stage: str, model: str, messages: List["BaseMessage"], **kwargs: Any
+    ) -> Any:
+        """Call the model, duplicating the call once if it is slower than the hedge delay."""
+        llm = self.get_llm(stage, model)
+        self.hedging.on_call()
+        delay = self.hedging.delay(self._recent_latencies(stage, model))
+        if delay is None:
+            return await llm_gateway.ainvoke(llm, messages, **kwargs)
+
+        primary = asyncio.ensure_future(llm_gateway.ainvoke(llm, messages, **kwargs))
+        tasks = {primary}
+        try:
+            done, _ = await asyncio.wait(tasks, timeout=delay)
+            if done:
+                return primary.result()
+            if not self.hedging.try_acquire():
+                LLM_HEDGES.inc(stage=stage, outcome="skipped")
+                return await primary
+
+            hedge = asyncio.ensure_future(llm_gateway.ainvoke(llm, messages, **kwargs))
+            tasks.add(hedge)
+            self.stats[(stage, model)]["hedges"] += 1
+            pending = set(tasks)
+            while pending:
+                done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    if task.exception() is None:
+                        won = task is hedge
+                        LLM_HEDGES.inc(stage=stage, outcome="won" if won else "lost")
+                        if won:
+                            self.stats[(stage, model)]["hedge_wins"] += 1
+                        return task.result()
+            # Both calls failed; surface the original call's error
+            LLM_HEDGES.inc(stage=stage, outcome="lost")
+            return primary.result()
+        finally:
+            # Cancel whichever call lost (or both, if we were cancelled)
+            for task in tasks:
+                if not task.done():
+                    task.cancel()
+
+    def report(self) -> Dict[str, Any]:
+        """Per-stage, per-model latency percentiles, token usage and cost."""
+        report: Dict[str, Any] = {}
+        for (stage, model), stats in sorted(self.stats.items()):
+            latencies = self._recent_latencies(stage, model)
+            report.setdefault(stage, {})[model] = {
+                "calls": int(stats["calls"]),
+                "failures": int(stats["failures"]),
+                "fallbacks": int(stats["fallbacks"]),
+                "avg_latency_s": round(stats["latency_total"] / stats["calls"], 3),
+                "p50_latency_s": round(percentile(latencies, 50), 3),
+                "p95_latency_s": round(percentile(latencies, 95), 3),
+                "latency_budget_s": self.get_route(stage)["latency_budget"],
+                "input_tokens": int(stats["input_tokens"]),
+                "cached_input_tokens": int(stats["cached_input_tokens"]),
+                "output_tokens": int(stats["output_tokens"]),
+                "cost_usd": round(stats["cost_usd"], 6),
+                "hedge_rate": round(stats["hedges"] / stats["calls"], 3),
+                "hedge_win_rate": round(stats["hedge_wins"] / stats["hedges"], 3) if stats["hedges"] else 0.0,
+            }
+        return report
+
+
+# Shared router so per-stage statistics cover every caller in the process
+model_router = ModelRouter(
+    hedging=HedgePolicy(
+        enabled=os.getenv("LLM_HEDGING", "false").lower() == "true",
+        percentile=float(os.getenv("LLM_HEDGE_PERCENTILE", HEDGE_PERCENTILE)),
+        min_delay=float(os.getenv("LLM_HEDGE_MIN_DELAY", HEDGE_MIN_DELAY_SECONDS)),
+        max_extra_ratio=float(os.getenv("LLM_HEDGE_MAX_EXTRA_RATIO", HEDGE_MAX_EXTRA_RATIO)),
+    )
+)
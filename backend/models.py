@@ -1,5 +1,5 @@
 from pydantic import BaseModel
-from typing import List
+from typing import Any, Dict, List, Optional
 
 
 class OutlineItem(BaseModel):
@@ -13,12 +13,24 @@ class Recommendations(BaseModel):
     target_audience: str = "general audience"
 
 
+class Degradation(BaseModel):
+    stage: str
+    action: str
+
+
 class BriefRequest(BaseModel):
     keyword: str
     content_type: str = "blog"
     tone: str = "professional"
     target_audience: str = "general audience"
+    # Prefer ``content_id`` from /api/analyze-url over sending the text inline
     scraped_content: str = ""
+    content_id: Optional[str] = None
+
+
+class BatchBriefRequest(BaseModel):
+    requests: List[BriefRequest]
+    concurrency: int = 5
 
 
 class BriefResponse(BaseModel):
@@ -28,6 +40,9 @@ class BriefResponse(BaseModel):
     key_points: List[str]
     recommendations: Recommendations
     scraped_content: str = ""
+    content_id: Optional[str] = None
+    # Steps skipped or cut short to meet the request deadline
+    degradations: List[Degradation] = []
 
 
 class ArticleRequest(BaseModel):
@@ -37,6 +52,7 @@ class ArticleRequest(BaseModel):
     key_points: List[str]
     recommendations: Recommendations
     scraped_content: str = ""
+    content_id: Optional[str] = None
 
 
 class ArticleResponse(BaseModel):
@@ -44,10 +60,37 @@ class ArticleResponse(BaseModel):
     content: str
     word_count: int
     sections: int
+    degradations: List[Degradation] = []
+
+
+class SectionReuse(BaseModel):
+    index: int
+    heading: str
+    reused: bool
+
+
+class ArticleReuse(BaseModel):
+    introduction: bool
+    sections: List[SectionReuse]
+    conclusion: bool
+
+
+class PartialArticleResponse(ArticleResponse):
+    reuse: ArticleReuse
 
 
 class UrlAnalysisRequest(BaseModel):
     url: str
+    # Also return the scraped text inline (it is always available via /api/content/{content_id})
+    include_content: bool = False
+
+
+class IngestionStats(BaseModel):
+    chunks: int
+    kept: int
+    duplicates: int
+    boilerplate: int
+    drop_rate: float
 
 
 class UrlAnalysisResponse(BaseModel):
@@ -56,3 +99,17 @@ class UrlAnalysisResponse(BaseModel):
     content_type: str = "blog"
     tone: str = "casual"
     scraped_content: str = ""
+    content_id: Optional[str] = None
+    degradations: List[Degradation] = []
+    # Chunks of this page dropped at RAG ingestion as near-duplicates
+    ingestion: Optional[IngestionStats] = None
+
+
+class JobResponse(BaseModel):
+    job_id: str
+    status: str
+    progress: Dict[str, Any] = {}
+    result: Optional[Dict[str, Any]] = None
+    error: Optional[str] = None
+    created_at: float
+    updated_at: float
@@ -2,72 +2,294 @@ from langchain.text_splitter import RecursiveCharacterTextSplitter
 from langchain_openai import OpenAIEmbeddings
 from langchain_community.vectorstores import Chroma
 from langchain.schema import Document
-from typing import List, Dict, Optional
+from langchain_core.embeddings import Embeddings
+from typing import Any, List, Dict, Optional, Tuple
+import asyncio
 import os
+import uuid
+
+from chunk_dedup import ChunkDeduplicator, simhash
+from constants import EMBED_BATCH_MAX_SIZE, EMBED_BATCH_MAX_WAIT_SECONDS, DEADLINE_RAG_RESERVE_SECONDS
+from deadline import Deadline
+from embedding_batcher import EmbeddingBatcher
+from metrics import INGEST_CHUNKS, track_stage
+from vector_index import SharedVectorIndex
+
+
+class InstrumentedEmbeddings(Embeddings):
+    """Embeddings wrapper that records embedding latency as its own stage."""
+    
+    def __init__(self, embedding: Embeddings):
+        self.embedding = embedding
+    
+    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        with track_stage("embed"):
+            return self.embedding.embed_documents(texts)
+    
+    def embed_query(self, text: str) -> List[float]:
+        with track_stage("embed"):
+            return self.embedding.embed_query(text)
+    
+    async def aembed_documents(self, texts: List[str]) -> List[List[float]]:
+        with track_stage("embed"):
+            return await self.embedding.aembed_documents(texts)
+
 
 class RAGService:
-    def __init__(self):
-        """Initialize the RAG service with OpenAI embeddings (lightweight, no local models)"""
+    def __init__(
+        self,
+        index_dir: Optional[str] = None,
+        quantization: str = "none",
+        batch_max_size: int = EMBED_BATCH_MAX_SIZE,
+        batch_max_wait: float = EMBED_BATCH_MAX_WAIT_SECONDS,
+        dedupe: bool = True,
+    ):
+        """Initialize the RAG service with OpenAI embeddings (lightweight, no local models)
+        
+        With ``index_dir`` chunks go to a memory-mapped index on disk that every
+        worker process shares, instead of a per-process in-memory Chroma store.
+        ``quantization`` ("float16" or "int8") compresses the vectors it scans.
+        The async methods embed through a shared batcher, so concurrent
+        ingestions and queries are sent to the embedding backend together.
+        With ``dedupe`` chunks that near-duplicate a stored chunk (repeated
+        paragraphs, site boilerplate, re-scraped pages) are dropped before
+        they are embedded.
+        """
         self.embedding = None
         self.vectorstore = None
+        self.shared_index = (
+            SharedVectorIndex(index_dir, quantization=quantization) if index_dir else None
+        )
         self.text_splitter = RecursiveCharacterTextSplitter(
             chunk_size=700,
             chunk_overlap=100,
         )
+        self.batcher = EmbeddingBatcher(
+            self._embed_batch, max_batch_size=batch_max_size, max_wait=batch_max_wait
+        )
+        self.deduplicator = ChunkDeduplicator() if dedupe else None
+        # Shared index generation and rows already loaded into the deduplicator
+        self._dedupe_synced: Tuple[Optional[int], int] = (None, 0)
+        # Chunk counts per source: seen, kept, duplicates and boilerplate
+        self.ingest_stats: Dict[str, Dict[str, int]] = {}
     
     def _ensure_initialized(self):
         """Lazy initialization of embedding service"""
         if self.embedding is None:
-            self.embedding = OpenAIEmbeddings(
+            self.embedding = InstrumentedEmbeddings(OpenAIEmbeddings(
                 openai_api_key=os.getenv("OPENAI_API_KEY")
-            )
+            ))
     
-    def process_scraped_content(self, url: str, content: str) -> None:
-        """Process and store scraped content in vector database"""
+    async def _embed_batch(self, texts: List[str]) -> List[List[float]]:
         self._ensure_initialized()
+        return await self.embedding.aembed_documents(texts)
+    
+    async def _embed_within(
+        self, texts: List[str], deadline: Optional[Deadline], stage: str
+    ) -> Optional[List[List[float]]]:
+        """Embed through the batcher, or return None (and record the skip) when
+        doing so would eat into the time reserved for the LLM stages"""
+        if deadline is None:
+            return await self.batcher.embed(texts)
         
-        # Split content into chunks
-        chunks = self.text_splitter.split_text(content)
+        budget = deadline.remaining() - DEADLINE_RAG_RESERVE_SECONDS
+        if budget > 0:
+            try:
+                return await asyncio.wait_for(self.batcher.embed(texts), budget)
+            except asyncio.TimeoutError:
+                pass
+        deadline.degrade(stage, "skipped")
+        return None
+    
+    def _split(self, url: str, content: str) -> List[Document]:
+        """Split content into chunks with source metadata"""
+        with track_stage("chunk"):
+            chunks = self.text_splitter.split_text(content)
         
-        # Create documents with metadata
-        documents = [
+        return [
             Document(
                 page_content=chunk,
                 metadata={"source": url, "chunk_index": i}
             ) 
             for i, chunk in enumerate(chunks)
         ]
+    
+    def _sync_deduplicator(self) -> None:
+        """Load fingerprints other workers added to the shared index"""
+        generation = self.shared_index.generation
+        synced_generation, synced_rows = self._dedupe_synced
+        if generation != synced_generation:
+            self.deduplicator.clear()
+            synced_rows = 0
         
-        # Create or update vector store (in-memory only)
-        if self.vectorstore is None:
-            self.vectorstore = Chroma.from_documents(
-                documents, 
-                self.embedding
+        rows = self.shared_index.metadata_rows(synced_rows)
+        for metadata in rows:
+            if "simhash" in metadata:
+                self.deduplicator.add(int(metadata["simhash"], 16), metadata.get("source", ""))
+        self._dedupe_synced = (generation, synced_rows + len(rows))
+    
+    def _dedupe(self, url: str, documents: List[Document]) -> Tuple[List[Document], Dict[str, Any]]:
+        """Drop chunks that near-duplicate a stored chunk or an earlier chunk of this page
+        
+        A match from the same page counts as a duplicate, one from another page
+        as boilerplate. Returns the kept chunks and this page's counts, which
+        are recorded with ``_record_ingest`` once the chunks are stored.
+        """
+        stats = {"chunks": len(documents), "kept": len(documents), "duplicates": 0, "boilerplate": 0, "skipped": 0}
+        kept = documents
+        if self.deduplicator is not None and documents:
+            with track_stage("dedupe"):
+                if self.shared_index is not None:
+                    self._sync_deduplicator()
+                page = ChunkDeduplicator(self.deduplicator.max_distance)
+                kept = []
+                for document in documents:
+                    fingerprint = simhash(document.page_content)
+                    source = self.deduplicator.find(fingerprint) or page.find(fingerprint)
+                    if source is None:
+                        document.metadata["simhash"] = f"{fingerprint:016x}"
+                        page.add(fingerprint, url)
+                        kept.append(document)
+                    elif source == url:
+                        stats["duplicates"] += 1
+                    else:
+                        stats["boilerplate"] += 1
+                stats["kept"] = len(kept)
+        return kept, stats
+    
+    def _record_ingest(self, url: str, stats: Dict[str, int]) -> Dict[str, Any]:
+        """Add one page's counts to the per-source totals and metrics"""
+        totals = self.ingest_stats.setdefault(
+            url, {"chunks": 0, "kept": 0, "duplicates": 0, "boilerplate": 0, "skipped": 0}
+        )
+        for name, count in stats.items():
+            totals[name] += count
+        INGEST_CHUNKS.inc(stats["kept"], result="kept")
+        INGEST_CHUNKS.inc(stats["duplicates"], result="duplicate")
+        INGEST_CHUNKS.inc(stats["boilerplate"], result="boilerplate")
+        INGEST_CHUNKS.inc(stats["skipped"], result="skipped")
+        return self._with_drop_rate(stats)
+    
+    @staticmethod
+    def _with_drop_rate(stats: Dict[str, int]) -> Dict[str, Any]:
+        dropped = stats["duplicates"] + stats["boilerplate"]
+        return {**stats, "drop_rate": round(dropped / stats["chunks"], 3) if stats["chunks"] else 0.0}
+    
+    def ingestion_report(self) -> Dict[str, Dict[str, Any]]:
+        """Chunks seen, kept (stored), dropped as duplicates or boilerplate, and
+        skipped for lack of time, per source"""
+        return {source: self._with_drop_rate(stats) for source, stats in self.ingest_stats.items()}
+    
+    def _store(self, documents: List[Document], vectors: List[List[float]]) -> None:
+        """Add embedded chunks to the vector store; embedding time is recorded
+        separately by InstrumentedEmbeddings"""
+        with track_stage("vector_store"):
+            if self.shared_index is not None:
+                self.shared_index.add(
+                    vectors,
+                    [{**document.metadata, "content": document.page_content} for document in documents],
+                )
+                return
+            
+            # In-memory Chroma store, fed with the vectors we already computed
+            if self.vectorstore is None:
+                self.vectorstore = Chroma(embedding_function=self.embedding)
+            self.vectorstore._collection.upsert(
+                ids=[str(uuid.uuid4()) for _ in documents],
+                embeddings=vectors,
+                metadatas=[document.metadata for document in documents],
+                documents=[document.page_content for document in documents],
             )
-        else:
-            self.vectorstore.add_documents(documents)
+        
+        # Shared index fingerprints are picked up on the next sync instead
+        if self.deduplicator is not None and self.shared_index is None:
+            for document in documents:
+                self.deduplicator.add(int(document.metadata["simhash"], 16), document.metadata["source"])
+    
+    def process_scraped_content(self, url: str, content: str) -> Dict[str, Any]:
+        """Process and store scraped content in vector database
+        
+        Returns the page's chunk counts (see ``_dedupe``).
+        """
+        self._ensure_initialized()
+        documents, stats = self._dedupe(url, self._split(url, content))
+        if documents:
+            vectors = self.embedding.embed_documents([document.page_content for document in documents])
+            self._store(documents, vectors)
+        return self._record_ingest(url, stats)
+    
+    async def aprocess_scraped_content(
+        self, url: str, content: str, deadline: Optional[Deadline] = None
+    ) -> Dict[str, Any]:
+        """Like process_scraped_content, but embeds through the shared batcher
+        
+        With a ``deadline`` that is running low the page is not indexed and its
+        chunks are counted as skipped rather than kept.
+        """
+        self._ensure_initialized()
+        documents, stats = self._dedupe(url, self._split(url, content))
+        if documents:
+            vectors = await self._embed_within(
+                [document.page_content for document in documents], deadline, "rag_ingest"
+            )
+            if vectors is None:
+                stats["skipped"], stats["kept"] = stats["kept"], 0
+            else:
+                self._store(documents, vectors)
+        return self._record_ingest(url, stats)
     
     def retrieve_relevant_content(self, query: str, k: int = 5) -> List[Dict]:
         """Retrieve relevant chunks for a query"""
         self._ensure_initialized()
         
-        if not self.vectorstore:
+        if self.shared_index is None and not self.vectorstore:
             return []
         
-        # Use similarity search with score
-        docs_and_scores = self.vectorstore.similarity_search_with_score(query, k=k)
+        # Embed the query and search separately so each is timed on its own
+        return self._search(self.embedding.embed_query(query), k)
+    
+    async def aretrieve_relevant_content(
+        self, query: str, k: int = 5, deadline: Optional[Deadline] = None
+    ) -> List[Dict]:
+        """Like retrieve_relevant_content, but embeds the query through the shared batcher
+        
+        With a ``deadline`` that is running low retrieval is skipped and no
+        chunks are returned.
+        """
+        self._ensure_initialized()
+        
+        if self.shared_index is None and not self.vectorstore:
+            return []
+        
+        vectors = await self._embed_within([query], deadline, "retrieval")
+        if vectors is None:
+            return []
+        return self._search(vectors[0], k)
+    
+    def _search(self, query_embedding: List[float], k: int) -> List[Dict]:
+        with track_stage("vector_search"):
+            if self.shared_index is not None:
+                # Same squared L2 distance Chroma reports, so scores are comparable
+                matches = self.shared_index.search(query_embedding, k=k)
+            else:
+                matches = [
+                    ({**doc.metadata, "content": doc.page_content}, score)
+                    for doc, score in self.vectorstore.similarity_search_by_vector_with_relevance_scores(
+                        query_embedding, k=k
+                    )
+                ]
         
         results = []
-        for doc, score in docs_and_scores:
+        for metadata, score in matches:
             # Convert distance to similarity score (lower distance = higher similarity)
             # Chroma returns L2 distance, so we need to convert
             similarity_score = 1 / (1 + score)
             
             if similarity_score >= 0.1:  # Threshold check
                 results.append({
-                    "content": doc.page_content,
-                    "source": doc.metadata.get("source", ""),
-                    "chunk_index": doc.metadata.get("chunk_index", 0),
+                    "content": metadata["content"],
+                    "source": metadata.get("source", ""),
+                    "chunk_index": metadata.get("chunk_index", 0),
                     "score": float(similarity_score)
                 })
         
@@ -78,6 +300,18 @@ class RAGService:
         if self.vectorstore:
             self.vectorstore.delete_collection()
             self.vectorstore = None
+        if self.shared_index is not None:
+            self.shared_index.clear()
+        if self.deduplicator is not None:
+            self.deduplicator.clear()
+            self._dedupe_synced = (None, 0)
+        self.ingest_stats = {}
 
-# Initialize global RAG service
-rag_service = RAGService()
\ No newline at end of file
+# Initialize global RAG service; VECTOR_INDEX_DIR shares the corpus between workers
+rag_service = RAGService(
+    index_dir=os.getenv("VECTOR_INDEX_DIR") or None,
+    quantization=os.getenv("VECTOR_INDEX_QUANTIZATION", "none"),
+    batch_max_size=int(os.getenv("EMBED_BATCH_MAX_SIZE", EMBED_BATCH_MAX_SIZE)),
+    batch_max_wait=float(os.getenv("EMBED_BATCH_MAX_WAIT_MS", EMBED_BATCH_MAX_WAIT_SECONDS * 1000)) / 1000,
+    dedupe=os.getenv("RAG_DEDUPE", "true").lower() == "true",
+)
\ No newline at end of file
@@ -1,5 +1,7 @@
 from typing import Dict, Any
+from pydantic import ValidationError
 from constants import MAX_META_DESCRIPTION_LENGTH, DEFAULT_TONE
+from models import BriefResponse
 
 
 class ResponseValidator:
@@ -48,6 +50,19 @@ class ResponseValidator:
 
         return data
 
+    @staticmethod
+    def validate_brief_response(data: Dict[str, Any]) -> Dict[str, Any]:
+        # Check a formatted brief against the BriefResponse schema
+        try:
+            brief = BriefResponse(**data)
+        except ValidationError as e:
+            raise ValueError(f"Brief does not match schema: {str(e)}")
+
+        if not brief.outline:
+            raise ValueError("Brief has no usable outline sections")
+
+        return data
+
     @staticmethod
     def clean_json_response(content: str) -> str:
         # Clean up the response in case it has markdown formatting
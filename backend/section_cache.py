@@ -0,0 +1,74 @@
+import contextlib
+import hashlib
+import json
+import logging
+import os
+import tempfile
+import time
+from typing import Any, Dict, Optional
+
+logger = logging.getLogger(__name__)
+
+
+def section_cache_key(inputs: Dict[str, Any]) -> str:
+    """Content address of one generated article part: a hash of everything it depends on."""
+    return hashlib.sha256(
+        json.dumps(inputs, sort_keys=True, default=str).encode("utf-8")
+    ).hexdigest()
+
+
+def atomic_write_json(path: str, data: Dict[str, Any]) -> None:
+    """Write ``data`` to ``path`` via a temp file and rename, so readers never see partial JSON."""
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(path), suffix=".tmp")
+    try:
+        with os.fdopen(fd, "w", encoding="utf-8") as f:
+            json.dump(data, f)
+        os.replace(tmp_path, path)
+    except BaseException:
+        with contextlib.suppress(OSError):
+            os.remove(tmp_path)
+        raise
+
+
+class SectionCache:
+    """File-backed, content-addressed cache of generated intro/section/conclusion text.
+
+    Entries are written atomically, one JSON file per key, so several worker
+    processes can share the directory. Entries older than ``ttl_seconds`` miss.
+    """
+
+    def __init__(self, directory: str = ".section_cache", ttl_seconds: float = 7 * 24 * 3600):
+        self.directory = directory
+        self.ttl_seconds = ttl_seconds
+
+    def _path(self, key: str) -> str:
+        return os.path.join(self.directory, key[:2], f"{key}.json")
+
+    def get(self, key: str) -> Optional[str]:
+        path = self._path(key)
+        try:
+            if time.time() - os.path.getmtime(path) > self.ttl_seconds:
+                return None
+            with open(path, "r", encoding="utf-8") as f:
+                return json.load(f)["content"]
+        except FileNotFoundError:
+            return None
+        except (OSError, ValueError, KeyError) as e:
+            logger.warning(f"Ignoring unreadable section cache entry {key}: {str(e)}")
+            return None
+
+    def put(self, key: str, content: str) -> None:
+        path = self._path(key)
+        try:
+            atomic_write_json(path, {"content": content, "created_at": time.time()})
+        except OSError as e:
+            # A cache write failure must never fail the article itself
+            logger.warning(f"Failed to write section cache entry {key}: {str(e)}")
+
+
+# Shared cache so any worker can reuse sections generated by another request
+section_cache = SectionCache(
+    directory=os.getenv("SECTION_CACHE_DIR", ".section_cache"),
+    ttl_seconds=float(os.getenv("SECTION_CACHE_TTL_SECONDS", 7 * 24 * 3600)),
+)
@@ -0,0 +1,113 @@
+"""Lazily constructed service singletons and background warm-up.
+
+Heavy dependencies (langchain, the provider SDKs, Chroma, BeautifulSoup) are
+only imported when a service is first used, so a sleeping instance can answer
+health checks right after boot. Set FAST_BOOT=false to build everything at
+import time instead.
+"""
+import asyncio
+import logging
+import os
+import threading
+import time
+from typing import Any, Dict, Optional
+
+logger = logging.getLogger(__name__)
+
+FAST_BOOT = os.getenv("FAST_BOOT", "true").lower() == "true"
+
+_lock = threading.Lock()
+_langchain_service = None
+
+warmup_state: Dict[str, Any] = {
+    "status": "cold",
+    "started_at": None,
+    "finished_at": None,
+    "components": {},
+}
+_warmup_future: Optional[asyncio.Future] = None
+
+
+def get_langchain_service():
+    """Get the shared LangChainService, building it on first use."""
+    global _langchain_service
+    if _langchain_service is None:
+        with _lock:
+            if _langchain_service is None:
+                from langchain_service import LangChainService
+                _langchain_service = LangChainService()
+    return _langchain_service
+
+
+def get_url_scraper():
+    from url_scraper import url_scraper
+    return url_scraper
+
+
+def get_content_analyzer():
+    from content_analyzer import content_analyzer
+    return content_analyzer
+
+
+def get_rag_service():
+    from rag_service import rag_service
+    return rag_service
+
+
+def _warm_llm_clients() -> None:
+    from model_router import model_router
+    for stage in model_router.routes:
+        model_router.get_llm(stage)
+
+
+def _warm_embeddings() -> None:
+    get_rag_service()._ensure_initialized()
+
+
+WARMUP_STEPS = (
+    ("langchain_service", get_langchain_service),
+    ("url_scraper", get_url_scraper),
+    ("content_analyzer", get_content_analyzer),
+    ("rag_service", get_rag_service),
+    ("llm_clients", _warm_llm_clients),
+    ("embeddings", _warm_embeddings),
+)
+
+
+def warm_up() -> Dict[str, Any]:
+    """Import heavy modules and build every service and client (blocking).
+
+    Ends "ready" only if every step succeeded, otherwise "failed" with the
+    errors under ``components``; readiness stays 503 in that case.
+    """
+    warmup_state["status"] = "warming"
+    warmup_state["started_at"] = time.time()
+    for name, step in WARMUP_STEPS:
+        started = time.perf_counter()
+        try:
+            step()
+            warmup_state["components"][name] = {
+                "ready": True,
+                "seconds": round(time.perf_counter() - started, 3),
+            }
+        except Exception as e:
+            logger.warning(f"Warm-up of {name} failed: {str(e)}")
+            warmup_state["components"][name] = {"ready": False, "error": str(e)}
+    warmup_state["finished_at"] = time.time()
+    failed = [name for name, component in warmup_state["components"].items() if not component["ready"]]
+    warmup_state["status"] = "failed" if failed else "ready"
+    return warmup_state
+
+
+def start_warm_up() -> None:
+    """Kick off warm-up in a worker thread without blocking the event loop.
+
+    A failed warm-up is retried on the next call.
+    """
+    global _warmup_future
+    if warmup_state["status"] not in ("cold", "failed"):
+        return
+    if _warmup_future is not None and not _warmup_future.done():
+        return
+    warmup_state["status"] = "warming"
+    _warmup_future = asyncio.get_running_loop().run_in_executor(None, warm_up)
@@ -0,0 +1,152 @@
+import json
+import logging
+from typing import Any, Dict, Optional, Sequence, Tuple, Type
+
+from pydantic import BaseModel
+
+from metrics import LLM_WASTED_CALLS, STRUCTURED_OUTPUT
+
+logger = logging.getLogger(__name__)
+
+
+def _inline_refs(node: Any, definitions: Dict[str, Any]) -> Any:
+    if isinstance(node, dict):
+        ref = node.get("$ref")
+        if ref:
+            return _inline_refs(definitions[ref.rsplit("/", 1)[-1]], definitions)
+        return {
+            key: _inline_refs(value, definitions)
+            for key, value in node.items()
+            # Drop definitions and schema titles, but keep a property named "title"
+            if key not in ("$defs", "definitions") and not (key == "title" and isinstance(value, str))
+        }
+    if isinstance(node, list):
+        return [_inline_refs(item, definitions) for item in node]
+    return node
+
+
+def pydantic_tool(
+    model: Type[BaseModel], name: str, description: str, exclude: Sequence[str] = ()
+) -> Dict[str, Any]:
+    """Anthropic tool definition whose input schema is derived from ``model``.
+
+    Nested model references are inlined and ``exclude`` drops fields that the
+    server fills in itself (e.g. ``scraped_content``).
+    """
+    json_schema = getattr(model, "model_json_schema", None) or model.schema
+    schema = json_schema()
+    definitions = {**schema.get("definitions", {}), **schema.get("$defs", {})}
+    input_schema = _inline_refs(schema, definitions)
+    for field in exclude:
+        input_schema["properties"].pop(field, None)
+    input_schema["required"] = [
+        field for field in input_schema.get("required", []) if field not in exclude
+    ]
+    return {"name": name, "description": description, "input_schema": input_schema}
+
+
+def tool_call_kwargs(tool: Dict[str, Any]) -> Dict[str, Any]:
+    """Model call arguments that force the model to answer through ``tool``."""
+    return {"extra_body": {"tools": [tool], "tool_choice": {"type": "tool", "name": tool["name"]}}}
+
+
+def tool_call_input(message: Any, tool_name: str, task: str) -> Optional[Dict[str, Any]]:
+    """Return the input of the ``tool_name`` call in ``message``, if the model made one."""
+    if isinstance(message.content, list):
+        for block in message.content:
+            if isinstance(block, dict) and block.get("type") == "tool_use" and block.get("name") == tool_name:
+                if isinstance(block.get("input"), dict) and block["input"]:
+                    STRUCTURED_OUTPUT.inc(task=task, result="tool")
+                    return block["input"]
+    return None
+
+
+def message_text(message: Any) -> str:
+    """Concatenated text blocks of a chat message."""
+    if isinstance(message.content, str):
+        return message.content
+    return "".join(
+        block.get("text", "") if isinstance(block, dict) else str(block) for block in message.content
+    )
+
+
+def _closers(stack: Sequence[str]) -> str:
+    return "".join(reversed(stack))
+
+
+def repair_json(text: str) -> Tuple[str, bool]:
+    """Extract the first JSON object or array from ``text`` in a single scan.
+
+    Surrounding prose and code fences are ignored. Output that was cut off
+    (e.g. by ``max_tokens``) is truncated back to the last complete value and
+    its open strings, objects and arrays are closed. Returns the JSON text and
+    whether it had to be repaired.
+    """
+    starts = [index for index in (text.find("{"), text.find("[")) if index != -1]
+    if not starts:
+        raise json.JSONDecodeError("No JSON object found", text, 0)
+    start = min(starts)
+
+    stack = []
+    in_string = escaped = string_is_key = False
+    previous = ""
+    # Last position where the document could be cut and closed as valid JSON
+    safe_end, safe_closers = start, ""
+
+    for index in range(start, len(text)):
+        char = text[index]
+        if in_string:
+            if escaped:
+                escaped = False
+            elif char == "\\":
+                escaped = True
+            elif char == '"':
+                in_string = False
+                previous = char
+                if not string_is_key:
+                    safe_end, safe_closers = index + 1, _closers(stack)
+            continue
+        if char.isspace():
+            continue
+        if char == '"':
+            in_string = True
+            string_is_key = stack[-1:] == ["}"] and previous in ("{", ",")
+        elif char in "{[":
+            stack.append("}" if char == "{" else "]")
+            safe_end, safe_closers = index + 1, _closers(stack)
+        elif char in "}]":
+            if not stack or stack[-1] != char:
+                break
+            stack.pop()
+            if not stack:
+                return text[start:index + 1], False
+            safe_end, safe_closers = index + 1, _closers(stack)
+        elif char == ",":
+            safe_end, safe_closers = index, _closers(stack)
+        previous = char
+
+    return text[start:safe_end] + safe_closers, True
+
+
+def parse_json_output(text: str, task: str) -> Dict[str, Any]:
+    """Parse an LLM's JSON answer, repairing truncation, and track the outcome per task.
+
+    Raises ``json.JSONDecodeError`` when nothing usable can be recovered; the
+    call is then counted as wasted.
+    """
+    try:
+        content, repaired = repair_json(text)
+        data = json.loads(content)
+    except json.JSONDecodeError:
+        STRUCTURED_OUTPUT.inc(task=task, result="failed")
+        LLM_WASTED_CALLS.inc(task=task)
+        raise
+    if repaired:
+        logger.warning(f"Repaired truncated JSON output for {task}")
+    STRUCTURED_OUTPUT.inc(task=task, result="repaired" if repaired else "parsed")
+    return data
+
+
+def record_wasted_call(task: str) -> None:
+    """Count an LLM call whose (parsed) output still could not be used."""
+    LLM_WASTED_CALLS.inc(task=task)
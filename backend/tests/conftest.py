@@ -0,0 +1,68 @@
+"""Shared fixtures for the article pipeline tests"""
+import copy
+import sys
+import os
+from typing import Any, Dict, List
+
+import pytest
+
+# Add parent directory to path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from benchmarks.fake_llm import FakeChatAnthropic
+from checkpoint_store import CheckpointStore
+from langchain_service import LangChainService
+from model_router import ModelRouter
+from rag_service import rag_service
+from section_cache import SectionCache
+
+SAMPLE_BRIEF = {
+    "title": "A Practical Guide to Home Composting",
+    "meta_description": "Everything you need to start composting at home.",
+    "outline": [
+        {"heading": f"Section {i}", "subpoints": ["Why it matters", "How to do it", "Common mistakes"]}
+        for i in range(1, 7)
+    ],
+    "key_points": ["Greens and browns", "Moisture", "Aeration", "Troubleshooting"],
+    "recommendations": {"tone": "friendly", "style": "practical", "target_audience": "beginners"},
+}
+
+
+async def fixture_retrieval(query: str, k: int = 5, deadline: Any = None) -> List[Dict[str, Any]]:
+    """Deterministic stand-in for RAG retrieval returning fixed source chunks."""
+    return [
+        {
+            "content": f"Reference paragraph {i} about composting. " * 25,
+            "source": "https://example.com/composting",
+            "chunk_index": i,
+            "score": 0.9,
+        }
+        for i in range(k)
+    ]
+
+
+@pytest.fixture
+def sample_brief():
+    """A six-section article brief."""
+    return copy.deepcopy(SAMPLE_BRIEF)
+
+
+@pytest.fixture
+def article_service(monkeypatch, tmp_path):
+    """Factory for LangChainServices with fixture retrieval and a fake LLM.
+
+    ``build(name, llm)`` returns ``(service, llm)``; the section cache and
+    checkpoints live in ``sections<name>`` and ``checkpoints<name>`` under
+    ``tmp_path``, so services built with different names share nothing.
+    """
+    monkeypatch.setattr(rag_service, "aretrieve_relevant_content", fixture_retrieval)
+
+    def build(name: str = "", llm: Any = None):
+        service = LangChainService()
+        service.section_cache = SectionCache(str(tmp_path / f"sections{name}"))
+        service.checkpoints = CheckpointStore(str(tmp_path / f"checkpoints{name}"))
+        fake_llm = llm or FakeChatAnthropic(base_latency=0, input_token_latency=0)
+        service.generator.config.router = ModelRouter(llm_factory=lambda model, route: fake_llm)
+        return service, fake_llm
+
+    return build
@@ -0,0 +1,72 @@
+"""Tests for bulk brief generation"""
+import asyncio
+import json
+import sys
+import os
+
+# Add parent directory to path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from batch_briefs import run_batch
+
+
+class FakeBriefService:
+    """Returns a valid brief, failing for keywords listed in ``failing``."""
+
+    def __init__(self, failing=()):
+        self.failing = set(failing)
+        self.calls = []
+
+    async def generate_brief(self, keyword, content_type, tone, target_audience, scraped_content=""):
+        self.calls.append(keyword)
+        if keyword in self.failing:
+            raise Exception(f"failed {keyword}")
+        return {
+            "title": f"All about {keyword}",
+            "meta_description": "desc",
+            "outline": [{"heading": "Intro", "subpoints": ["a"]}],
+            "key_points": ["k"],
+            "recommendations": {"tone": tone, "style": "informative"},
+            "scraped_content": scraped_content,
+        }
+
+
+def _write_csv(path, keywords):
+    path.write_text("keyword,tone\n" + "".join(f"{k},casual\n" for k in keywords))
+
+
+def _records(path):
+    return [json.loads(line) for line in path.read_text().splitlines()]
+
+
+def test_batch_writes_results_incrementally(tmp_path):
+    """Every row is written to the output JSONL with its status"""
+    input_path, output_path = tmp_path / "in.csv", tmp_path / "out.jsonl"
+    _write_csv(input_path, ["alpha", "beta", "gamma"])
+
+    service = FakeBriefService(failing={"beta"})
+    summary = asyncio.run(run_batch(str(input_path), str(output_path), 2, service=service))
+
+    assert summary == {"total": 3, "skipped": 0, "succeeded": 2, "failed": 1}
+    records = {record["keyword"]: record for record in _records(output_path)}
+    assert records["alpha"]["brief"]["recommendations"]["tone"] == "casual"
+    assert records["beta"]["status"] == "error"
+
+
+def test_batch_resumes_from_completed_rows(tmp_path):
+    """A rerun only generates rows missing from the output"""
+    input_path, output_path = tmp_path / "in.jsonl", tmp_path / "out.jsonl"
+    input_path.write_text("".join(json.dumps({"keyword": k}) + "\n" for k in ["a", "b", "c"]))
+    output_path.write_text(
+        json.dumps({"row": 0, "keyword": "a", "status": "ok", "brief": {}}) + "\n"
+        + json.dumps({"row": 1, "keyword": "b", "status": "error", "error": "x"}) + "\n"
+        + '{"row": 2, "keyw'
+    )
+
+    service = FakeBriefService()
+    asyncio.run(run_batch(str(input_path), str(output_path), service=service))
+    assert service.calls == ["c"]
+
+    service = FakeBriefService()
+    asyncio.run(run_batch(str(input_path), str(output_path), retry_failed=True, service=service))
+    assert service.calls == ["b"]
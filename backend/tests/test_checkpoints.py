@@ -0,0 +1,98 @@
+"""Tests for per-stage retries and resuming articles from checkpoints"""
+import asyncio
+import sys
+import os
+
+import pytest
+
+# Add parent directory to path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from benchmarks.fake_llm import FakeChatAnthropic
+from checkpoint_store import checkpoint_key
+from constants import STAGE_MAX_ATTEMPTS
+from langchain_content_generator import StageOutputError
+from llm_gateway import llm_gateway
+
+
+class UnavailableError(Exception):
+    status_code = 503
+
+
+class UnavailableLLM(FakeChatAnthropic):
+    """Fake provider that answers every call with a 503."""
+
+    attempts: int = 0
+
+    async def _agenerate(self, messages, stop=None, run_manager=None, **kwargs):
+        self.attempts += 1
+        raise UnavailableError("status 503")
+
+
+def _flaky(service, failing_heading, failures, error=StageOutputError):
+    """Make the section ``failing_heading`` raise ``failures`` times before succeeding.
+    
+    The failure is ``error`` wrapped the way the generator wraps it.
+    """
+    service.stage_retry_base_delay = 0
+    generate_section = service.generator.generate_section
+    remaining = {"failures": failures}
+
+    async def flaky_generate_section(section, *args, **kwargs):
+        if section["heading"] == failing_heading and remaining["failures"]:
+            remaining["failures"] -= 1
+            raise Exception("Section generation failed") from error()
+        return await generate_section(section, *args, **kwargs)
+
+    service.generator.generate_section = flaky_generate_section
+
+
+def test_failed_stage_is_retried_alone(article_service, sample_brief):
+    """A section with unusable output is retried without redoing other stages"""
+    service, fake_llm = article_service()
+    _flaky(service, sample_brief["outline"][1]["heading"], failures=2)
+    article = asyncio.run(service.generate_article_from_brief(sample_brief))
+    assert article["sections"] == len(sample_brief["outline"]) + 2
+    assert fake_llm.stats["calls"] == len(sample_brief["outline"]) + 2
+    # Checkpoints are dropped once the article is complete
+    assert service.checkpoints.load(checkpoint_key(sample_brief)) == {}
+
+
+def test_rerun_resumes_from_last_checkpoint(article_service, sample_brief):
+    """After a stage exhausts its retries, a rerun only generates the remaining stages"""
+    failing = 2
+    service, fake_llm = article_service()
+    _flaky(service, sample_brief["outline"][failing]["heading"], failures=STAGE_MAX_ATTEMPTS)
+    with pytest.raises(Exception, match="rerun to resume"):
+        asyncio.run(service.generate_article_from_brief(sample_brief))
+    assert fake_llm.stats["calls"] == 1 + failing
+
+    fake_llm.reset_stats()
+    article = asyncio.run(service.generate_article_from_brief(sample_brief))
+    assert article["resumed_stages"] == ["introduction"] + [f"section:{i}" for i in range(failing)]
+    assert article["reuse"]["introduction"]
+    assert [part["reused"] for part in article["reuse"]["sections"]] == [
+        index < failing for index in range(len(sample_brief["outline"]))
+    ]
+    assert fake_llm.stats["calls"] == len(sample_brief["outline"]) - failing + 1
+
+
+def test_non_transient_failure_is_not_retried(article_service, sample_brief):
+    """A stage that fails on a bad response or a bug fails at once instead of being retried"""
+    failing = 1
+    service, fake_llm = article_service()
+    _flaky(service, sample_brief["outline"][failing]["heading"], failures=1, error=ValueError)
+    with pytest.raises(Exception, match="rerun to resume"):
+        asyncio.run(service.generate_article_from_brief(sample_brief))
+    assert fake_llm.stats["calls"] == 1 + failing
+
+
+def test_provider_errors_are_only_retried_by_the_gateway(monkeypatch, article_service, sample_brief):
+    """A stage whose provider keeps returning 503 makes the gateway's attempts, not stage times gateway"""
+    monkeypatch.setattr(llm_gateway, "base_delay", 0)
+    monkeypatch.setattr(llm_gateway, "max_delay", 0)
+    service, unavailable = article_service(llm=UnavailableLLM(base_latency=0))
+    service.stage_retry_base_delay = 0
+    with pytest.raises(Exception, match="503"):
+        asyncio.run(service.generate_article_from_brief(sample_brief))
+    assert unavailable.attempts == llm_gateway.max_retries + 1
@@ -0,0 +1,73 @@
+"""Tests for near-duplicate chunk filtering at RAG ingestion"""
+import random
+import sys
+import os
+
+# Add parent directory to path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from benchmarks.fake_llm import FakeEmbeddings
+from chunk_dedup import ChunkDeduplicator, hamming_distance, simhash
+from rag_service import RAGService
+
+WORDS = (
+    "garden soil compost water seed harvest spring autumn tool hive bee honey "
+    "bread flour oven wood saw plank bird nest feeder light pump nutrient root"
+).split()
+
+
+def _text(seed: int, words: int = 120) -> str:
+    rng = random.Random(seed)
+    return " ".join(rng.choice(WORDS) for _ in range(words))
+
+
+# Long enough that the first chunk of every page is site chrome only
+SITE_CHROME = "Home Shop Blog About Contact Newsletter " + _text(999, 130)
+
+
+def _service(tmp_path=None) -> RAGService:
+    service = RAGService(index_dir=str(tmp_path) if tmp_path else None)
+    service.embedding = FakeEmbeddings(call_latency=0, text_latency=0)
+    return service
+
+
+def test_simhash_separates_near_duplicates_from_unrelated_text():
+    """An edited word moves the fingerprint a few bits; unrelated text moves it many"""
+    text = _text(1)
+    edited = text.replace("soil", "clay", 1)
+    assert hamming_distance(simhash(text), simhash(edited)) <= 7
+    assert hamming_distance(simhash(text), simhash(_text(2))) > 16
+
+    index = ChunkDeduplicator(max_distance=7)
+    index.add(simhash(text), "https://example.com/a")
+    assert index.find(simhash(edited)) == "https://example.com/a"
+    assert index.find(simhash(_text(2))) is None
+
+
+def test_boilerplate_and_rescraped_pages_are_not_embedded():
+    """Chrome shared with another page and re-scraped chunks are dropped before embedding"""
+    service = _service()
+    first = service.process_scraped_content("https://example.com/a", f"{SITE_CHROME} {_text(10, 400)}")
+    texts = service.embedding.stats["texts"]
+    second = service.process_scraped_content("https://example.com/b", f"{SITE_CHROME} {_text(20, 400)}")
+    again = service.process_scraped_content("https://example.com/a", f"{SITE_CHROME} {_text(10, 400)}")
+    report = service.ingestion_report()
+    service.clear_vectorstore()
+
+    assert first["kept"] == first["chunks"]
+    assert second["boilerplate"] >= 1
+    assert service.embedding.stats["texts"] == texts + second["kept"]
+    assert again["kept"] == 0 and again["drop_rate"] == 1.0
+    assert report["https://example.com/a"]["duplicates"] == again["chunks"]
+
+
+def test_workers_share_fingerprints_through_the_shared_index(tmp_path):
+    """A page indexed by one worker is recognised as a duplicate by another"""
+    workers = [_service(tmp_path), _service(tmp_path)]
+    content = _text(30, 400)
+    workers[0].process_scraped_content("https://example.com/a", content)
+    stats = workers[1].process_scraped_content("https://example.com/a", content)
+
+    assert stats["chunks"] > 0
+    assert stats["duplicates"] == stats["chunks"]
+    assert workers[1].embedding.stats["calls"] == 0
@@ -0,0 +1,55 @@
+"""Tests for fast-boot mode and the readiness endpoint"""
+import subprocess
+import sys
+import os
+
+# Add parent directory to path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def test_fast_boot_defers_heavy_imports():
+    """Importing the app in fast-boot mode does not load LangChain, Chroma or bs4"""
+    code = (
+        "import sys, main; "
+        "heavy = [m for m in ('langchain', 'langchain_anthropic', 'langchain_openai', "
+        "'langchain_community', 'bs4', 'chromadb') if m in sys.modules]; "
+        "print(','.join(heavy))"
+    )
+    env = dict(os.environ, FAST_BOOT="true")
+    output = subprocess.check_output([sys.executable, "-c", code], cwd=BACKEND_DIR, env=env)
+    assert output.decode().strip() == ""
+
+
+def test_readiness_reports_and_starts_warm_up():
+    """/api/ready is 503 until warm-up has finished and 200 afterwards"""
+    code = (
+        "import time; from fastapi.testclient import TestClient; from main import app; "
+        "client = TestClient(app); "
+        "print(client.get('/api/ready').status_code); "
+        "client.get('/api/ready?warm=true'); "
+        "deadline = time.time() + 60; "
+        "status = 503\n"
+        "while status != 200 and time.time() < deadline:\n"
+        "    time.sleep(0.1); status = client.get('/api/ready').status_code\n"
+        "print(status)"
+    )
+    # Building the embeddings client only checks that a key is configured
+    env = dict(os.environ, FAST_BOOT="true", OPENAI_API_KEY=os.getenv("OPENAI_API_KEY", "test-key"))
+    output = subprocess.check_output([sys.executable, "-c", code], cwd=BACKEND_DIR, env=env)
+    assert output.decode().split() == ["503", "200"]
+
+
+def test_readiness_stays_unavailable_when_warm_up_fails():
+    """A component that cannot be built leaves /api/ready at 503 with status 'failed'"""
+    code = (
+        "from fastapi.testclient import TestClient; import services; from main import app; "
+        "services.warm_up(); "
+        "response = TestClient(app).get('/api/ready'); "
+        "print(response.status_code, response.json()['status'], response.json()['components']['embeddings']['ready'])"
+    )
+    env = dict(os.environ, FAST_BOOT="true")
+    env.pop("OPENAI_API_KEY", None)
+    output = subprocess.check_output([sys.executable, "-c", code], cwd=BACKEND_DIR, env=env)
+    assert output.decode().split() == ["503", "failed", "False"]
@@ -0,0 +1,85 @@
+"""Tests for negotiated response compression"""
+import sys
+import os
+
+import pytest
+from fastapi import FastAPI
+from fastapi.responses import PlainTextResponse, StreamingResponse
+from fastapi.testclient import TestClient
+
+# Add parent directory to path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import main
+from compression import CompressionMiddleware, brotli, negotiate_encoding
+
+LARGE_TEXT = "Generated article paragraph. " * 200
+
+
+def _client():
+    app = FastAPI()
+    app.add_middleware(CompressionMiddleware, minimum_size=1024)
+
+    @app.get("/large")
+    async def large():
+        return PlainTextResponse(LARGE_TEXT)
+
+    @app.get("/small")
+    async def small():
+        return PlainTextResponse("ok")
+
+    @app.get("/stream")
+    async def stream():
+        return StreamingResponse(iter([LARGE_TEXT.encode(), LARGE_TEXT.encode()]), media_type="text/plain")
+
+    @app.get("/events")
+    async def events():
+        return StreamingResponse(iter([b"data: {}\n\n"] * 200), media_type="text/event-stream")
+
+    return TestClient(app)
+
+
+def test_negotiates_encoding_from_accept_header():
+    """brotli is preferred when available, q=0 excludes an encoding"""
+    assert negotiate_encoding("gzip, deflate, br", brotli_available=True) == "br"
+    assert negotiate_encoding("gzip, deflate, br", brotli_available=False) == "gzip"
+    assert negotiate_encoding("br;q=0.5, gzip", brotli_available=True) == "gzip"
+    assert negotiate_encoding("gzip;q=0", brotli_available=False) is None
+    assert negotiate_encoding("identity", brotli_available=True) is None
+
+
+def test_large_responses_are_gzipped():
+    """Bodies over the threshold are compressed; small ones are sent as is"""
+    client = _client()
+    response = client.get("/large", headers={"Accept-Encoding": "gzip"})
+    assert response.headers["content-encoding"] == "gzip"
+    assert int(response.headers["content-length"]) < len(LARGE_TEXT) / 10
+    assert response.text == LARGE_TEXT
+
+    response = client.get("/small", headers={"Accept-Encoding": "gzip"})
+    assert "content-encoding" not in response.headers
+
+
+def test_streams_are_compressed_but_event_streams_are_not():
+    """Chunked bodies are compressed on the fly; SSE is left untouched"""
+    client = _client()
+    response = client.get("/stream", headers={"Accept-Encoding": "gzip"})
+    assert response.headers["content-encoding"] == "gzip"
+    assert response.text == LARGE_TEXT * 2
+
+    response = client.get("/events", headers={"Accept-Encoding": "gzip"})
+    assert "content-encoding" not in response.headers
+
+
+@pytest.mark.skipif(brotli is None, reason="brotli is not installed")
+def test_brotli_when_accepted():
+    response = _client().get("/large", headers={"Accept-Encoding": "br"})
+    assert response.headers["content-encoding"] == "br"
+    assert brotli.decompress(response.content).decode() == LARGE_TEXT
+
+
+def test_api_uses_fast_json_responses():
+    """API endpoints render with the app's default (orjson when installed) response class"""
+    response = TestClient(main.app).get("/api/health", headers={"Accept-Encoding": "gzip"})
+    assert response.json() == {"status": "healthy", "service": "Content Brief Generator API"}
+    assert main.app.router.default_response_class is main.DefaultResponse
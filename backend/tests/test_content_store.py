@@ -0,0 +1,60 @@
+"""Tests for server-side content handles"""
+import sys
+import os
+
+from fastapi.testclient import TestClient
+
+# Add parent directory to path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import main
+from content_store import ContentStore
+
+
+def test_content_is_stored_by_hash(tmp_path):
+    """Identical content maps to the same compact id and can be streamed back"""
+    store = ContentStore(str(tmp_path))
+    text = "Scraped paragraph. " * 2000
+    content_id = store.put(text)
+    assert content_id == store.put(text)
+    assert len(content_id) == 32
+    assert store.get(content_id) == text
+    assert b"".join(store.iter_chunks(content_id, chunk_size=1000)).decode("utf-8") == text
+
+    assert not store.exists("../../etc/passwd")
+    assert ContentStore(str(tmp_path), ttl_seconds=-1).get(content_id) is None
+
+
+def test_content_endpoint_streams_text_on_demand(tmp_path, monkeypatch):
+    """Stored text is only sent when a client asks for it by id"""
+    store = ContentStore(str(tmp_path))
+    monkeypatch.setattr(main, "content_store", store)
+    client = TestClient(main.app)
+    content_id = store.put("Full scraped text")
+
+    response = client.get(f"/api/content/{content_id}")
+    assert response.status_code == 200
+    assert response.text == "Full scraped text"
+    assert client.get("/api/content/" + "0" * 32).status_code == 404
+
+
+def test_expired_content_id_does_not_block_generation(tmp_path, monkeypatch):
+    """Generation never reads stored text, so an expired id is dropped instead of failing"""
+    monkeypatch.setattr(main, "content_store", ContentStore(str(tmp_path)))
+    received = {}
+
+    class FakeService:
+        async def generate_brief(self, **kwargs):
+            received.update(kwargs)
+            return {
+                "title": "t", "meta_description": "m", "outline": [], "key_points": [],
+                "recommendations": {"tone": "friendly", "style": "practical"},
+                "content_id": kwargs["content_id"],
+            }
+
+    monkeypatch.setattr(main, "get_langchain_service", lambda: FakeService())
+    client = TestClient(main.app)
+    response = client.post("/api/generate-brief", json={"keyword": "test", "content_id": "ab" * 16})
+    assert response.status_code == 200
+    assert received["content_id"] is None
+    assert response.json()["content_id"] is None
@@ -0,0 +1,159 @@
+"""Tests for request deadlines and graceful degradation"""
+import asyncio
+import sys
+import os
+import threading
+import time
+
+import pytest
+from fastapi import HTTPException
+from fastapi.testclient import TestClient
+
+# Add parent directory to path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from langchain.schema import HumanMessage
+from benchmarks.fake_llm import FakeChatAnthropic, FakeEmbeddings
+from deadline import Deadline, DeadlineExceededError
+from llm_gateway import LLMOverloadedError
+from model_router import ModelRouter, STAGE_ROUTES
+from models import UrlAnalysisRequest
+from rag_service import RAGService, rag_service
+import main
+
+
+def test_low_budget_uses_fast_model_and_fewer_tokens():
+    """A stage with less time left than its latency budget is degraded"""
+    llms = {}
+    router = ModelRouter(
+        llm_factory=lambda model, route: llms.setdefault(model, FakeChatAnthropic(model=model, base_latency=0, output_tokens=5000))
+    )
+    route = STAGE_ROUTES["section"]
+    deadline = Deadline(route["latency_budget"] * 0.25)
+
+    response = asyncio.run(router.ainvoke("section", [HumanMessage(content="section prompt")], deadline=deadline))
+
+    assert list(llms) == [route["fallback_model"]]
+    assert response.response_metadata["usage"]["output_tokens"] < route["max_tokens"]
+    assert deadline.degradations == [
+        {"stage": "section", "action": "fast_model"},
+        {"stage": "section", "action": "reduced_max_tokens"},
+    ]
+
+
+def test_call_is_abandoned_when_deadline_runs_out():
+    """A call still running at the deadline raises DeadlineExceededError"""
+    router = ModelRouter(llm_factory=lambda model, route: FakeChatAnthropic(model=model, base_latency=2))
+    with pytest.raises(DeadlineExceededError):
+        asyncio.run(router.ainvoke("analysis", [HumanMessage(content="prompt")], deadline=Deadline(0.1)))
+
+
+def test_retrieval_is_skipped_when_budget_is_low():
+    """RAG retrieval is skipped rather than eating into the LLM stages' time"""
+    embeddings = FakeEmbeddings(call_latency=0, text_latency=0)
+    service = RAGService()
+    service.embedding = embeddings
+    asyncio.run(service.aprocess_scraped_content("https://example.com/bees", "beekeeping " * 50))
+    calls = embeddings.stats["calls"]
+
+    deadline = Deadline(1)
+    results = asyncio.run(service.aretrieve_relevant_content("beekeeping", deadline=deadline))
+    service.clear_vectorstore()
+
+    assert results == []
+    assert embeddings.stats["calls"] == calls
+    assert deadline.degradations == [{"stage": "retrieval", "action": "skipped"}]
+
+
+def test_skipped_ingestion_is_not_counted_as_kept():
+    """Chunks left unindexed because the budget ran low are reported as skipped"""
+    embeddings = FakeEmbeddings(call_latency=0, text_latency=0)
+    service = RAGService()
+    service.embedding = embeddings
+    deadline = Deadline(1)
+    stats = asyncio.run(service.aprocess_scraped_content("https://example.com/bees", "beekeeping " * 50, deadline))
+    report = service.ingestion_report()["https://example.com/bees"]
+    service.clear_vectorstore()
+
+    assert embeddings.stats["calls"] == 0
+    assert stats["chunks"] > 0
+    assert stats["kept"] == 0 and stats["skipped"] == stats["chunks"]
+    assert report["kept"] == 0 and report["skipped"] == stats["chunks"]
+    assert deadline.degradations == [{"stage": "rag_ingest", "action": "skipped"}]
+
+
+def test_degraded_article_reports_degradations_and_is_not_cached(article_service, sample_brief, tmp_path):
+    """Degraded stages are reported and kept out of the section cache"""
+    service, _ = article_service()
+
+    article = asyncio.run(service.generate_article_from_brief(sample_brief, deadline=Deadline(5)))
+
+    assert {"stage": "section", "action": "fast_model"} in article["degradations"]
+    assert {"stage": "introduction", "action": "fast_model"} in article["degradations"]
+    assert not list(tmp_path.glob("sections/**/*"))
+
+
+def test_stage_without_its_retrieval_is_not_cached(monkeypatch, article_service, sample_brief, tmp_path):
+    """A section generated after its retrieval was skipped is neither cached nor checkpointed"""
+    async def skipped_retrieval(query, k=5, deadline=None):
+        deadline.degrade("retrieval", "skipped")
+        return []
+
+    service, _ = article_service()
+    monkeypatch.setattr(rag_service, "aretrieve_relevant_content", skipped_retrieval)
+    saved = []
+    monkeypatch.setattr(service.checkpoints, "save_stage", lambda *args: saved.append(args[2]))
+
+    article = asyncio.run(service.generate_article_from_brief(sample_brief, deadline=Deadline(600)))
+
+    assert article["degradations"] == [{"stage": "retrieval", "action": "skipped"}]
+    assert not list(tmp_path.glob("sections/**/*"))
+    assert saved == []
+
+
+def test_slow_scrape_is_bounded_by_the_deadline(monkeypatch):
+    """A scrape that outlives the request deadline answers 504 instead of blocking the loop"""
+    release = threading.Event()
+
+    class SlowScraper:
+        def scrape_url(self, url, deadline=None):
+            release.wait(5)
+            return "late"
+
+    monkeypatch.setattr(main, "get_url_scraper", lambda: SlowScraper())
+
+    async def run():
+        started = time.monotonic()
+        try:
+            with pytest.raises(HTTPException) as error:
+                await main.analyze_url(UrlAnalysisRequest(url="https://example.com"), x_request_deadline=0.2)
+            return error.value, time.monotonic() - started
+        finally:
+            release.set()
+
+    error, elapsed = asyncio.run(run())
+    assert error.status_code == 504
+    assert elapsed < 1
+
+
+def test_overloaded_analysis_is_a_retryable_503(monkeypatch):
+    """Provider throttling while analyzing a URL maps to 503 with Retry-After"""
+    class Scraper:
+        def scrape_url(self, url, deadline=None):
+            return "Scraped text"
+
+    class Ingest:
+        async def aprocess_scraped_content(self, url, content, deadline=None):
+            return {}
+
+    class OverloadedAnalyzer:
+        async def analyze_content(self, content, deadline=None):
+            raise LLMOverloadedError("provider overloaded", retry_after=2.5)
+
+    monkeypatch.setattr(main, "get_url_scraper", lambda: Scraper())
+    monkeypatch.setattr(main, "get_rag_service", lambda: Ingest())
+    monkeypatch.setattr(main, "get_content_analyzer", lambda: OverloadedAnalyzer())
+    monkeypatch.setattr(main.content_store, "put", lambda content: "ab" * 16)
+    response = TestClient(main.app).post("/api/analyze-url", json={"url": "https://example.com"})
+    assert response.status_code == 503
+    assert response.headers["Retry-After"] == "3"
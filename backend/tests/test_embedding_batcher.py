@@ -0,0 +1,118 @@
+"""Tests for coalescing concurrent embedding requests into batches"""
+import asyncio
+import sys
+import os
+
+# Add parent directory to path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from benchmarks.fake_llm import FakeEmbeddings
+from embedding_batcher import EmbeddingBatcher
+from rag_service import RAGService
+
+
+def test_concurrent_callers_share_one_call_and_get_their_own_vectors():
+    """Texts from concurrent callers go out in one call and come back in order"""
+    embeddings = FakeEmbeddings(call_latency=0, text_latency=0)
+    batcher = EmbeddingBatcher(embeddings.aembed_documents, max_batch_size=64, max_wait=0.01)
+    requests = [[f"text {i} {j}" for j in range(i + 1)] for i in range(5)]
+
+    async def run():
+        return await asyncio.gather(*(batcher.embed(texts) for texts in requests))
+
+    results = asyncio.run(run())
+
+    assert embeddings.stats["calls"] == 1
+    for texts, vectors in zip(requests, results):
+        assert vectors == [embeddings._vector(text) for text in texts]
+
+
+def test_full_batch_is_sent_without_waiting():
+    """Reaching the max batch size flushes before the wait expires"""
+    embeddings = FakeEmbeddings(call_latency=0, text_latency=0)
+    batcher = EmbeddingBatcher(embeddings.aembed_documents, max_batch_size=4, max_wait=10)
+
+    async def run():
+        return await asyncio.wait_for(
+            asyncio.gather(*(batcher.embed([f"text {i}"]) for i in range(8))), timeout=1
+        )
+
+    assert len(asyncio.run(run())) == 8
+    assert embeddings.stats["calls"] == 2
+
+
+def test_backend_failure_reaches_every_caller_in_the_batch():
+    """A failed batch call raises in each waiting caller"""
+    async def failing_embed(texts):
+        raise RuntimeError("embedding backend unavailable")
+
+    batcher = EmbeddingBatcher(failing_embed, max_batch_size=64, max_wait=0.01)
+
+    async def run():
+        return await asyncio.gather(*(batcher.embed(["text"]) for _ in range(3)), return_exceptions=True)
+
+    results = asyncio.run(run())
+    assert all(isinstance(result, RuntimeError) for result in results)
+
+
+def test_cancelled_callers_are_not_embedded():
+    """Texts of a caller that gave up before the flush are left out of the call"""
+    embedded = []
+
+    async def recording_embed(texts):
+        embedded.extend(texts)
+        return [[0.0] for _ in texts]
+
+    batcher = EmbeddingBatcher(recording_embed, max_batch_size=64, max_wait=0.01)
+
+    async def run():
+        abandoned = asyncio.ensure_future(batcher.embed(["abandoned"]))
+        kept = asyncio.ensure_future(batcher.embed(["kept"]))
+        await asyncio.sleep(0)
+        abandoned.cancel()
+        return await kept
+
+    assert asyncio.run(run()) == [[0.0]]
+    assert embedded == ["kept"]
+
+
+def test_cancelled_batch_does_not_leave_callers_waiting():
+    """Cancelling an in-flight batch cancels its callers instead of hanging them"""
+    async def run():
+        in_flight = asyncio.Event()
+
+        async def slow_embed(texts):
+            in_flight.set()
+            await asyncio.sleep(10)
+
+        batcher = EmbeddingBatcher(slow_embed, max_batch_size=64, max_wait=0)
+        callers = [asyncio.ensure_future(batcher.embed(["text"])) for _ in range(2)]
+        await in_flight.wait()
+        for task in batcher._tasks:
+            task.cancel()
+        return await asyncio.wait_for(asyncio.gather(*callers, return_exceptions=True), timeout=1)
+
+    results = asyncio.run(run())
+    assert all(isinstance(result, asyncio.CancelledError) for result in results)
+
+
+def test_rag_service_batches_concurrent_ingestion_and_retrieval():
+    """Concurrent pages and queries in RAGService share embedding calls"""
+    embeddings = FakeEmbeddings(call_latency=0.01, text_latency=0)
+    service = RAGService(batch_max_wait=0.02)
+    service.embedding = embeddings
+    pages = {
+        f"https://example.com/{topic}": f"{topic} " * 50 + "care and maintenance guide"
+        for topic in ("beekeeping", "composting", "woodworking")
+    }
+
+    async def run():
+        await asyncio.gather(*(service.aprocess_scraped_content(url, text) for url, text in pages.items()))
+        return await asyncio.gather(*(service.aretrieve_relevant_content(topic, k=1) for topic in ("beekeeping", "woodworking")))
+
+    bees, wood = asyncio.run(run())
+    service.clear_vectorstore()
+
+    assert embeddings.stats["calls"] == 2
+    assert bees[0]["source"] == "https://example.com/beekeeping"
+    assert wood[0]["source"] == "https://example.com/woodworking"
@@ -0,0 +1,91 @@
+"""Tests for hedged LLM requests"""
+import asyncio
+import sys
+import os
+
+# Add parent directory to path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from langchain.schema import HumanMessage
+from benchmarks.fake_llm import FakeChatAnthropic
+from metrics import LLM_HEDGES
+from model_router import HedgePolicy, ModelRouter, STAGE_ROUTES
+
+
+def _router(fake_llm, **policy):
+    policy.setdefault("min_delay", 0)
+    policy.setdefault("min_samples", 5)
+    return ModelRouter(
+        llm_factory=lambda model, route: fake_llm,
+        hedging=HedgePolicy(enabled=True, **policy),
+    )
+
+
+async def _call(router, stage="section"):
+    return await router.ainvoke(stage, [HumanMessage(content="section prompt")])
+
+
+async def _warm_up(router, calls=5):
+    for _ in range(calls):
+        await _call(router)
+
+
+def test_hedge_wins_against_slow_call():
+    """A call stuck in the tail is duplicated and the fast duplicate is used"""
+    fake_llm = FakeChatAnthropic(base_latency=0.01, input_token_latency=0)
+    router = _router(fake_llm)
+    model = STAGE_ROUTES["section"]["model"]
+    won_before = LLM_HEDGES.value(stage="section", outcome="won")
+
+    async def run():
+        await _warm_up(router)
+        fake_llm.injected_latencies.append(5.0)
+        started = asyncio.get_running_loop().time()
+        await _call(router)
+        return asyncio.get_running_loop().time() - started
+
+    elapsed = asyncio.run(run())
+    assert elapsed < 1.0
+    assert router.stats[("section", model)]["hedges"] == 1
+    assert router.stats[("section", model)]["hedge_wins"] == 1
+    assert LLM_HEDGES.value(stage="section", outcome="won") == won_before + 1
+    # The slow original was cancelled, so only the duplicate completed
+    assert fake_llm.stats["started"] == fake_llm.stats["calls"] + 1
+
+
+def test_no_hedging_without_enough_history():
+    """Hedge delays are only derived once the stage has enough latency samples"""
+    fake_llm = FakeChatAnthropic(base_latency=0.01, input_token_latency=0)
+    router = _router(fake_llm, min_samples=50)
+
+    async def run():
+        await _warm_up(router)
+        fake_llm.injected_latencies.append(0.2)
+        await _call(router)
+
+    asyncio.run(run())
+    assert router.stats[("section", STAGE_ROUTES["section"]["model"])]["hedges"] == 0
+
+
+def test_hedges_are_capped_by_extra_spend_budget():
+    """Once hedge credits run out, slow calls are left to finish on their own"""
+    fake_llm = FakeChatAnthropic(base_latency=0.01, input_token_latency=0)
+    router = _router(fake_llm, burst=1, max_extra_ratio=0)
+    # A fixed delay far below the injected latency, so every slow call is due a hedge
+    router.hedging.delay = lambda latencies: 0.05
+    skipped_before = LLM_HEDGES.value(stage="section", outcome="skipped")
+
+    async def run():
+        fake_llm.injected_latencies.append(0.5)
+        await _call(router)
+        fake_llm.injected_latencies.append(0.5)
+        await _call(router)
+
+    asyncio.run(run())
+    assert router.stats[("section", STAGE_ROUTES["section"]["model"])]["hedges"] == 1
+    assert LLM_HEDGES.value(stage="section", outcome="skipped") == skipped_before + 1
+
+
+def test_hedging_disabled_by_default():
+    """The shared policy only hedges when explicitly enabled"""
+    assert HedgePolicy().delay([1.0] * 100) is None
@@ -0,0 +1,168 @@
+"""Tests for the background job queue"""
+import asyncio
+import subprocess
+import sys
+import os
+import time
+
+import pytest
+
+# Add parent directory to path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from job_queue import JobQueue, JobStore, IdempotencyConflictError, JobQueueFullError, JOB_RUNNING, JOB_SUCCEEDED, JOB_FAILED
+
+
+async def _wait_for(store, job_id, timeout=2.0):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        job = store.get(job_id)
+        if job["status"] in (JOB_SUCCEEDED, JOB_FAILED):
+            return job
+        await asyncio.sleep(0.01)
+    raise AssertionError("job did not finish")
+
+
+def _queue(tmp_path, ttl_seconds=3600):
+    queue = JobQueue(JobStore(str(tmp_path / "jobs.sqlite3"), ttl_seconds=ttl_seconds), workers=2)
+    calls = []
+
+    async def handler(payload, report_progress):
+        calls.append(payload)
+        report_progress({"completed_stages": 1, "total_stages": 1})
+        if payload.get("fail"):
+            raise Exception("boom")
+        return {"echo": payload["value"]}
+
+    queue.register("echo", handler)
+    return queue, calls
+
+
+def test_job_runs_in_background(tmp_path):
+    """Submit returns immediately and the worker stores the result"""
+    queue, _ = _queue(tmp_path)
+
+    async def run():
+        job, created = await queue.submit("echo", {"value": 1})
+        assert created and job["status"] == "queued"
+        return await _wait_for(queue.store, job["job_id"])
+
+    job = asyncio.run(run())
+    assert job["status"] == JOB_SUCCEEDED
+    assert job["result"] == {"echo": 1}
+    assert job["progress"]["completed_stages"] == 1
+
+
+def test_failed_job_records_error(tmp_path):
+    """Handler exceptions mark the job as failed"""
+    queue, _ = _queue(tmp_path)
+
+    async def run():
+        job, _ = await queue.submit("echo", {"value": 1, "fail": True})
+        return await _wait_for(queue.store, job["job_id"])
+
+    job = asyncio.run(run())
+    assert job["status"] == JOB_FAILED
+    assert job["error"] == "boom"
+
+
+def test_idempotency_key_returns_existing_job(tmp_path):
+    """The same key and payload never starts a second job"""
+    queue, calls = _queue(tmp_path)
+
+    async def run():
+        first, created_first = await queue.submit("echo", {"value": 1}, "key-1")
+        second, created_second = await queue.submit("echo", {"value": 1}, "key-1")
+        await _wait_for(queue.store, first["job_id"])
+        with pytest.raises(IdempotencyConflictError):
+            await queue.submit("echo", {"value": 2}, "key-1")
+        return first, created_first, second, created_second
+
+    first, created_first, second, created_second = asyncio.run(run())
+    assert created_first and not created_second
+    assert first["job_id"] == second["job_id"]
+    assert len(calls) == 1
+
+
+def test_known_key_is_returned_when_queue_is_full(tmp_path):
+    """A full queue rejects new jobs but still answers resubmits of an existing key"""
+    queue = JobQueue(JobStore(str(tmp_path / "jobs.sqlite3")), workers=1, max_queue_size=1)
+
+    async def run():
+        release = asyncio.Event()
+
+        async def handler(payload, report_progress):
+            await release.wait()
+            return payload
+
+        queue.register("echo", handler)
+        await queue.submit("echo", {"value": 1})
+        await asyncio.sleep(0.01)
+        waiting, _ = await queue.submit("echo", {"value": 2}, "key-2")
+        with pytest.raises(JobQueueFullError):
+            await queue.submit("echo", {"value": 3})
+        again, created = await queue.submit("echo", {"value": 2}, "key-2")
+        release.set()
+        await queue.shutdown()
+        return waiting, again, created
+
+    waiting, again, created = asyncio.run(run())
+    assert not created and again["job_id"] == waiting["job_id"]
+
+def test_jobs_expire_after_ttl(tmp_path):
+    """Finished jobs are dropped from the store after the TTL"""
+    store = JobStore(str(tmp_path / "jobs.sqlite3"), ttl_seconds=0)
+    job, _ = store.get_or_create("echo", {"value": 1})
+    time.sleep(0.01)
+    assert store.get(job["job_id"]) is None
+
+
+def test_failed_job_key_starts_a_new_job(tmp_path):
+    """Retrying with the key of a failed job runs it again instead of returning the failure"""
+    queue, calls = _queue(tmp_path)
+
+    async def run():
+        first, _ = await queue.submit("echo", {"value": 1, "fail": True}, "key-1")
+        await _wait_for(queue.store, first["job_id"])
+        retry, created = await queue.submit("echo", {"value": 1, "fail": True}, "key-1")
+        assert created and retry["job_id"] != first["job_id"]
+        again, created_again = await queue.submit("echo", {"value": 1, "fail": True}, "key-1")
+        assert not created_again and again["job_id"] == retry["job_id"]
+        return first, await _wait_for(queue.store, retry["job_id"])
+
+    first, retry = asyncio.run(run())
+    assert len(calls) == 2
+    assert retry["status"] == JOB_FAILED
+    assert queue.store.get(first["job_id"])["status"] == JOB_FAILED
+
+
+def test_restart_requeues_queued_jobs_and_fails_interrupted_ones(tmp_path):
+    """Jobs left behind by a dead process are resumed or failed when workers start"""
+    store = JobStore(str(tmp_path / "jobs.sqlite3"))
+    queued, _ = store.get_or_create("echo", {"value": 1})
+    interrupted, _ = store.get_or_create("echo", {"value": 2})
+    dead = subprocess.Popen([sys.executable, "-c", "pass"])
+    dead.wait()
+    store.update(interrupted["job_id"], status=JOB_RUNNING, owner_pid=dead.pid)
+
+    queue, calls = _queue(tmp_path)
+
+    async def run():
+        queue.start()
+        return await _wait_for(queue.store, queued["job_id"])
+
+    job = asyncio.run(run())
+    assert job["status"] == JOB_SUCCEEDED
+    assert calls == [{"value": 1}]
+    failed = queue.store.get(interrupted["job_id"])
+    assert failed["status"] == JOB_FAILED
+    assert "restart" in failed["error"]
+
+
+def test_store_file_is_created_on_first_use(tmp_path):
+    """Building a store touches nothing on disk until it is used"""
+    path = tmp_path / "jobs" / "jobs.sqlite3"
+    store = JobStore(str(path))
+    assert not path.exists()
+    store.get_or_create("echo", {"value": 1})
+    assert path.exists()
@@ -0,0 +1,121 @@
+"""Tests for the shared LLM gateway"""
+import asyncio
+import sys
+import os
+
+import pytest
+
+# Add parent directory to path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from langchain.schema import HumanMessage
+from benchmarks.fake_llm import FakeChatAnthropic
+from llm_gateway import AdaptiveConcurrencyLimiter, LLMGateway, LLMOverloadedError
+
+
+class FakeResponse:
+    def __init__(self, status_code, headers=None):
+        self.status_code = status_code
+        self.headers = headers or {}
+
+
+class FakeStatusError(Exception):
+    def __init__(self, status_code, retry_after=None):
+        super().__init__(f"status {status_code}")
+        headers = {"retry-after": str(retry_after)} if retry_after is not None else {}
+        self.response = FakeResponse(status_code, headers)
+        self.status_code = status_code
+
+
+class FlakyLLM(FakeChatAnthropic):
+    """Fake LLM that fails a fixed number of times before succeeding."""
+
+    failures: int = 0
+    status_code: int = 429
+    retry_after: float = 0
+
+    async def _agenerate(self, messages, stop=None, run_manager=None, **kwargs):
+        if self.failures > 0:
+            self.failures -= 1
+            raise FakeStatusError(self.status_code, self.retry_after)
+        return await super()._agenerate(messages, stop, run_manager, **kwargs)
+
+
+def _gateway(**kwargs):
+    return LLMGateway(base_delay=0.01, max_delay=0.02, **kwargs)
+
+
+def test_retries_throttled_calls_and_backs_off_concurrency():
+    """429s are retried, honour retry-after and halve the concurrency limit"""
+    gateway = _gateway(max_concurrency=8)
+    llm = FlakyLLM(failures=2, retry_after=0.05, base_latency=0)
+    initial_limit = gateway.limiter.limit
+
+    response = asyncio.run(gateway.ainvoke(llm, [HumanMessage(content="hello")]))
+
+    assert response.content.startswith("Generated text")
+    assert gateway.stats["retries"] == 2
+    assert gateway.stats["throttled"] == 2
+    assert gateway.limiter.limit < initial_limit
+
+
+def test_raises_overloaded_after_max_retries():
+    """Persistent throttling surfaces as LLMOverloadedError with retry-after"""
+    gateway = _gateway(max_retries=1)
+    llm = FlakyLLM(failures=5, retry_after=0.01, base_latency=0)
+
+    with pytest.raises(LLMOverloadedError) as exc_info:
+        asyncio.run(gateway.ainvoke(llm, [HumanMessage(content="hello")]))
+    assert exc_info.value.retry_after == pytest.approx(0.01)
+
+
+def test_does_not_retry_client_errors():
+    """Non-retryable errors such as 400 are raised immediately"""
+    gateway = _gateway()
+    llm = FlakyLLM(failures=1, status_code=400, base_latency=0)
+
+    with pytest.raises(FakeStatusError):
+        asyncio.run(gateway.ainvoke(llm, [HumanMessage(content="hello")]))
+    assert gateway.stats["retries"] == 0
+
+
+def test_concurrency_never_exceeds_limit():
+    """Concurrent calls are queued behind the adaptive limit"""
+    gateway = _gateway(max_concurrency=2)
+    gateway.limiter.latency_target = 0
+    peak = 0
+
+    class TrackingLLM(FakeChatAnthropic):
+        async def _agenerate(self, messages, stop=None, run_manager=None, **kwargs):
+            nonlocal peak
+            peak = max(peak, gateway.limiter.in_flight)
+            return await super()._agenerate(messages, stop, run_manager, **kwargs)
+
+    llm = TrackingLLM(base_latency=0.01)
+
+    async def run():
+        await asyncio.gather(*[
+            gateway.ainvoke(llm, [HumanMessage(content=f"call {i}")]) for i in range(6)
+        ])
+
+    asyncio.run(run())
+    assert peak <= 2
+    assert gateway.stats["succeeded"] == 6
+
+
+def test_cancelled_waiter_passes_its_slot_on():
+    """A waiter cancelled right after being woken does not strand the others"""
+    limiter = AdaptiveConcurrencyLimiter(initial_limit=1)
+
+    async def run():
+        await limiter.acquire()
+        woken = asyncio.ensure_future(limiter.acquire())
+        waiting = asyncio.ensure_future(limiter.acquire())
+        await asyncio.sleep(0)
+        limiter.release()
+        woken.cancel()
+        await asyncio.wait_for(waiting, timeout=1)
+        return woken.cancelled()
+
+    assert asyncio.run(run())
+    assert limiter.in_flight == 1
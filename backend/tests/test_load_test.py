@@ -0,0 +1,72 @@
+"""Tests for the offline load-test harness and its fake backends"""
+import asyncio
+import os
+import sys
+
+# Add parent directory to path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from benchmarks.fake_llm import FakeEmbeddings
+from benchmarks.fixture_server import FixtureServer
+from benchmarks.load_test import build_parser, compare_to_baseline, run_load_test
+from url_scraper import UrlScraper
+
+
+def _result(rps, p95_ms, errors=0, peak_rss_mb=100.0):
+    return {"rps": rps, "p95_ms": p95_ms, "errors": errors, "peak_rss_mb": peak_rss_mb}
+
+
+def test_fake_embeddings_are_deterministic_and_similar_for_shared_words():
+    """Same text gives the same vector; overlapping texts are closer than unrelated ones"""
+    embeddings = FakeEmbeddings(call_latency=0, text_latency=0)
+    a, b, c = embeddings.embed_documents([
+        "sourdough starter feeding schedule",
+        "sourdough starter feeding tips",
+        "beekeeping hive inspection",
+    ])
+    assert embeddings.embed_query("sourdough starter feeding schedule") == a
+    dot = lambda x, y: sum(i * j for i, j in zip(x, y))
+    assert dot(a, b) > dot(a, c)
+    assert embeddings.stats == {"calls": 2, "texts": 4}
+
+
+def test_fixture_server_pages_can_be_scraped():
+    """UrlScraper extracts the article text from a local fixture page"""
+    with FixtureServer() as fixtures:
+        text = UrlScraper().scrape_url(fixtures.page_urls(2)[1])
+    assert "guide, part 1" in text
+    assert "analytics" not in text
+
+
+def test_compare_to_baseline_flags_only_real_regressions():
+    """Throughput, p95, RSS and error regressions beyond the threshold are reported"""
+    baseline = {"endpoints": {
+        "health": _result(500, 10),
+        "generate_brief": _result(20, 200),
+        "content": _result(300, 15),
+    }}
+    results = {"endpoints": {
+        "health": _result(450, 11),  # within 20%
+        "generate_brief": _result(12, 300, errors=1),
+        "content": _result(300, 15, peak_rss_mb=200.0),
+        "new_endpoint": _result(1, 1000),  # no baseline, ignored
+    }}
+    regressions = compare_to_baseline(results, baseline, max_regression=0.2)
+    assert len(regressions) == 4
+    assert not any(r.startswith(("health", "new_endpoint")) for r in regressions)
+    assert any(r.startswith("content: peak RSS") for r in regressions)
+
+
+def test_load_test_drives_endpoints_against_fake_server():
+    """A tiny run against the fake-backed server completes without errors"""
+    args = build_parser().parse_args([
+        "--requests", "2", "--concurrency", "2",
+        "--endpoints", "health,analyze_url,generate_brief",
+        "--llm-latency", "0.01", "--embed-latency", "0",
+    ])
+    results = asyncio.run(run_load_test(args))
+    assert set(results["endpoints"]) == {"health", "analyze_url", "generate_brief"}
+    for result in results["endpoints"].values():
+        assert result["errors"] == 0
+        assert result["rps"] > 0
+        assert result["p50_ms"] <= result["p95_ms"] <= result["p99_ms"]
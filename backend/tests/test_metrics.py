@@ -0,0 +1,51 @@
+"""Tests for the Prometheus metrics endpoint"""
+import sys
+import os
+
+from fastapi.testclient import TestClient
+
+# Add parent directory to path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from main import app
+from metrics import MetricsRegistry, track_stage, STAGE_DURATION
+
+client = TestClient(app)
+
+
+def test_histogram_renders_cumulative_buckets():
+    """Histogram buckets are cumulative and end with +Inf, sum and count"""
+    registry = MetricsRegistry()
+    histogram = registry.histogram("test_seconds", "Test.", ["stage"], buckets=[0.1, 1])
+    histogram.observe(0.05, stage="a")
+    histogram.observe(0.5, stage="a")
+    histogram.observe(5, stage="a")
+
+    lines = registry.render().splitlines()
+    assert 'test_seconds_bucket{stage="a",le="0.1"} 1' in lines
+    assert 'test_seconds_bucket{stage="a",le="1"} 2' in lines
+    assert 'test_seconds_bucket{stage="a",le="+Inf"} 3' in lines
+    assert 'test_seconds_count{stage="a"} 3' in lines
+    assert "# TYPE test_seconds histogram" in lines
+
+
+def test_counter_labels_are_escaped():
+    """Label values with quotes and newlines stay valid exposition format"""
+    registry = MetricsRegistry()
+    counter = registry.counter("test_total", "Test.", ["route"])
+    counter.inc(2, route='a"b\nc')
+    assert 'test_total{route="a\\"b\\nc"} 2' in registry.render()
+
+
+def test_metrics_endpoint_exposes_stages_and_requests():
+    """/metrics serves stage timings and per-route HTTP metrics"""
+    with track_stage("chunk"):
+        pass
+    client.get("/api/health")
+
+    response = client.get("/metrics")
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("text/plain")
+    assert 'adaptify_stage_duration_seconds_count{stage="chunk"}' in response.text
+    assert 'route="/api/health"' in response.text
+    assert STAGE_DURATION.count(stage="chunk") >= 1
@@ -0,0 +1,84 @@
+"""Tests for per-stage model routing"""
+import asyncio
+import sys
+import os
+
+# Add parent directory to path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from langchain.schema import HumanMessage
+from benchmarks.fake_llm import FakeChatAnthropic
+from model_router import ModelRouter, STAGE_ROUTES, create_anthropic_llm
+
+
+def _router():
+    return ModelRouter(llm_factory=lambda model, route: FakeChatAnthropic(model=model, base_latency=0))
+
+
+def test_latency_sensitive_stages_use_fast_model():
+    """Analysis and conclusions are routed to the fast model"""
+    router = _router()
+    assert router.select_model("analysis") == STAGE_ROUTES["analysis"]["model"]
+    assert STAGE_ROUTES["conclusion"]["model"] == STAGE_ROUTES["analysis"]["model"]
+    assert STAGE_ROUTES["section"]["model"] != STAGE_ROUTES["conclusion"]["model"]
+
+
+def test_falls_back_when_p95_exceeds_budget():
+    """A stage over its p95 latency budget is routed to the fallback model"""
+    router = _router()
+    route = STAGE_ROUTES["section"]
+    for _ in range(router.min_samples):
+        router.record("section", route["model"], route["latency_budget"] + 5)
+
+    assert router.select_model("section") == route["fallback_model"]
+
+
+def test_article_reports_the_models_that_served_each_stage(article_service, sample_brief):
+    """A stage that fell back is reported with the fallback model, not its route"""
+    service, _ = article_service()
+    router = service.generator.config.router
+    route = STAGE_ROUTES["section"]
+    for _ in range(router.min_samples):
+        router.record("section", route["model"], route["latency_budget"] + 5)
+
+    article = asyncio.run(service.generate_article_from_brief(sample_brief))
+
+    assert article["llm_info"]["models"] == {
+        "introduction": {STAGE_ROUTES["introduction"]["model"]: 1},
+        "section": {route["fallback_model"]: len(sample_brief["outline"])},
+        "conclusion": {STAGE_ROUTES["conclusion"]["model"]: 1},
+    }
+
+
+def test_returns_to_primary_after_window():
+    """Slow samples expire, so the primary model is used again"""
+    router = _router()
+    router.window_seconds = 0
+    route = STAGE_ROUTES["section"]
+    for _ in range(router.min_samples):
+        router.record("section", route["model"], route["latency_budget"] + 5)
+
+    assert router.select_model("section") == route["model"]
+
+
+def test_reports_latency_tokens_and_cost():
+    """Calls through the router are reported per stage and model"""
+    router = _router()
+    asyncio.run(router.ainvoke("brief", [HumanMessage(content="brief prompt")]))
+
+    stats = router.report()["brief"][STAGE_ROUTES["brief"]["model"]]
+    assert stats["calls"] == 1
+    assert stats["output_tokens"] > 0
+    assert stats["cost_usd"] > 0
+
+
+def test_prompt_caching_header_follows_the_switch(monkeypatch):
+    """The caching beta header is only sent when ENABLE_PROMPT_CACHING is on"""
+    monkeypatch.setenv("ANTHROPIC_API_KEY", "test-key")
+    monkeypatch.setenv("ENABLE_PROMPT_CACHING", "true")
+    enabled = create_anthropic_llm("claude-3-haiku-20240307", STAGE_ROUTES["section"])
+    monkeypatch.setenv("ENABLE_PROMPT_CACHING", "false")
+    disabled = create_anthropic_llm("claude-3-haiku-20240307", STAGE_ROUTES["section"])
+
+    assert "anthropic-beta" in enabled.default_headers
+    assert not disabled.default_headers
@@ -0,0 +1,32 @@
+"""Tests for the shared, cacheable article prompt prefix"""
+import asyncio
+import sys
+import os
+
+# Add parent directory to path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+
+def _run_article(article_service, sample_brief, prompt_caching):
+    service, fake_llm = article_service(f"-{prompt_caching}")
+    service.generator.config.prompt_caching = prompt_caching
+    article = asyncio.run(service.generate_article_from_brief(sample_brief))
+    return article, fake_llm.stats
+
+
+def test_article_stages_share_cached_prefix(article_service, sample_brief):
+    """Every stage after the first reads the article context from cache"""
+    article, stats = _run_article(article_service, sample_brief, prompt_caching=True)
+    stages = len(sample_brief["outline"]) + 2
+    assert article["sections"] == stages
+    assert stats["calls"] == stages
+    assert stats["cache_creation_input_tokens"] > 0
+    assert stats["cache_read_input_tokens"] == (stages - 1) * stats["cache_creation_input_tokens"]
+
+
+def test_prompt_caching_reduces_cost(article_service, sample_brief):
+    """Cached prefixes are cheaper than resending the full prompt"""
+    _, uncached = _run_article(article_service, sample_brief, prompt_caching=False)
+    _, cached = _run_article(article_service, sample_brief, prompt_caching=True)
+    assert uncached["cache_read_input_tokens"] == 0
+    assert cached["cost_usd"] < uncached["cost_usd"]
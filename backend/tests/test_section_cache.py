@@ -0,0 +1,68 @@
+"""Tests for section-level regeneration through the content-addressed section cache"""
+import asyncio
+import copy
+import sys
+import os
+
+# Add parent directory to path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from section_cache import SectionCache, section_cache_key
+
+
+def test_section_cache_round_trip(tmp_path):
+    """Entries are addressed by their inputs and expire after the TTL"""
+    cache = SectionCache(str(tmp_path))
+    key = section_cache_key({"heading": "Intro", "subpoints": ["a", "b"]})
+    assert key == section_cache_key({"subpoints": ["a", "b"], "heading": "Intro"})
+    assert cache.get(key) is None
+    cache.put(key, "Cached section")
+    assert cache.get(key) == "Cached section"
+    assert SectionCache(str(tmp_path), ttl_seconds=-1).get(key) is None
+
+
+def test_regenerate_reuses_unchanged_sections(article_service, sample_brief):
+    """Editing one heading regenerates only that section"""
+    service, fake_llm = article_service()
+    first = asyncio.run(service.generate_article_from_brief(sample_brief))
+    assert not any(part["reused"] for part in first["reuse"]["sections"])
+
+    edited = copy.deepcopy(sample_brief)
+    edited["outline"][1]["heading"] = "A rewritten heading"
+    fake_llm.reset_stats()
+    second = asyncio.run(service.generate_article_from_brief(edited, reuse_cached=True))
+
+    reused = [part["reused"] for part in second["reuse"]["sections"]]
+    assert reused == [index != 1 for index in range(len(edited["outline"]))]
+    assert second["reuse"]["introduction"] is True
+    # The conclusion only sees the tail of the article, which did not change
+    assert second["reuse"]["conclusion"] is True
+    assert fake_llm.stats.get("calls") == 1
+
+
+def test_unchanged_brief_is_fully_reused(article_service, sample_brief):
+    """Resubmitting the same brief makes no LLM calls"""
+    service, fake_llm = article_service()
+    first = asyncio.run(service.generate_article_from_brief(sample_brief))
+    fake_llm.reset_stats()
+    second = asyncio.run(service.generate_article_from_brief(sample_brief, reuse_cached=True))
+    assert fake_llm.stats.get("calls", 0) == 0
+    assert second["content"] == first["content"]
+
+
+def test_section_key_follows_title_and_key_points(article_service, sample_brief):
+    """Sections are written against the shared prefix, so a new title or key point invalidates them"""
+    service, _ = article_service()
+    generator = service.generator
+    section = sample_brief["outline"][0]
+
+    def key(brief):
+        return section_cache_key(
+            generator.stage_cache_inputs("section", brief, {"doc_ids": []}, section=section, relevant_docs=[])
+        )
+
+    retitled = copy.deepcopy(sample_brief)
+    retitled["title"] = "A different article"
+    refocused = copy.deepcopy(sample_brief)
+    refocused["key_points"] = ["A new key point"]
+    assert len({key(sample_brief), key(retitled), key(refocused)}) == 3
@@ -0,0 +1,107 @@
+"""Tests for schema-bound tool-call output and the tolerant JSON parser"""
+import asyncio
+import json
+import sys
+import os
+
+import pytest
+
+# Add parent directory to path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from benchmarks.fake_llm import FakeChatAnthropic
+from content_analyzer import ContentAnalyzer
+from langchain_service import LangChainService
+from metrics import LLM_WASTED_CALLS, STRUCTURED_OUTPUT
+from model_router import ModelRouter
+from models import BriefResponse
+from structured_output import parse_json_output, pydantic_tool, repair_json
+
+BRIEF = {
+    "title": "Composting at Home",
+    "meta_description": "Start composting today.",
+    "outline": [{"heading": "Getting started", "subpoints": ["Bins", "Greens and browns"]}],
+    "key_points": ["Moisture", "Aeration"],
+    "recommendations": {"tone": "friendly", "style": "practical"},
+}
+
+
+def _router(*responses):
+    fake_llm = FakeChatAnthropic(base_latency=0, responses=list(responses))
+    return ModelRouter(llm_factory=lambda model, route: fake_llm)
+
+
+def _generate_brief(service):
+    return asyncio.run(service.generate_brief("composting", "blog", "friendly", "beginners"))
+
+
+def test_tool_schema_is_derived_from_pydantic_model():
+    """Nested models are inlined and server-filled fields are left out"""
+    tool = pydantic_tool(BriefResponse, "submit_brief", "Submit a brief.", exclude=("scraped_content",))
+    schema = tool["input_schema"]
+    assert "scraped_content" not in schema["properties"]
+    assert "title" in schema["required"]
+    assert schema["properties"]["outline"]["items"]["properties"]["heading"] == {"type": "string"}
+    assert "$ref" not in json.dumps(schema)
+
+
+def test_server_filled_ids_stay_out_of_tool_schemas():
+    """The model is never asked to invent a content_id"""
+    tools = [LangChainService().generator.brief_tool, ContentAnalyzer().analysis_tool]
+    for tool in tools:
+        assert "content_id" not in tool["input_schema"]["properties"]
+
+
+def test_repair_json_ignores_prose_and_closes_truncated_output():
+    """Complete JSON is extracted as is; cut-off JSON is trimmed to its last complete value"""
+    assert repair_json('Sure!\n```json\n{"a": [1, 2]}\n```') == ('{"a": [1, 2]}', False)
+
+    truncated = json.dumps(BRIEF)[:-60]
+    content, repaired = repair_json(truncated)
+    assert repaired
+    data = json.loads(content)
+    assert data["title"] == BRIEF["title"]
+    assert data["outline"][0]["heading"] == "Getting started"
+
+    with pytest.raises(json.JSONDecodeError):
+        parse_json_output("no json here", task="test")
+
+
+def test_brief_uses_tool_call_output():
+    """In structured-output mode the brief comes straight from the tool call"""
+    before = STRUCTURED_OUTPUT.value(task="brief", result="tool")
+    service = LangChainService()
+    service.generator.config.router = _router(dict(BRIEF))
+    brief = _generate_brief(service)
+    assert brief["title"] == BRIEF["title"]
+    assert brief["scraped_content"] == ""
+    assert STRUCTURED_OUTPUT.value(task="brief", result="tool") == before + 1
+
+
+def test_truncated_text_brief_is_repaired_instead_of_failing():
+    """A brief cut off mid-answer is repaired rather than forcing a regeneration"""
+    before = STRUCTURED_OUTPUT.value(task="brief", result="repaired")
+    service = LangChainService()
+    service.generator.config.structured_output = False
+    service.generator.config.router = _router(json.dumps(BRIEF) + "\n\nLet me know if")
+    assert _generate_brief(service)["outline"][0]["heading"] == "Getting started"
+
+    service.generator.config.router = _router("```json\n" + json.dumps(BRIEF)[:-40])
+    assert _generate_brief(service)["title"] == BRIEF["title"]
+    assert STRUCTURED_OUTPUT.value(task="brief", result="repaired") == before + 1
+
+
+def test_unusable_analysis_counts_a_wasted_call():
+    """Unparseable analysis output falls back to defaults and is counted"""
+    before = LLM_WASTED_CALLS.value(task="analysis")
+    analyzer = ContentAnalyzer()
+    analyzer.structured_output = False
+    analyzer.router = _router("I could not determine the topic.")
+    result = asyncio.run(analyzer.analyze_content("Some page content"))
+    assert result == {"keyword": "general content", "target_audience": "general audience"}
+    assert LLM_WASTED_CALLS.value(task="analysis") == before + 1
+
+    analyzer.structured_output = True
+    analyzer.router = _router({"keyword": "composting", "target_audience": "gardeners"})
+    result = asyncio.run(analyzer.analyze_content("Some page content"))
+    assert result == {"keyword": "composting", "target_audience": "gardeners"}
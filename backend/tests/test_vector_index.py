@@ -0,0 +1,137 @@
+"""Tests for the shared memory-mapped vector index used in multi-worker mode"""
+import multiprocessing
+import os
+import sys
+
+import numpy as np
+
+# Add parent directory to path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from benchmarks.fake_llm import FakeEmbeddings
+from rag_service import InstrumentedEmbeddings, RAGService
+from vector_index import SharedVectorIndex, quantize
+
+
+def _add_rows(directory, worker, rows):
+    index = SharedVectorIndex(directory)
+    for row in range(rows):
+        index.add([[float(worker), float(row)]], [{"worker": worker, "row": row}])
+
+
+def test_search_returns_nearest_rows_across_segments(tmp_path):
+    """Nearest neighbours are merged over all segments, closest first"""
+    index = SharedVectorIndex(str(tmp_path))
+    index.add([[0.0, 0.0], [10.0, 10.0]], [{"id": "origin"}, {"id": "far"}])
+    index.add([[1.0, 0.0]], [{"id": "near"}])
+
+    matches = index.search([0.2, 0.0], k=2)
+    assert [metadata["id"] for metadata, _ in matches] == ["origin", "near"]
+    assert abs(matches[0][1] - 0.04) < 1e-5  # squared L2, like Chroma
+    assert len(index) == 3
+
+
+def test_readers_map_only_new_segments(tmp_path):
+    """Another process's reader picks up appended segments without remapping old ones"""
+    writer = SharedVectorIndex(str(tmp_path))
+    reader = SharedVectorIndex(str(tmp_path))
+    writer.add([[0.0, 1.0]], [{"id": "first"}])
+    assert reader.refresh() == 1
+    first_segment = reader._segments[0]
+
+    writer.add([[1.0, 0.0]], [{"id": "second"}])
+    assert reader.search([1.0, 0.0], k=1)[0][0]["id"] == "second"
+    assert reader._segments[0] is first_segment
+    assert reader.refresh() == 0
+
+
+def test_clear_resets_every_reader(tmp_path):
+    """Clearing the index is noticed by readers, and new writes start from scratch"""
+    writer = SharedVectorIndex(str(tmp_path))
+    reader = SharedVectorIndex(str(tmp_path))
+    writer.add([[0.0, 1.0]], [{"id": "old"}])
+    assert len(reader) == 1
+
+    writer.clear()
+    writer.add([[1.0, 0.0]], [{"id": "new"}])
+    assert [metadata["id"] for metadata, _ in reader.search([0.0, 1.0], k=5)] == ["new"]
+
+
+def test_concurrent_writer_processes_do_not_lose_segments(tmp_path):
+    """Writes from several processes are serialized by the writer lock"""
+    processes = [
+        multiprocessing.Process(target=_add_rows, args=(str(tmp_path), worker, 10))
+        for worker in range(4)
+    ]
+    for process in processes:
+        process.start()
+    for process in processes:
+        process.join()
+
+    index = SharedVectorIndex(str(tmp_path))
+    assert len(index) == 40
+    rows = {(metadata["worker"], metadata["row"]) for metadata in index.metadata_rows()}
+    assert rows == {(worker, row) for worker in range(4) for row in range(10)}
+    assert len(index._segments) <= index.max_segments
+
+
+def test_rag_services_share_content_through_the_index(tmp_path):
+    """Content processed by one worker's RAGService is retrievable by another's"""
+    workers = [RAGService(index_dir=str(tmp_path)) for _ in range(2)]
+    for service in workers:
+        service.embedding = InstrumentedEmbeddings(FakeEmbeddings(call_latency=0, text_latency=0))
+
+    workers[0].process_scraped_content(
+        "https://example.com/bees", "Beekeeping basics: inspect the hive every week in spring."
+    )
+    results = workers[1].retrieve_relevant_content("beekeeping hive inspection", k=3)
+    assert results[0]["source"] == "https://example.com/bees"
+    assert "inspect the hive" in results[0]["content"]
+
+
+def test_int8_quantization_scales_each_dimension():
+    """Dimensions with very different ranges are each reconstructed within half a step"""
+    rng = np.random.default_rng(0)
+    matrix = (rng.normal(size=(200, 3)) * np.array([0.01, 1.0, 100.0])).astype(np.float32)
+    codes, (scale, offset) = quantize(matrix, "int8")
+    assert codes.dtype == np.int8
+    error = np.abs(codes.astype(np.float32) * scale + offset - matrix)
+    assert (error <= scale / 2 + 1e-6).all()
+
+
+def test_quantized_search_reranks_to_the_exact_results(tmp_path):
+    """float16 and int8 indexes return the same neighbours and distances as float32"""
+    rng = np.random.default_rng(1)
+    vectors = rng.normal(size=(600, 32)).astype(np.float32)
+    queries = rng.normal(size=(20, 32)).astype(np.float32)
+    indexes = {}
+    for quantization in ("none", "float16", "int8"):
+        indexes[quantization] = SharedVectorIndex(str(tmp_path / quantization), quantization=quantization)
+        for start in range(0, 600, 200):
+            indexes[quantization].add(vectors[start:start + 200], [{"id": row} for row in range(start, start + 200)])
+
+    assert (tmp_path / "int8" / "00000001.int8.npy").exists()
+    for query in queries:
+        exact = indexes["none"].search(query, k=5)
+        for quantization in ("float16", "int8"):
+            matches = indexes[quantization].search(query, k=5)
+            assert [m["id"] for m, _ in matches] == [m["id"] for m, _ in exact]
+            assert np.allclose([d for _, d in matches], [d for _, d in exact], rtol=1e-4)
+
+
+def test_compaction_bounds_segments_and_keeps_rows(tmp_path):
+    """Merging segments keeps row order and results, and readers remap without resyncing"""
+    writer = SharedVectorIndex(str(tmp_path), max_segments=4)
+    reader = SharedVectorIndex(str(tmp_path), max_segments=4)
+    for row in range(3):
+        writer.add([[float(row), 0.0]], [{"id": row}])
+    generation = reader.generation
+
+    for row in range(3, 50):
+        writer.add([[float(row), 0.0]], [{"id": row}])
+        assert len(writer._segments) <= 4
+
+    assert [metadata["id"] for metadata in reader.metadata_rows()] == list(range(50))
+    assert reader.search([20.2, 0.0], k=1)[0][0]["id"] == 20
+    assert reader.generation == generation
+    assert len(list(tmp_path.glob("*.jsonl"))) == len(reader._segments)
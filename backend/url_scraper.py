@@ -5,6 +5,9 @@ import time
 from typing import Optional
 import logging
 
+from deadline import Deadline, DeadlineExceededError
+from metrics import track_stage
+
 logger = logging.getLogger(__name__)
 
 class UrlScraper:
@@ -23,15 +26,24 @@ class UrlScraper:
         except Exception:
             return False
     
-    def scrape_url(self, url: str) -> Optional[str]:
-        """Scrape content from URL and extract main text content."""
+    def scrape_url(self, url: str, deadline: Optional[Deadline] = None) -> Optional[str]:
+        """Scrape content from URL and extract main text content.
+        
+        With a ``deadline`` the request timeout is capped to the remaining budget.
+        """
         if not self.validate_url(url):
             raise ValueError(f"Invalid URL: {url}")
         
+        timeout = self.timeout
+        if deadline is not None:
+            deadline.check("scrape")
+            timeout = deadline.timeout(self.timeout)
+        
         try:
             # Make request with timeout
-            response = requests.get(url, headers=self.headers, timeout=self.timeout)
-            response.raise_for_status()
+            with track_stage("scrape"):
+                response = requests.get(url, headers=self.headers, timeout=timeout)
+                response.raise_for_status()
             
             # Check content length
             content_length = len(response.content)
@@ -39,20 +51,21 @@ class UrlScraper:
                 logger.warning(f"Content too large ({content_length} bytes), truncating")
                 response._content = response.content[:self.max_content_length]
             
-            # Parse HTML
-            soup = BeautifulSoup(response.content, 'html.parser')
-            
-            # Remove script and style elements
-            for script in soup(["script", "style"]):
-                script.decompose()
-            
-            # Extract text content
-            text_content = self._extract_main_content(soup)
-            
-            # Clean up text
-            lines = (line.strip() for line in text_content.splitlines())
-            chunks = (phrase.strip() for line in lines for phrase in line.split("  "))
-            text = ' '.join(chunk for chunk in chunks if chunk)
+            with track_stage("extract"):
+                # Parse HTML
+                soup = BeautifulSoup(response.content, 'html.parser')
+                
+                # Remove script and style elements
+                for script in soup(["script", "style"]):
+                    script.decompose()
+                
+                # Extract text content
+                text_content = self._extract_main_content(soup)
+                
+                # Clean up text
+                lines = (line.strip() for line in text_content.splitlines())
+                chunks = (phrase.strip() for line in lines for phrase in line.split("  "))
+                text = ' '.join(chunk for chunk in chunks if chunk)
             
             # Limit final text length
             if len(text) > 10000:
@@ -61,6 +74,8 @@ class UrlScraper:
             return text
             
         except requests.RequestException as e:
+            if isinstance(e, requests.Timeout) and deadline is not None and deadline.remaining() <= 0:
+                raise DeadlineExceededError("scrape")
             logger.error(f"Error scraping URL {url}: {str(e)}")
             raise Exception(f"Failed to scrape URL: {str(e)}")
         except Exception as e:
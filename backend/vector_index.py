@@ -0,0 +1,395 @@
+import contextlib
+import json
+import logging
+import mmap
+import os
+import tempfile
+import threading
+import uuid
+from typing import Any, BinaryIO, Callable, Dict, Iterator, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from constants import VECTOR_INDEX_MAX_SEGMENTS, VECTOR_INDEX_RERANK_FACTOR
+
+try:
+    import fcntl
+except ImportError:  # Windows: no flock, single-process serving only
+    fcntl = None
+
+logger = logging.getLogger(__name__)
+
+LOG_FILE = "segments.log"
+LOCK_FILE = "write.lock"
+QUANTIZATIONS = ("none", "float16", "int8")
+# Rows decoded at a time, which bounds the temporary float32 copy during a scan
+SCAN_BLOCK_ROWS = 16384
+
+
+def quantize(matrix: np.ndarray, quantization: str) -> Tuple[np.ndarray, Optional[np.ndarray]]:
+    """Compressed copy of a float32 matrix, plus per-dimension ``[scale, offset]`` for int8.
+
+    int8 codes decode as ``code * scale + offset``, with each dimension's
+    range mapped onto the full 256 levels.
+    """
+    if quantization == "float16":
+        return matrix.astype(np.float16), None
+    if quantization == "int8":
+        low, high = matrix.min(axis=0), matrix.max(axis=0)
+        scale = np.maximum(high - low, 1e-12) / 255
+        codes = np.clip(np.round((matrix - low) / scale) - 128, -128, 127).astype(np.int8)
+        return codes, np.stack([scale, low + 128 * scale]).astype(np.float32)
+    raise ValueError(f"Unknown quantization {quantization!r}; expected one of {QUANTIZATIONS}")
+
+
+def encode_metadata(metadata: Sequence[Dict[str, Any]]) -> Tuple[bytes, np.ndarray]:
+    """Metadata as JSON lines, plus the byte offset of every line and of the end."""
+    lines = [json.dumps(row).encode("utf-8") + b"\n" for row in metadata]
+    offsets = np.zeros(len(lines) + 1, dtype=np.int64)
+    offsets[1:] = np.cumsum([len(line) for line in lines])
+    return b"".join(lines), offsets
+
+
+class _Metadata:
+    """A segment's chunk metadata, memory-mapped and decoded one row at a time.
+
+    The page cache holds the JSON lines once for every process, instead of
+    each worker keeping its own parsed copy of all chunk text.
+    """
+
+    def __init__(self, directory: str, name: str):
+        self.offsets = np.load(os.path.join(directory, f"{name}.offsets.npy"), mmap_mode="r")
+        with open(os.path.join(directory, f"{name}.jsonl"), "rb") as f:
+            self.data = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+
+    def __len__(self) -> int:
+        return len(self.offsets) - 1
+
+    def __getitem__(self, row: int) -> Dict[str, Any]:
+        return json.loads(self.data[int(self.offsets[row]):int(self.offsets[row + 1])])
+
+    def rows(self, start: int = 0) -> List[Dict[str, Any]]:
+        return [self[row] for row in range(start, len(self))]
+
+
+class _Segment:
+    """One immutable, memory-mapped block of embeddings plus its chunk metadata.
+
+    Quantized segments are scanned through their compressed copy; the float32
+    rows are only read for the candidates being re-ranked.
+    """
+
+    def __init__(self, directory: str, name: str, quantization: str = "none"):
+        self.name = name
+        self.quantization = quantization
+        self.vectors = np.load(os.path.join(directory, f"{name}.npy"), mmap_mode="r")
+        self.metadata = _Metadata(directory, name)
+        self.codes = self.vectors
+        self.scale = self.offset = None
+        if quantization != "none":
+            self.codes = np.load(os.path.join(directory, f"{name}.{quantization}.npy"), mmap_mode="r")
+        if quantization == "int8":
+            self.scale, self.offset = np.load(os.path.join(directory, f"{name}.scales.npy"))
+        # Squared norms are small (one float per row) and make L2 search a single matmul
+        self.norms = np.concatenate([
+            np.einsum("ij,ij->i", block, block) for block in self._decoded_blocks()
+        ]) if len(self.codes) else np.zeros(0, dtype=np.float32)
+
+    def _decoded_blocks(self) -> Iterator[np.ndarray]:
+        for start in range(0, len(self.codes), SCAN_BLOCK_ROWS):
+            block = np.asarray(self.codes[start:start + SCAN_BLOCK_ROWS], dtype=np.float32)
+            yield block * self.scale + self.offset if self.scale is not None else block
+
+    def distances(self, query: np.ndarray, query_norm: float) -> np.ndarray:
+        """Squared L2 distance from ``query`` to every row (approximate if quantized)."""
+        if self.scale is not None:
+            # (c * s + o) . q == c . (s * q) + o . q, so the codes need no decoding
+            scaled_query, bias = self.scale * query, float(self.offset @ query)
+            dots = np.concatenate([
+                np.asarray(self.codes[start:start + SCAN_BLOCK_ROWS], dtype=np.float32) @ scaled_query
+                for start in range(0, len(self.codes), SCAN_BLOCK_ROWS)
+            ]) + bias
+        else:
+            dots = np.concatenate([block @ query for block in self._decoded_blocks()])
+        return self.norms - 2 * dots + query_norm
+
+    def exact_distances(self, rows: np.ndarray, query: np.ndarray) -> np.ndarray:
+        """Exact squared L2 distances for ``rows``, read from the float32 file."""
+        difference = np.asarray(self.vectors[rows], dtype=np.float32) - query
+        return np.einsum("ij,ij->i", difference, difference)
+
+
+class SharedVectorIndex:
+    """On-disk vector index that several worker processes can share.
+
+    Every write adds an immutable segment (``<n>.npy`` embeddings, and
+    ``<n>.jsonl`` metadata with ``<n>.offsets.npy`` row offsets) and then
+    appends one line to ``segments.log`` while holding an exclusive lock, so
+    there is a single writer at a time. Readers memory-map segments read-only
+    and, before each search, map only the segments appended since they last
+    looked.
+
+    Once there are more than ``max_segments``, the writer merges the newest
+    ones (while together they are at least half the size of the one before)
+    into a single segment and swaps in a new log, so the number of segments,
+    and the per-query and mmap cost, stays logarithmic in the rows indexed.
+    Merging keeps row order, so row positions are unchanged.
+
+    With ``quantization`` set to ``float16`` or ``int8``, new segments also get a
+    compressed copy (2x or 4x smaller). Searches scan that copy and re-rank
+    the best ``rerank_factor * k`` candidates per segment with exact float32
+    distances, so only the compressed vectors need to stay in memory.
+    """
+
+    def __init__(
+        self,
+        directory: str = ".vector_index",
+        quantization: str = "none",
+        rerank_factor: int = VECTOR_INDEX_RERANK_FACTOR,
+        max_segments: int = VECTOR_INDEX_MAX_SEGMENTS,
+    ):
+        if quantization not in QUANTIZATIONS:
+            raise ValueError(f"Unknown quantization {quantization!r}; expected one of {QUANTIZATIONS}")
+        self.directory = directory
+        self.quantization = quantization
+        self.rerank_factor = max(1, rerank_factor)
+        self.max_segments = max(1, max_segments)
+        os.makedirs(directory, exist_ok=True)
+        self._log_path = os.path.join(directory, LOG_FILE)
+        self._segments: List[_Segment] = []
+        self._log_offset = 0
+        self._log_inode = None
+        self._generation: Optional[str] = None
+        self._lock = threading.Lock()
+
+    @contextlib.contextmanager
+    def _write_lock(self) -> Iterator[None]:
+        if fcntl is None:
+            raise RuntimeError("The shared vector index needs fcntl (POSIX) for its write lock")
+        with open(os.path.join(self.directory, LOCK_FILE), "a") as lock_file:
+            fcntl.flock(lock_file, fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+    def _read_log(self, offset: int, inode: Optional[int] = None) -> Tuple[List[Dict[str, Any]], int, Optional[int]]:
+        """Complete log entries after ``offset``, the offset after them and the log's inode.
+
+        If the log is no longer ``inode`` (cleared or compacted), it is read from the start.
+        """
+        try:
+            with open(self._log_path, "rb") as f:
+                log_inode = os.fstat(f.fileno()).st_ino
+                if log_inode != inode:
+                    offset = 0
+                f.seek(offset)
+                data = f.read()
+        except FileNotFoundError:
+            return [], 0, None
+        # A line without its newline is still being written; leave it for next time
+        complete = data[:data.rfind(b"\n") + 1]
+        entries = [json.loads(line) for line in complete.splitlines() if line.strip()]
+        return entries, offset + len(complete), log_inode
+
+    def _log_stat(self) -> Tuple[int, Optional[int]]:
+        try:
+            stat = os.stat(self._log_path)
+        except FileNotFoundError:
+            return 0, None
+        return stat.st_size, stat.st_ino
+
+    def refresh(self) -> int:
+        """Map segments appended by any process since the last refresh; returns how many."""
+        with self._lock:
+            if self._log_stat() == (self._log_offset, self._log_inode):
+                return 0
+            while True:
+                entries, log_offset, log_inode = self._read_log(self._log_offset, self._log_inode)
+                mapped = {segment.name: segment for segment in self._segments}
+                if log_inode != self._log_inode:
+                    # Log replaced by a clear or a compaction: rebuild the segment
+                    # list, keeping the mappings of segments a compaction left alone
+                    segments, generation = [], entries[0].get("generation") if entries else None
+                    if generation != self._generation:
+                        mapped = {}
+                else:
+                    segments, generation = list(self._segments), self._generation
+                added = 0
+                try:
+                    for entry in entries:
+                        segment = mapped.get(entry["segment"])
+                        if segment is None:
+                            segment = _Segment(self.directory, entry["segment"], entry.get("quantization", "none"))
+                            added += 1
+                        segments.append(segment)
+                except FileNotFoundError:
+                    if self._log_stat()[1] == log_inode:
+                        raise
+                    # Merged away by a compaction after we read the log; read the new one
+                    continue
+                self._segments, self._log_offset, self._log_inode = segments, log_offset, log_inode
+                self._generation = generation
+                if added:
+                    logger.debug(f"Mapped {added} new vector index segments from {self.directory}")
+                return added
+
+    def add(self, vectors: Sequence[Sequence[float]], metadata: Sequence[Dict[str, Any]]) -> str:
+        """Append a non-empty segment of embeddings with one metadata dict per row."""
+        matrix = np.asarray(vectors, dtype=np.float32)
+        if matrix.ndim != 2 or not len(matrix) or len(matrix) != len(metadata):
+            raise ValueError("Expected a non-empty batch with one metadata entry per embedding row")
+
+        with self._write_lock():
+            entries, _, _ = self._read_log(0)
+            if entries and entries[0]["dim"] != matrix.shape[1]:
+                raise ValueError(
+                    f"Embedding dimension {matrix.shape[1]} does not match index dimension {entries[0]['dim']}"
+                )
+            # Names only grow, so a merged segment never reuses a deleted one's name
+            name = f"{max((int(entry['segment']) for entry in entries), default=0) + 1:08d}"
+            generation = entries[0]["generation"] if entries else uuid.uuid4().hex
+            data, offsets = encode_metadata(metadata)
+            entry = self._write_segment(name, matrix, data, offsets, generation)
+            # The log line is the commit point: readers never see a half-written segment
+            with open(self._log_path, "a", encoding="utf-8") as log:
+                log.write(json.dumps(entry) + "\n")
+                log.flush()
+                os.fsync(log.fileno())
+            if len(entries) + 1 > self.max_segments:
+                self._compact(entries + [entry])
+        self.refresh()
+        return name
+
+    def _write_segment(
+        self, name: str, matrix: np.ndarray, data: bytes, offsets: np.ndarray, generation: str
+    ) -> Dict[str, Any]:
+        """Write a segment's files and return its log entry."""
+        self._write_file(os.path.join(self.directory, f"{name}.npy"), lambda f: np.save(f, matrix))
+        if self.quantization != "none":
+            codes, scales = quantize(matrix, self.quantization)
+            self._write_file(os.path.join(self.directory, f"{name}.{self.quantization}.npy"), lambda f: np.save(f, codes))
+            if scales is not None:
+                self._write_file(os.path.join(self.directory, f"{name}.scales.npy"), lambda f: np.save(f, scales))
+        self._write_file(os.path.join(self.directory, f"{name}.jsonl"), lambda f: f.write(data))
+        self._write_file(os.path.join(self.directory, f"{name}.offsets.npy"), lambda f: np.save(f, offsets))
+        return {
+            "segment": name,
+            "rows": len(matrix),
+            "dim": matrix.shape[1],
+            "quantization": self.quantization,
+            "generation": generation,
+        }
+
+    def _compact(self, entries: List[Dict[str, Any]]) -> None:
+        """Merge the newest segments into one; the caller holds the write lock.
+
+        Segments are taken from the end while the next older one is no more
+        than twice their combined size, so each row is rewritten a
+        logarithmic number of times.
+        """
+        count, rows = 2, entries[-1]["rows"] + entries[-2]["rows"]
+        while count < len(entries) and entries[-count - 1]["rows"] <= 2 * rows:
+            rows += entries[-count - 1]["rows"]
+            count += 1
+        merged, kept = entries[-count:], entries[:-count]
+
+        matrices, parts, offsets = [], [], [np.zeros(1, dtype=np.int64)]
+        for entry in merged:
+            path = os.path.join(self.directory, entry["segment"])
+            matrices.append(np.load(f"{path}.npy", mmap_mode="r"))
+            with open(f"{path}.jsonl", "rb") as f:
+                parts.append(f.read())
+            offsets.append(np.load(f"{path}.offsets.npy")[1:] + offsets[-1][-1])
+        name = f"{int(entries[-1]['segment']) + 1:08d}"
+        entry = self._write_segment(
+            name, np.concatenate(matrices), b"".join(parts), np.concatenate(offsets), entries[0]["generation"]
+        )
+
+        # Swap in the shorter log; readers notice the new inode and remap
+        log = "".join(json.dumps(line) + "\n" for line in kept + [entry])
+        self._write_file(self._log_path, lambda f: f.write(log.encode("utf-8")))
+        for old in merged:
+            self._remove_segment_files(old["segment"])
+        logger.info(f"Merged {count} vector index segments ({rows} rows) into {name}")
+
+    def _remove_segment_files(self, name: str) -> None:
+        # Processes that still map these files keep reading them until they remap
+        for filename in os.listdir(self.directory):
+            if filename.startswith(f"{name}."):
+                with contextlib.suppress(OSError):
+                    os.remove(os.path.join(self.directory, filename))
+
+    def _write_file(self, path: str, write: Callable[[BinaryIO], Any]) -> None:
+        fd, tmp_path = tempfile.mkstemp(dir=self.directory, suffix=".tmp")
+        try:
+            with os.fdopen(fd, "wb") as f:
+                write(f)
+            os.replace(tmp_path, path)
+        except BaseException:
+            with contextlib.suppress(OSError):
+                os.remove(tmp_path)
+            raise
+
+    def search(self, vector: Sequence[float], k: int = 5) -> List[Tuple[Dict[str, Any], float]]:
+        """The ``k`` nearest rows as ``(metadata, squared L2 distance)``, closest first."""
+        self.refresh()
+        query = np.asarray(vector, dtype=np.float32)
+        query_norm = float(query @ query)
+        segments = list(self._segments)
+        candidates: List[Tuple[float, int, int]] = []
+        for segment_index, segment in enumerate(segments):
+            distances = segment.distances(query, query_norm)
+            if segment.quantization == "none":
+                top = min(k, len(distances))
+                rows = np.argpartition(distances, top - 1)[:top]
+                distances = distances[rows]
+            else:
+                top = min(k * self.rerank_factor, len(distances))
+                # Sorted rows read the memory-mapped float32 file front to back
+                rows = np.sort(np.argpartition(distances, top - 1)[:top])
+                distances = segment.exact_distances(rows, query)
+            for distance, row in zip(distances, rows):
+                candidates.append((float(distance), segment_index, int(row)))
+        candidates.sort()
+        return [
+            (segments[segment_index].metadata[row], max(distance, 0.0))
+            for distance, segment_index, row in candidates[:k]
+        ]
+
+    def __len__(self) -> int:
+        self.refresh()
+        return sum(len(segment.metadata) for segment in self._segments)
+
+    @property
+    def generation(self) -> Optional[str]:
+        """Changes whenever the index is cleared, by this or any other process.
+
+        Compactions keep it, since they do not move rows.
+        """
+        self.refresh()
+        return self._generation
+
+    def metadata_rows(self, start: int = 0) -> List[Dict[str, Any]]:
+        """Metadata of every row from row ``start`` on, in insertion order."""
+        self.refresh()
+        rows: List[Dict[str, Any]] = []
+        for segment in list(self._segments):
+            if start >= len(segment.metadata):
+                start -= len(segment.metadata)
+                continue
+            rows.extend(segment.metadata.rows(start))
+            start = 0
+        return rows
+
+    def clear(self) -> None:
+        """Delete every segment; other processes notice the replaced log on refresh."""
+        with self._write_lock():
+            fd, tmp_path = tempfile.mkstemp(dir=self.directory, suffix=".tmp")
+            os.close(fd)
+            os.replace(tmp_path, self._log_path)
+            for filename in os.listdir(self.directory):
+                if filename.endswith((".npy", ".jsonl")):
+                    with contextlib.suppress(OSError):
+                        os.remove(os.path.join(self.directory, filename))
+        self.refresh()
@@ -6,7 +6,8 @@ export default function BackendWakeup() {
   useEffect(() => {
     const wakeupBackend = async () => {
       try {
-        await fetch(`${process.env.NEXT_PUBLIC_API_URL}/api/health`, {
+        // Wakes a sleeping backend and has it warm its clients in the background
+        await fetch(`${process.env.NEXT_PUBLIC_API_URL}/api/ready?warm=true`, {
           method: 'GET',
           signal: AbortSignal.timeout(5000),
         });
@@ -51,9 +51,7 @@ export default function BriefDisplay({
   };
 
   const handleGenerateArticle = async () => {
-    const contentToUse = brief.scraped_content || '';
-    
-    const articleData = await generateArticle(brief, contentToUse);
+    const articleData = await generateArticle(brief, brief.content_id);
     if (articleData && onArticleGenerated) {
       onArticleGenerated(articleData);
     } else if (error && onError) {
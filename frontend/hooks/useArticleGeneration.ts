@@ -1,11 +1,22 @@
 import { useState } from 'react';
-import type { BriefResponse, ArticleResponse, ArticleRequest } from '@/lib/types';
+import type { BriefResponse, ArticleResponse, ArticleRequest, JobResponse } from '@/lib/types';
+
+const JOB_POLL_INTERVAL_MS = 2000;
+
+const sleep = (ms: number) => new Promise((resolve) => setTimeout(resolve, ms));
+
+// Same request body, same key: a retry or double-click maps to the job
+// already submitted instead of paying for a second one
+const idempotencyKey = async (body: string): Promise<string> => {
+  const digest = await crypto.subtle.digest('SHA-256', new TextEncoder().encode(body));
+  return Array.from(new Uint8Array(digest), (byte) => byte.toString(16).padStart(2, '0')).join('');
+};
 
 export const useArticleGeneration = () => {
   const [isGenerating, setIsGenerating] = useState(false);
   const [error, setError] = useState<string | null>(null);
 
-  const generateArticle = async (brief: BriefResponse, scrapedContent?: string): Promise<ArticleResponse | null> => {
+  const generateArticle = async (brief: BriefResponse, contentId?: string | null): Promise<ArticleResponse | null> => {
     setIsGenerating(true);
     setError(null);
 
@@ -16,17 +27,21 @@ export const useArticleGeneration = () => {
         outline: brief.outline,
         key_points: brief.key_points,
         recommendations: brief.recommendations,
-        scraped_content: scrapedContent,
+        content_id: contentId,
       };
 
+      // Generation runs as a background job; the idempotency key makes a
+      // retried submit return the same job instead of paying for a new one
+      const body = JSON.stringify(articleRequest);
       const response = await fetch(
-        `${process.env.NEXT_PUBLIC_API_URL}/api/generate-article`,
+        `${process.env.NEXT_PUBLIC_API_URL}/api/jobs/generate-article`,
         {
           method: 'POST',
           headers: {
             'Content-Type': 'application/json',
+            'Idempotency-Key': await idempotencyKey(body),
           },
-          body: JSON.stringify(articleRequest),
+          body,
         }
       );
 
@@ -34,8 +49,23 @@ export const useArticleGeneration = () => {
         throw new Error(`HTTP error! status: ${response.status}`);
       }
 
-      const articleData: ArticleResponse = await response.json();
-      return articleData;
+      let job: JobResponse = await response.json();
+      while (job.status === 'queued' || job.status === 'running') {
+        await sleep(JOB_POLL_INTERVAL_MS);
+        const pollResponse = await fetch(
+          `${process.env.NEXT_PUBLIC_API_URL}/api/jobs/${job.job_id}`
+        );
+        if (!pollResponse.ok) {
+          throw new Error(`HTTP error! status: ${pollResponse.status}`);
+        }
+        job = await pollResponse.json();
+      }
+
+      if (job.status === 'failed' || !job.result) {
+        throw new Error(job.error || 'Failed to generate article');
+      }
+
+      return job.result;
     } catch (err) {
       const errorMessage =
         err instanceof Error ? err.message : 'Failed to generate article';
@@ -59,6 +59,7 @@ export const useBriefForm = () => {
         target_audience: response.data.target_audience,
         content_type: response.data.content_type,
         tone: response.data.tone,
+        content_id: response.data.content_id,
       });
 
       return { data: response.data };
@@ -84,7 +85,8 @@ export const useBriefForm = () => {
         target_audience: response.data.target_audience,
         content_type: response.data.content_type,
         tone: response.data.tone,
-        scraped_content: response.data.scraped_content || '',
+        // The scraped text stays on the server; only its id is passed along
+        content_id: response.data.content_id,
       };
 
       // Update the form state
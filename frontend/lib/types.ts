@@ -4,6 +4,7 @@ export interface BriefRequest {
   tone: 'professional' | 'casual' | 'technical';
   target_audience: string;
   scraped_content?: string;
+  content_id?: string | null;
 }
 
 export interface OutlineItem {
@@ -23,6 +24,7 @@ export interface BriefResponse {
   key_points: string[];
   recommendations: Recommendations;
   scraped_content?: string;
+  content_id?: string | null;
 }
 
 export interface ArticleRequest {
@@ -32,6 +34,7 @@ export interface ArticleRequest {
   key_points: string[];
   recommendations: Recommendations;
   scraped_content?: string;
+  content_id?: string | null;
 }
 
 export interface ArticleResponse {
@@ -41,6 +44,20 @@ export interface ArticleResponse {
   sections: number;
 }
 
+export interface JobResponse {
+  job_id: string;
+  status: 'queued' | 'running' | 'succeeded' | 'failed';
+  progress: {
+    stage?: string;
+    completed_stages?: number;
+    total_stages?: number;
+  };
+  result: ArticleResponse | null;
+  error: string | null;
+  created_at: number;
+  updated_at: number;
+}
+
 export interface UrlAnalysisRequest {
   url: string;
 }
@@ -51,4 +68,5 @@ export interface UrlAnalysisResponse {
   content_type: 'blog' | 'article' | 'guide';
   tone: 'professional' | 'casual' | 'technical';
   scraped_content?: string;
+  content_id?: string | null;
 }